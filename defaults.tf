@@ -1,6 +1,21 @@
 locals {
   # default for cases when `null` value provided, meaning "use default"
-  search_regions    = var.search_regions == null ? [] : var.search_regions
-  search_accounts   = var.search_accounts == null ? [] : var.search_accounts
-  peering_role_name = var.peering_role_name == null ? "" : var.peering_role_name
+  search_regions                 = var.search_regions == null ? [] : var.search_regions
+  search_parallelism             = var.search_parallelism == null ? 1 : var.search_parallelism
+  search_accounts                = var.search_accounts == null ? [] : var.search_accounts
+  peering_role_name              = var.peering_role_name == null ? "" : var.peering_role_name
+  discovery_mode                 = var.discovery_mode == null ? "full" : var.discovery_mode
+  vpc_inventory_ttl              = var.vpc_inventory_ttl == null ? 0 : var.vpc_inventory_ttl
+  session_cache_size             = var.session_cache_size == null ? 128 : var.session_cache_size
+  route_mode                     = var.route_mode == null ? "create" : var.route_mode
+  link_parallelism               = var.link_parallelism == null ? 1 : var.link_parallelism
+  link_parallelism_per_account   = var.link_parallelism_per_account == null ? 0 : var.link_parallelism_per_account
+  provisioning_mode              = var.provisioning_mode == null ? "serial" : var.provisioning_mode
+  destroy_mode                   = var.destroy_mode == null ? "discovery" : var.destroy_mode
+  tracing_exporter               = var.tracing_exporter == null ? "none" : var.tracing_exporter
+  event_source                   = var.event_source == null ? "sns" : var.event_source
+  sqs_batch_size                 = var.sqs_batch_size == null ? 10 : var.sqs_batch_size
+  sqs_maximum_batching_window    = var.sqs_maximum_batching_window == null ? 0 : var.sqs_maximum_batching_window
+  sqs_maximum_receive_count      = var.sqs_maximum_receive_count == null ? 5 : var.sqs_maximum_receive_count
+  reserved_concurrent_executions = var.reserved_concurrent_executions == null ? (local.event_source == "sqs" ? 5 : 1) : var.reserved_concurrent_executions
 }
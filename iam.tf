@@ -38,6 +38,20 @@ data "aws_iam_policy_document" "vpc_auto_peering_lambda_policy" {
       "logs:PutLogEvents"
     ]
   }
+  dynamic "statement" {
+    for_each = aws_sqs_queue.infrastructure_events
+
+    content {
+      effect = "Allow"
+      resources = [statement.value.arn]
+
+      actions = [
+        "sqs:ReceiveMessage",
+        "sqs:DeleteMessage",
+        "sqs:GetQueueAttributes"
+      ]
+    }
+  }
 }
 
 resource "aws_iam_role" "vpc_auto_peering_lambda" {
@@ -2,6 +2,7 @@ data "archive_file" "auto_peering_lambda_zip" {
   type        = "zip"
   source_dir  = "${path.module}/lambdas/auto_peering"
   output_path = "${path.cwd}/build/auto_peering.zip"
+  excludes    = ["benchmark", "test"]
 }
 
 resource "aws_lambda_function" "auto_peering" {
@@ -12,13 +13,23 @@ resource "aws_lambda_function" "auto_peering" {
   runtime = "python3.9"
   timeout = 300
   source_code_hash = data.archive_file.auto_peering_lambda_zip.output_base64sha256
-  reserved_concurrent_executions = 1
+  reserved_concurrent_executions = local.reserved_concurrent_executions
 
   environment {
     variables = {
       AWS_SEARCH_REGIONS = join(",", local.search_regions)
+      AWS_SEARCH_PARALLELISM = local.search_parallelism
       AWS_SEARCH_ACCOUNTS = join(",", local.search_accounts)
       AWS_PEERING_ROLE_NAME = local.peering_role_name
+      AWS_DISCOVERY_MODE = local.discovery_mode
+      AWS_VPC_INVENTORY_TTL = local.vpc_inventory_ttl
+      AWS_SESSION_CACHE_SIZE = local.session_cache_size
+      AWS_ROUTE_MODE = local.route_mode
+      AWS_LINK_PARALLELISM = local.link_parallelism
+      AWS_LINK_PARALLELISM_PER_ACCOUNT = local.link_parallelism_per_account
+      AWS_PROVISIONING_MODE = local.provisioning_mode
+      AWS_DESTROY_MODE = local.destroy_mode
+      AWS_TRACING_EXPORTER = local.tracing_exporter
     }
   }
 }
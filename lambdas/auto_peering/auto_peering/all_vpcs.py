@@ -1,62 +1,76 @@
 from functools import lru_cache
 
-from auto_peering.vpc import VPC
+from auto_peering import tracing
+from auto_peering.concurrency import map_concurrently
+from auto_peering.vpc_index import VPCIndex
+from auto_peering.vpc_inventory import VPCInventory
 
 
 class AllVPCs(object):
-    def __init__(self, ec2_gateways):
+    def __init__(self, ec2_gateways, max_workers=1, vpc_inventory=None):
         self.ec2_gateways = ec2_gateways
+        self.max_workers = max_workers
+        self.vpc_inventory = vpc_inventory or VPCInventory()
+
+    def __vpcs_in(self, ec2_gateways):
+        with tracing.span(
+                'discover_vpcs', gateway_count=len(ec2_gateways)) as span:
+            vpcs = [
+                vpc
+                for vpcs in map_concurrently(
+                    self.__vpcs_for, ec2_gateways, self.max_workers)
+                for vpc in vpcs
+            ]
+            span.set_attribute('vpc_count', len(vpcs))
+
+        return vpcs
+
+    def __vpcs_for(self, ec2_gateway):
+        with tracing.span(
+                'list_vpcs',
+                account_id=ec2_gateway.account_id,
+                region=ec2_gateway.region):
+            return self.vpc_inventory.vpcs_for(ec2_gateway)
 
     @lru_cache(maxsize=1)
     def find_all(self):
-        return [
-            VPC(vpc_response,
-                ec2_gateway.account_id,
-                ec2_gateway.region)
-            for ec2_gateway in self.ec2_gateways.all()
-            for vpc_response in ec2_gateway.resource().vpcs.all()
-        ]
+        return self.__vpcs_in(self.ec2_gateways.all())
 
     @lru_cache(maxsize=32)
     def find_by_account_id(self, account_id):
-        return [
-            VPC(vpc_response,
-                ec2_gateway.account_id,
-                ec2_gateway.region)
-            for ec2_gateway in self.ec2_gateways.by_account_id(account_id)
-            for vpc_response in ec2_gateway.resource().vpcs.all()
-        ]
+        return self.__vpcs_in(self.ec2_gateways.by_account_id(account_id))
+
+    @lru_cache(maxsize=1)
+    def __index(self):
+        return VPCIndex(self.find_all())
+
+    @lru_cache(maxsize=32)
+    def __index_for_account_id(self, account_id):
+        return VPCIndex(self.find_by_account_id(account_id))
 
     @lru_cache(maxsize=32)
     def find_by_account_id_and_vpc_id(self, account_id, vpc_id):
-        return next(
-            (vpc
-             for vpc in self.find_by_account_id(account_id)
-             if vpc.id == vpc_id),
-            None)
+        return self.__index_for_account_id(account_id)\
+            .find_by_account_id_and_vpc_id(account_id, vpc_id)
 
     @lru_cache(maxsize=32)
     def find_by_component_instance_identifier(self, identifier):
-        return next(
-            (vpc
-             for vpc in self.find_all()
-             if vpc.component_instance_identifier == identifier),
-            None)
+        return self.__index().find_by_component_instance_identifier(identifier)
 
     @lru_cache(maxsize=32)
     def find_dependencies_of(self, vpc):
-        return [
+        dependency_vpcs = [
             self.find_by_component_instance_identifier(
                 component_instance_identifier)
             for component_instance_identifier in vpc.dependencies
-            if self.find_by_component_instance_identifier(
-                component_instance_identifier) is not None
         ]
 
-    @lru_cache(maxsize=32)
-    def find_dependents_of(self, vpc):
         return [
-            dependent_vpc
-            for dependent_vpc in self.find_all()
-            if vpc.component_instance_identifier in dependent_vpc.dependencies
+            dependency_vpc
+            for dependency_vpc in dependency_vpcs
+            if dependency_vpc is not None
         ]
+
+    @lru_cache(maxsize=32)
+    def find_dependents_of(self, vpc):
+        return self.__index().find_dependents_of(vpc)
@@ -0,0 +1,185 @@
+import json
+import threading
+import time
+
+DEFAULT_NAMESPACE = 'VPCAutoPeering'
+DIMENSIONS = ['Account', 'Region', 'Operation']
+# Calls to global endpoints, such as STS's, have no region of their own but
+# embedded metric format dimension values must be strings.
+GLOBAL_REGION = 'global'
+METRICS = [
+    {'Name': 'Calls', 'Unit': 'Count'},
+    {'Name': 'Retries', 'Unit': 'Count'},
+    {'Name': 'Throttles', 'Unit': 'Count'},
+    {'Name': 'Errors', 'Unit': 'Count'},
+    {'Name': 'Latency', 'Unit': 'Milliseconds'},
+]
+LATENCY_METRICS = [{'Name': 'Latency', 'Unit': 'Milliseconds'}]
+# CloudWatch drops embedded metric documents with more values than this for
+# any one metric.
+MAXIMUM_VALUES_PER_METRIC = 100
+THROTTLING_ERROR_CODES = [
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'SlowDown',
+]
+STARTED_AT = 'api_call_metrics_started_at'
+
+
+def error_code_in(parsed):
+    return ((parsed or {}).get('Error') or {}).get('Code')
+
+
+def region_dimension_for(region):
+    if not region or region == 'aws-global':
+        return GLOBAL_REGION
+    return region
+
+
+class APICallMetrics(object):
+    def __init__(self, namespace=DEFAULT_NAMESPACE,
+                 clock=time.monotonic, timestamp=time.time):
+        self.namespace = namespace
+        self.clock = clock
+        self.timestamp = timestamp
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.metrics = {}
+
+    def __metrics_for(self, key):
+        return self.metrics.setdefault(key, {
+            'calls': 0,
+            'retries': 0,
+            'throttles': 0,
+            'errors': 0,
+            'latencies': [],
+        })
+
+    def __before_call(self, context, **_):
+        context[STARTED_AT] = self.clock()
+
+    def __record(self, account_id, context, operation_name, failed,
+                 retries=0):
+        started_at = context.pop(STARTED_AT, None)
+        if started_at is None:
+            return
+        latency = (self.clock() - started_at) * 1000
+
+        key = (account_id, context.get('client_region'), operation_name)
+        with self.lock:
+            metrics = self.__metrics_for(key)
+            metrics['calls'] += 1
+            metrics['retries'] += retries
+            metrics['errors'] += 1 if failed else 0
+            metrics['latencies'].append(round(latency, 3))
+
+    def __after_call(self, account_id):
+        def handler(http_response, parsed, model, context, **_):
+            self.__record(
+                account_id, context, model.name,
+                failed=http_response.status_code >= 300,
+                retries=parsed.get('ResponseMetadata', {})
+                .get('RetryAttempts', 0))
+
+        return handler
+
+    def __after_call_error(self, account_id):
+        def handler(event_name, context, **_):
+            self.__record(
+                account_id, context, event_name.split('.')[-1], failed=True)
+
+        return handler
+
+    def __needs_retry(self, account_id):
+        def handler(response, operation, request_dict, **_):
+            if response is None or \
+                    error_code_in(response[1]) not in THROTTLING_ERROR_CODES:
+                return None
+
+            key = (account_id,
+                   request_dict['context'].get('client_region'),
+                   operation.name)
+            with self.lock:
+                self.__metrics_for(key)['throttles'] += 1
+            return None
+
+        return handler
+
+    def register(self, events, account_id):
+        events.register('before-call', self.__before_call)
+        events.register('after-call', self.__after_call(account_id))
+        events.register(
+            'after-call-error', self.__after_call_error(account_id))
+        events.register('needs-retry', self.__needs_retry(account_id))
+
+        return events
+
+    def statistics(self):
+        with self.lock:
+            return {
+                key: {
+                    'calls': metrics['calls'],
+                    'retries': metrics['retries'],
+                    'throttles': metrics['throttles'],
+                    'errors': metrics['errors'],
+                    'latencies': list(metrics['latencies']),
+                }
+                for key, metrics in self.metrics.items()
+            }
+
+    def __documents_for(self, timestamp, dimensions, metrics):
+        latencies = metrics['latencies']
+        latency_chunks = [
+            latencies[index:index + MAXIMUM_VALUES_PER_METRIC]
+            for index in range(0, len(latencies), MAXIMUM_VALUES_PER_METRIC)
+        ] or [[]]
+
+        # Counts go in the first document only. Latencies beyond what one
+        # document may hold follow in documents of their own.
+        documents = [dict(
+            dimensions,
+            Calls=metrics['calls'],
+            Retries=metrics['retries'],
+            Throttles=metrics['throttles'],
+            Errors=metrics['errors'],
+            Latency=latency_chunks[0])]
+        documents.extend(
+            dict(dimensions, Latency=latency_chunk)
+            for latency_chunk in latency_chunks[1:])
+
+        return [
+            dict(document, _aws={
+                'Timestamp': timestamp,
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [DIMENSIONS],
+                    'Metrics': METRICS if index == 0 else LATENCY_METRICS,
+                }],
+            })
+            for index, document in enumerate(documents)
+        ]
+
+    def emf(self, default_account_id=None):
+        timestamp = int(self.timestamp() * 1000)
+        return [
+            json.dumps(document, sort_keys=True)
+            for (account_id, region, operation_name), metrics
+            in sorted(self.statistics().items(),
+                      key=lambda item: tuple(str(part) for part in item[0]))
+            for document in self.__documents_for(
+                timestamp,
+                {
+                    'Account': account_id or default_account_id,
+                    'Region': region_dimension_for(region),
+                    'Operation': operation_name,
+                },
+                metrics)
+        ]
@@ -0,0 +1,13 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from auto_peering import tracing
+
+
+def map_concurrently(function, items, max_workers=1):
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+
+    with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(tracing.propagating(function), items))
@@ -0,0 +1,166 @@
+import copy
+import json
+import threading
+from contextlib import contextmanager
+
+CACHED_OPERATIONS = [
+    'DescribeVpcs',
+    'DescribeVpcPeeringConnections',
+    'DescribeRouteTables',
+]
+INVALIDATED_OPERATIONS = {
+    'CreateRoute': ['DescribeRouteTables'],
+    'DeleteRoute': ['DescribeRouteTables'],
+    'CreateVpcPeeringConnection': ['DescribeVpcPeeringConnections'],
+    'AcceptVpcPeeringConnection': ['DescribeVpcPeeringConnections'],
+    'DeleteVpcPeeringConnection': ['DescribeVpcPeeringConnections'],
+}
+CACHE_KEY = 'describe_cache_key'
+CACHE_HIT = 'describe_cache_hit'
+CACHE_GENERATION = 'describe_cache_generation'
+
+bypass = threading.local()
+
+
+@contextmanager
+def uncached():
+    previous = getattr(bypass, 'enabled', False)
+    bypass.enabled = True
+    try:
+        yield
+    finally:
+        bypass.enabled = previous
+
+
+def key_for(account_id, region, operation_name, params):
+    return (account_id, region, operation_name,
+            json.dumps(params, sort_keys=True, default=str))
+
+
+def scopes_affected_by(account_id, region, model, parsed):
+    # Peering connections are visible from both of their sides, so their
+    # mutations also affect the peer's account and region. A deletion does
+    # not name the peer, so it affects every account and region.
+    if model.name == 'DeleteVpcPeeringConnection':
+        return None
+
+    scopes = {(account_id, region)}
+    vpc_peering_connection = parsed.get('VpcPeeringConnection', {})
+    for vpc_info_key in ['RequesterVpcInfo', 'AccepterVpcInfo']:
+        vpc_info = vpc_peering_connection.get(vpc_info_key, {})
+        scopes.add((vpc_info.get('OwnerId', account_id),
+                    vpc_info.get('Region', region)))
+    return scopes
+
+
+class DescribeCache(object):
+    def __init__(self):
+        self.entries = {}
+        # Generations count the mutations invalidating each operation so
+        # that a describe in flight during a mutation is not cached.
+        self.generations = {}
+        self.hits = {}
+        self.misses = {}
+        self.lock = threading.Lock()
+
+    def reset(self):
+        with self.lock:
+            self.entries = {}
+            self.hits = {}
+            self.misses = {}
+
+    def __count(self, counts, operation_name):
+        counts[operation_name] = counts.get(operation_name, 0) + 1
+
+    def __before_parameter_build(self, account_id, region):
+        def handler(params, model, context, **_):
+            if getattr(bypass, 'enabled', False):
+                return
+            context[CACHE_KEY] = key_for(
+                account_id, region, model.name, params)
+            with self.lock:
+                context[CACHE_GENERATION] = \
+                    self.generations.get(model.name, 0)
+
+        return handler
+
+    def __before_call(self, model, context, **_):
+        key = context.get(CACHE_KEY)
+        if key is None:
+            return None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.__count(self.misses, model.name)
+                return None
+            self.__count(self.hits, model.name)
+
+        context[CACHE_HIT] = True
+        http_response, parsed = entry
+        return http_response, copy.deepcopy(parsed)
+
+    def __after_call(self, http_response, parsed, model, context, **_):
+        key = context.get(CACHE_KEY)
+        if key is None or context.get(CACHE_HIT) or \
+                http_response.status_code >= 300:
+            return
+
+        with self.lock:
+            if self.generations.get(model.name, 0) == \
+                    context.get(CACHE_GENERATION):
+                self.entries[key] = (http_response, copy.deepcopy(parsed))
+
+    def __after_mutation(self, account_id, region):
+        def handler(http_response, parsed, model, **_):
+            if http_response.status_code >= 300:
+                return
+
+            invalidated_operations = INVALIDATED_OPERATIONS[model.name]
+            scopes = scopes_affected_by(account_id, region, model, parsed)
+            with self.lock:
+                for operation_name in invalidated_operations:
+                    self.generations[operation_name] = \
+                        self.generations.get(operation_name, 0) + 1
+                self.entries = {
+                    key: entry
+                    for key, entry in self.entries.items()
+                    if key[2] not in invalidated_operations or
+                    (scopes is not None and key[:2] not in scopes)
+                }
+
+        return handler
+
+    def register(self, client, account_id, region):
+        events = client.meta.events
+        for operation_name in CACHED_OPERATIONS:
+            events.register(
+                'before-parameter-build.ec2.{}'.format(operation_name),
+                self.__before_parameter_build(account_id, region))
+            events.register(
+                'before-call.ec2.{}'.format(operation_name),
+                self.__before_call)
+            events.register(
+                'after-call.ec2.{}'.format(operation_name),
+                self.__after_call)
+        for operation_name in INVALIDATED_OPERATIONS:
+            events.register(
+                'after-call.ec2.{}'.format(operation_name),
+                self.__after_mutation(account_id, region))
+
+        return client
+
+    def statistics(self):
+        with self.lock:
+            operation_names = sorted(set(self.hits) | set(self.misses))
+            return {
+                operation_name: {
+                    'hits': self.hits.get(operation_name, 0),
+                    'misses': self.misses.get(operation_name, 0),
+                    'hit_rate': round(
+                        self.hits.get(operation_name, 0) /
+                        (self.hits.get(operation_name, 0) +
+                         self.misses.get(operation_name, 0)), 3),
+                }
+                for operation_name in operation_names
+            }
@@ -1,14 +1,58 @@
+import threading
+
+from botocore.config import Config
+
+DEFAULT_CONFIG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=30,
+    retries={'max_attempts': 5, 'mode': 'standard'})
+
+# boto3 sessions are not safe to build clients and resources from
+# concurrently so creation is serialised across all gateways.
+session_lock = threading.Lock()
+
+
 class EC2Gateway(object):
-    def __init__(self, session, account_id, region):
+    def __init__(self, session, account_id, region, config=DEFAULT_CONFIG,
+                 describe_cache=None):
         self.session = session
         self.account_id = account_id
         self.region = region
+        self.config = config
+        self.describe_cache = describe_cache
+        self.ec2_client = None
+        # Clients are thread-safe and shared but resources are not, so each
+        # thread wraps the shared client in a resource of its own.
+        self.ec2_resource_class = None
+        self.ec2_resources = threading.local()
+
+    def __build(self):
+        with session_lock:
+            if self.ec2_client is None:
+                # The client comes from a resource so that the resource
+                # class is known without building a second client.
+                ec2_resource = self.session.resource(
+                    'ec2', self.region, config=self.config)
+                self.ec2_resource_class = type(ec2_resource)
+                self.ec2_client = ec2_resource.meta.client
+                if self.describe_cache:
+                    self.describe_cache.register(
+                        self.ec2_client, self.account_id, self.region)
+            return self.ec2_client, self.ec2_resource_class
 
     def client(self):
-        return self.session.client('ec2', self.region)
+        ec2_client, _ = self.__build()
+        return ec2_client
 
     def resource(self):
-        return self.session.resource('ec2', self.region)
+        ec2_resource = getattr(self.ec2_resources, 'ec2_resource', None)
+        if ec2_resource is None:
+            ec2_client, ec2_resource_class = self.__build()
+            ec2_resource = ec2_resource_class(client=ec2_client)
+            self.ec2_resources.ec2_resource = ec2_resource
+        return ec2_resource
 
     def _to_dict(self):
         return {
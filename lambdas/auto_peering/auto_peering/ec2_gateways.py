@@ -1,30 +1,48 @@
+import threading
+
 from auto_peering.ec2_gateway import EC2Gateway
 
 
 class EC2Gateways(object):
-    def __init__(self, session_store, account_ids, regions):
+    def __init__(self, session_store, account_ids, regions,
+                 describe_cache=None):
         self.session_store = session_store
         self.account_ids = account_ids
         self.regions = regions
+        self.describe_cache = describe_cache
+        self.ec2_gateways = {}
+        self.lock = threading.Lock()
 
     def all(self):
         return [
-            EC2Gateway(
-                self.session_store.get_session_for(account_id),
-                account_id,
-                region)
+            self.by_account_id_and_region(account_id, region)
             for account_id in self.account_ids
             for region in self.regions]
 
+    def covers(self, account_id, region):
+        return account_id in self.account_ids and region in self.regions
+
     def by_account_id_and_region(self, account_id, region):
-        return EC2Gateway(
-            self.session_store.get_session_for(account_id), account_id, region)
+        with self.lock:
+            ec2_gateway = self.ec2_gateways.get((account_id, region))
+        if ec2_gateway is not None:
+            return ec2_gateway
+
+        # The session store assumes roles without holding this lock and
+        # returns the same session to concurrent callers for an account.
+        session = self.session_store.get_session_for(account_id)
+
+        with self.lock:
+            return self.ec2_gateways.setdefault(
+                (account_id, region),
+                EC2Gateway(
+                    session,
+                    account_id,
+                    region,
+                    describe_cache=self.describe_cache))
 
     def by_account_id(self, account_id):
         return [
-            EC2Gateway(
-                self.session_store.get_session_for(account_id),
-                account_id,
-                region)
+            self.by_account_id_and_region(account_id, region)
             for region in self.regions
         ]
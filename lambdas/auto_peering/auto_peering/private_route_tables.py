@@ -0,0 +1,100 @@
+import threading
+
+from auto_peering.describe_cache import uncached
+
+
+class PrivateRouteTables(object):
+    def __init__(self, ec2_gateways):
+        self.ec2_gateways = ec2_gateways
+        self.route_tables = {}
+        self.routes = {}
+        self.route_changes = {}
+        self.refreshed = set()
+        self.refresh_locks = {}
+        self.lock = threading.RLock()
+
+    def __fetch(self, vpc, *filters):
+        ec2_gateway = self.ec2_gateways.\
+            by_account_id_and_region(vpc.account_id, vpc.region)
+
+        return list(ec2_gateway.resource().route_tables.filter(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc.id]},
+                {'Name': 'tag:Tier', 'Values': ['private']},
+                *filters]))
+
+    def for_vpc(self, vpc):
+        key = (vpc.account_id, vpc.region, vpc.id)
+        with self.lock:
+            route_tables = self.route_tables.get(key)
+        if route_tables is None:
+            route_tables = self.__fetch(vpc)
+            with self.lock:
+                route_tables = self.route_tables.setdefault(key, route_tables)
+        return list(route_tables)
+
+    def refresh(self, vpc):
+        key = (vpc.account_id, vpc.region, vpc.id)
+        with self.lock:
+            refresh_lock = self.refresh_locks.setdefault(
+                key, threading.Lock())
+        with refresh_lock:
+            with self.lock:
+                if key in self.refreshed:
+                    return
+            with uncached():
+                route_tables = self.__fetch(vpc)
+            with self.lock:
+                self.route_tables[key] = route_tables
+                self.refreshed.add(key)
+                for route_table in route_tables:
+                    self.routes[route_table.id] = \
+                        self.__routes_from(route_table)
+
+    def referencing(self, vpc, vpc_peering_connection_id):
+        return self.__fetch(
+            vpc,
+            {'Name': 'route.vpc-peering-connection-id',
+             'Values': [vpc_peering_connection_id]})
+
+    def routes_in(self, route_table):
+        with self.lock:
+            if route_table.id not in self.routes:
+                self.routes[route_table.id] = \
+                    self.__routes_from(route_table)
+
+            return {
+                destination_cidr_block: route
+                for destination_cidr_block, route
+                in self.routes[route_table.id].items()
+                if route is not None
+            }
+
+    def __routes_from(self, route_table):
+        routes = {
+            route['DestinationCidrBlock']: route
+            for route in route_table.routes_attribute or []
+            if 'DestinationCidrBlock' in route
+        }
+        # Changes made during this run win over what a describe reports.
+        routes.update(self.route_changes.get(route_table.id, {}))
+        return routes
+
+    def __record(self, route_table, destination_cidr_block, route):
+        with self.lock:
+            self.route_changes.setdefault(
+                route_table.id, {})[destination_cidr_block] = route
+            if route_table.id in self.routes:
+                self.routes[route_table.id][destination_cidr_block] = route
+
+    def add_route(self, route_table, destination_cidr_block,
+                  vpc_peering_connection_id):
+        self.__record(
+            route_table,
+            destination_cidr_block,
+            {'DestinationCidrBlock': destination_cidr_block,
+             'VpcPeeringConnectionId': vpc_peering_connection_id,
+             'State': 'active'})
+
+    def remove_route(self, route_table, destination_cidr_block):
+        self.__record(route_table, destination_cidr_block, None)
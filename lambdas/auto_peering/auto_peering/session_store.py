@@ -1,25 +1,131 @@
 import boto3
-from functools import lru_cache
+import botocore.session
+import threading
+from collections import OrderedDict
+from botocore.credentials import (
+    CredentialProvider, CredentialResolver, RefreshableCredentials)
+
+from auto_peering import tracing
+
+DEFAULT_MAXIMUM_SESSIONS = 128
 
 
 def role_arn_for(account_id, peering_role_name):
     return "arn:aws:iam::%s:role/%s" % (account_id, peering_role_name)
 
 
+def expiry_time_for(expiration):
+    if isinstance(expiration, str):
+        return expiration
+    return expiration.isoformat()
+
+
+class AssumedRoleCredentialProvider(CredentialProvider):
+    METHOD = 'assume-role'
+    CANONICAL_NAME = 'vpc-auto-peering-assume-role'
+
+    def __init__(self, credentials):
+        super().__init__()
+        self.credentials = credentials
+
+    def load(self):
+        return self.credentials
+
+
 class SessionStore(object):
-    def __init__(self, client, peering_role_name):
+    def __init__(self, client, peering_role_name,
+                 maximum_sessions=DEFAULT_MAXIMUM_SESSIONS,
+                 listeners=()):
         self.client = client
         self.peering_role_name = peering_role_name
+        self.maximum_sessions = maximum_sessions
+        self.listeners = list(listeners)
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.account_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
 
-    @lru_cache(maxsize=32)
-    def get_session_for(self, account_id):
-        assumed_role_response = \
-            self.client.assume_role(
-                RoleArn=role_arn_for(account_id, self.peering_role_name),
-                RoleSessionName="vpc-auto-peering-lambda")
+    def __credentials_for(self, account_id):
+        with tracing.span('acquire_credentials', account_id=account_id):
+            assumed_role_response = \
+                self.client.assume_role(
+                    RoleArn=role_arn_for(account_id, self.peering_role_name),
+                    RoleSessionName="vpc-auto-peering-lambda")
         credentials = assumed_role_response['Credentials']
 
-        return boto3.session.Session(
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'])
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': expiry_time_for(credentials['Expiration'])
+        }
+
+    def __refreshed_credentials_for(self, account_id):
+        with self.lock:
+            self.refreshes += 1
+
+        return self.__credentials_for(account_id)
+
+    def __session_for(self, account_id):
+        credentials = RefreshableCredentials.create_from_metadata(
+            metadata=self.__credentials_for(account_id),
+            refresh_using=lambda: self.__refreshed_credentials_for(account_id),
+            method='assume-role')
+
+        botocore_session = botocore.session.get_session()
+        botocore_session.register_component(
+            'credential_provider',
+            CredentialResolver(
+                providers=[AssumedRoleCredentialProvider(credentials)]))
+
+        session = boto3.session.Session(botocore_session=botocore_session)
+        for listener in self.listeners:
+            listener.register(session.events, account_id)
+
+        return session
+
+    def __cached_session_for(self, account_id):
+        session = self.sessions.get(account_id)
+        if session is not None:
+            self.hits += 1
+            self.sessions.move_to_end(account_id)
+        return session
+
+    def get_session_for(self, account_id):
+        with self.lock:
+            session = self.__cached_session_for(account_id)
+            if session is not None:
+                return session
+            account_lock = self.account_locks.setdefault(
+                account_id, threading.Lock())
+
+        # Roles are assumed outside the store-wide lock so that cold sessions
+        # for different accounts are created concurrently, while concurrent
+        # requests for the same account wait for a single AssumeRole.
+        with account_lock:
+            with self.lock:
+                session = self.__cached_session_for(account_id)
+                if session is not None:
+                    return session
+                self.misses += 1
+
+            session = self.__session_for(account_id)
+
+            with self.lock:
+                self.sessions[account_id] = session
+                while len(self.sessions) > self.maximum_sessions:
+                    evicted_account_id, _ = self.sessions.popitem(last=False)
+                    self.account_locks.pop(evicted_account_id, None)
+
+            return session
+
+    def statistics(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'size': len(self.sessions)
+            }
@@ -0,0 +1,114 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from auto_peering import tracing
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class StepResult(object):
+    def __init__(self, name, status, value=None, error=None,
+                 started_at=None, finished_at=None):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def succeeded(self):
+        return self.status == SUCCEEDED
+
+    def timing(self):
+        return {
+            'step': self.name,
+            'status': self.status,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration': (
+                self.finished_at - self.started_at
+                if self.started_at is not None
+                and self.finished_at is not None
+                else None),
+        }
+
+    def __repr__(self):
+        return "<%s.%s object at %s: %s>" % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            hex(id(self)),
+            repr(self.timing()))
+
+
+class StepScheduler(object):
+    def __init__(self, logger, max_workers=1, clock=time.monotonic):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.clock = clock
+        self.steps = {}
+
+    def add(self, name, function, depends_on=()):
+        if name in self.steps:
+            raise ValueError("Step '{}' already added.".format(name))
+        for dependency in depends_on:
+            if dependency not in self.steps:
+                raise ValueError(
+                    "Step '{}' depends on unknown step '{}'.".format(
+                        name, dependency))
+
+        self.steps[name] = (function, tuple(depends_on))
+        return name
+
+    def __run_step(self, name, function, arguments, origin):
+        started_at = self.clock() - origin
+        try:
+            value = function(*arguments)
+            return StepResult(
+                name, SUCCEEDED, value=value,
+                started_at=started_at, finished_at=self.clock() - origin)
+        except Exception as error:
+            self.logger.exception("Step '%s' failed.", name)
+            return StepResult(
+                name, FAILED, error=error,
+                started_at=started_at, finished_at=self.clock() - origin)
+
+    def run(self):
+        results = {}
+        pending = dict(self.steps)
+        origin = self.clock()
+
+        with ThreadPoolExecutor(max_workers=max(self.max_workers, 1)) \
+                as executor:
+            running = {}
+            while pending or running:
+                for name, (function, depends_on) in list(pending.items()):
+                    if not all(dependency in results
+                               for dependency in depends_on):
+                        continue
+
+                    del pending[name]
+                    if not all(results[dependency].succeeded
+                               for dependency in depends_on):
+                        results[name] = StepResult(name, SKIPPED)
+                        continue
+
+                    arguments = [
+                        results[dependency].value
+                        for dependency in depends_on
+                    ]
+                    running[executor.submit(
+                        tracing.propagating(self.__run_step),
+                        name, function, arguments, origin)] = name
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    results[running.pop(future)] = result
+
+        return results
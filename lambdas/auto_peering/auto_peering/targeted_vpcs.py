@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+from auto_peering import tracing
+from auto_peering.concurrency import map_concurrently
+from auto_peering.vpc import VPC
+
+MAXIMUM_PAGE_SIZE = 1000
+
+
+def possible_tags_for(component_instance_identifier):
+    parts = component_instance_identifier.split('-')
+    return [
+        ('-'.join(parts[:index]), '-'.join(parts[index:]))
+        for index in range(1, len(parts))
+        if parts[index - 1] and parts[index]
+    ]
+
+
+class TargetedVPCs(object):
+    def __init__(self, ec2_gateways, max_workers=1):
+        self.ec2_gateways = ec2_gateways
+        self.max_workers = max_workers
+
+    def __vpcs_in(self, ec2_gateways, filters):
+        def vpcs_for(ec2_gateway):
+            with tracing.span(
+                    'list_vpcs',
+                    account_id=ec2_gateway.account_id,
+                    region=ec2_gateway.region):
+                return [
+                    VPC(vpc_response,
+                        ec2_gateway.account_id,
+                        ec2_gateway.region)
+                    for vpc_response in ec2_gateway.resource().vpcs
+                    .filter(Filters=filters)
+                    .page_size(MAXIMUM_PAGE_SIZE)
+                ]
+
+        with tracing.span(
+                'discover_vpcs', gateway_count=len(ec2_gateways)) as span:
+            vpcs = [
+                vpc
+                for vpcs in map_concurrently(
+                    vpcs_for, ec2_gateways, self.max_workers)
+                for vpc in vpcs
+            ]
+            span.set_attribute('vpc_count', len(vpcs))
+
+        return vpcs
+
+    @lru_cache(maxsize=32)
+    def find_by_account_id_and_vpc_id(self, account_id, vpc_id):
+        return next(
+            iter(self.__vpcs_in(
+                self.ec2_gateways.by_account_id(account_id),
+                [{'Name': 'vpc-id', 'Values': [vpc_id]}])),
+            None)
+
+    @lru_cache(maxsize=32)
+    def find_dependencies_of(self, vpc):
+        possible_tags = [
+            possible_tag
+            for component_instance_identifier in vpc.dependencies
+            for possible_tag in possible_tags_for(
+                component_instance_identifier)
+        ]
+        if not possible_tags:
+            return []
+
+        candidate_vpcs = self.__vpcs_in(
+            self.ec2_gateways.all(),
+            [{'Name': 'tag:Component',
+              'Values': sorted({component
+                                for component, _ in possible_tags})},
+             {'Name': 'tag:DeploymentIdentifier',
+              'Values': sorted({deployment_identifier
+                                for _, deployment_identifier
+                                in possible_tags})}])
+
+        dependency_vpcs = [
+            next(
+                (candidate_vpc
+                 for candidate_vpc in candidate_vpcs
+                 if candidate_vpc.component_instance_identifier ==
+                 component_instance_identifier),
+                None)
+            for component_instance_identifier in vpc.dependencies
+        ]
+
+        return [
+            dependency_vpc
+            for dependency_vpc in dependency_vpcs
+            if dependency_vpc is not None
+        ]
+
+    @lru_cache(maxsize=32)
+    def find_dependents_of(self, vpc):
+        candidate_vpcs = self.__vpcs_in(
+            self.ec2_gateways.all(),
+            [{'Name': 'tag:Dependencies',
+              'Values': ['*{}*'.format(vpc.component_instance_identifier)]}])
+
+        return [
+            dependent_vpc
+            for dependent_vpc in candidate_vpcs
+            if vpc.component_instance_identifier in dependent_vpc.dependencies
+        ]
@@ -0,0 +1,271 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+
+SERVICE_NAME = 'vpc-auto-peering-lambda'
+DEFAULT_OTLP_FILE_PATH = '/tmp/vpc-auto-peering-traces.jsonl'
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+
+
+def random_id(bits):
+    return '{:0{width}x}'.format(
+        random.getrandbits(bits), width=bits // 4)
+
+
+class NoOpSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+NO_OP_SPAN = NoOpSpan()
+
+
+class Span(object):
+    def __init__(self, tracer, name, trace_id, span_id, parent_span_id,
+                 attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.error = None
+        self.start_time_unix_nano = None
+        self.end_time_unix_nano = None
+        self.previous = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start_time_unix_nano = time.time_ns()
+        self.tracer._enter(self)
+        return self
+
+    def __exit__(self, exception_type, exception, _):
+        self.end_time_unix_nano = time.time_ns()
+        if exception is not None:
+            self.status = STATUS_ERROR
+            self.error = repr(exception)
+        self.tracer._exit(self)
+        return False
+
+    def _to_dict(self):
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'start_time_unix_nano': self.start_time_unix_nano,
+            'end_time_unix_nano': self.end_time_unix_nano,
+            'attributes': dict(self.attributes),
+            'status': self.status,
+            'error': self.error,
+        }
+
+    def __repr__(self):
+        return "<%s.%s object at %s: %s>" % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            hex(id(self)),
+            repr(self._to_dict()))
+
+
+class StdoutJSONExporter(object):
+    def __init__(self, write=print):
+        self.write = write
+
+    def export(self, span):
+        self.write(json.dumps({'span': span._to_dict()}, default=str))
+
+    def flush(self):
+        pass
+
+
+def otlp_value_for(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return {'arrayValue': {
+            'values': [otlp_value_for(item) for item in value]}}
+    return {'stringValue': str(value)}
+
+
+def otlp_span_for(span):
+    otlp_span = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': 1,
+        'startTimeUnixNano': str(span.start_time_unix_nano),
+        'endTimeUnixNano': str(span.end_time_unix_nano),
+        'attributes': [
+            {'key': key, 'value': otlp_value_for(value)}
+            for key, value in sorted(span.attributes.items())
+        ],
+        'status': (
+            {'code': 2, 'message': span.error}
+            if span.status == STATUS_ERROR
+            else {'code': 1}),
+    }
+    if span.parent_span_id:
+        otlp_span['parentSpanId'] = span.parent_span_id
+    return otlp_span
+
+
+class OTLPFileExporter(object):
+    def __init__(self, path=DEFAULT_OTLP_FILE_PATH):
+        self.path = path
+        self.spans = []
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        with self.lock:
+            self.spans.append(otlp_span_for(span))
+
+    def flush(self):
+        with self.lock:
+            spans, self.spans = self.spans, []
+        if not spans:
+            return
+
+        request = {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name',
+                 'value': otlp_value_for(SERVICE_NAME)}]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': spans,
+            }],
+        }]}
+        with open(self.path, 'a') as file:
+            file.write(json.dumps(request) + '\n')
+
+
+EXPORTERS = {
+    'stdout': lambda path: StdoutJSONExporter(),
+    'otlp_file': lambda path: OTLPFileExporter(
+        path or DEFAULT_OTLP_FILE_PATH),
+}
+
+
+def exporter_for(name, path=None):
+    if not name or name == 'none':
+        return None
+    if name not in EXPORTERS:
+        raise ValueError("Unknown tracing exporter '{}'.".format(name))
+    return EXPORTERS[name](path)
+
+
+class Tracer(object):
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self.current = threading.local()
+
+    def configure(self, exporter):
+        self.exporter = exporter
+        self.current = threading.local()
+
+    @property
+    def enabled(self):
+        return self.exporter is not None
+
+    def span(self, name, **attributes):
+        if self.exporter is None:
+            return NO_OP_SPAN
+
+        parent = getattr(self.current, 'span', None) or \
+            getattr(self.current, 'root', None)
+        if parent is None:
+            return Span(self, name, random_id(128), random_id(64), None,
+                        attributes)
+        return Span(self, name, parent.trace_id, random_id(64),
+                    parent.span_id, attributes)
+
+    def propagating(self, function):
+        if self.exporter is None:
+            return function
+
+        parent = getattr(self.current, 'span', None)
+
+        def propagated(*args, **kwargs):
+            previous = getattr(self.current, 'span', None)
+            self.current.span = parent
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.current.span = previous
+
+        return propagated
+
+    def _enter(self, span):
+        span.previous = getattr(self.current, 'span', None)
+        self.current.span = span
+        if span.parent_span_id is None:
+            self.current.root = span
+
+    def _exit(self, span):
+        self.current.span = span.previous
+        exporter = self.exporter
+        if exporter is None:
+            return
+
+        exporter.export(span)
+        if span is getattr(self.current, 'root', None):
+            self.current.root = None
+            exporter.flush()
+
+
+tracer = Tracer()
+
+
+def configure(exporter):
+    tracer.configure(exporter)
+
+
+def span(name, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def propagating(function):
+    return tracer.propagating(function)
+
+
+def traced(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def configure_from_environment(environ=os.environ):
+    configure(exporter_for(
+        environ.get('AWS_TRACING_EXPORTER'),
+        environ.get('AWS_TRACING_FILE')))
@@ -0,0 +1,26 @@
+class VPCIndex(object):
+    def __init__(self, vpcs):
+        self.vpcs_by_component_instance_identifier = {}
+        self.vpcs_by_account_id_and_vpc_id = {}
+        self.dependent_vpcs_by_component_instance_identifier = {}
+
+        for vpc in vpcs:
+            self.vpcs_by_component_instance_identifier.setdefault(
+                vpc.component_instance_identifier, vpc)
+            self.vpcs_by_account_id_and_vpc_id.setdefault(
+                (vpc.account_id, vpc.id), vpc)
+            for dependency in dict.fromkeys(vpc.dependencies):
+                self.dependent_vpcs_by_component_instance_identifier\
+                    .setdefault(dependency, [])\
+                    .append(vpc)
+
+    def find_by_account_id_and_vpc_id(self, account_id, vpc_id):
+        return self.vpcs_by_account_id_and_vpc_id.get((account_id, vpc_id))
+
+    def find_by_component_instance_identifier(self, identifier):
+        return self.vpcs_by_component_instance_identifier.get(identifier)
+
+    def find_dependents_of(self, vpc):
+        return list(
+            self.dependent_vpcs_by_component_instance_identifier.get(
+                vpc.component_instance_identifier, []))
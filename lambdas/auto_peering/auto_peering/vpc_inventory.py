@@ -0,0 +1,64 @@
+import threading
+import time
+
+from auto_peering.vpc import VPC
+
+
+class VPCInventory(object):
+    def __init__(self, ttl_seconds=0, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def __key_for(account_id, region):
+        return account_id, region
+
+    def __is_fresh(self, entry):
+        loaded_at, _ = entry
+        return self.clock() - loaded_at < self.ttl_seconds
+
+    def vpcs_for(self, ec2_gateway):
+        key = self.__key_for(ec2_gateway.account_id, ec2_gateway.region)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and self.__is_fresh(entry):
+                return list(entry[1])
+
+        vpcs = [
+            VPC(vpc_response,
+                ec2_gateway.account_id,
+                ec2_gateway.region)
+            for vpc_response in ec2_gateway.resource().vpcs.all()
+        ]
+
+        with self.lock:
+            self.entries[key] = (self.clock(), vpcs)
+
+        return list(vpcs)
+
+    def remove(self, vpc):
+        key = self.__key_for(vpc.account_id, vpc.region)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+
+            loaded_at, vpcs = entry
+            self.entries[key] = (
+                loaded_at,
+                [other_vpc for other_vpc in vpcs if other_vpc.id != vpc.id])
+
+    def invalidate(self, account_id=None, region=None):
+        with self.lock:
+            self.entries = {
+                (entry_account_id, entry_region): entry
+                for (entry_account_id, entry_region), entry
+                in self.entries.items()
+                if not ((account_id is None or
+                         entry_account_id == account_id) and
+                        (region is None or entry_region == region))
+            }
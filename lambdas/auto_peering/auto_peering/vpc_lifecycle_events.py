@@ -0,0 +1,97 @@
+import json
+import re
+
+VPC_EXISTENCE = 'vpc-existence'
+SQS_EVENT_SOURCE = 'aws:sqs'
+
+CREATED_EVENT_NAME = re.compile('ObjectCreated.*')
+REMOVED_EVENT_NAME = re.compile('ObjectRemoved.*')
+
+
+def action_for(event_name):
+    if CREATED_EVENT_NAME.match(event_name):
+        return 'provision'
+    if REMOVED_EVENT_NAME.match(event_name):
+        return 'destroy'
+    return 'unknown'
+
+
+class VPCLifecycleEvent(object):
+    __slots__ = ('event_name', 'action', 'type', 'account_id', 'vpc_id',
+                 'message_id')
+
+    def __init__(self, event_name, key, message_id=None):
+        key_type, account_id, vpc_id = (key.split('/') + [None, None])[:3]
+        for name, value in [
+            ('event_name', event_name),
+            ('action', action_for(event_name)),
+            ('type', key_type),
+            ('account_id', account_id),
+            ('vpc_id', vpc_id),
+            ('message_id', message_id),
+        ]:
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "'{}' is immutable.".format(self.__class__.__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError(
+            "'{}' is immutable.".format(self.__class__.__name__))
+
+    def _to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return (isinstance(other, VPCLifecycleEvent) and
+                self._to_dict() == other._to_dict())
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return "<%s.%s object at %s: %s>" % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            hex(id(self)),
+            repr(self._to_dict()))
+
+
+def s3_event_and_message_id_for(record):
+    if 'Sns' in record:
+        return (json.loads(record['Sns']['Message']),
+                record['Sns'].get('MessageId'))
+
+    body = json.loads(record['body'])
+    if body.get('Type') == 'Notification':
+        body = json.loads(body['Message'])
+    return body, record.get('messageId')
+
+
+def is_queue_batch(event):
+    return any(record.get('eventSource') == SQS_EVENT_SOURCE
+               for record in event.get('Records', []))
+
+
+def decode_record(record):
+    s3_event, message_id = s3_event_and_message_id_for(record)
+    return [
+        VPCLifecycleEvent(
+            s3_record['eventName'],
+            s3_record['s3']['object']['key'],
+            message_id=message_id)
+        for s3_record in s3_event.get('Records', [])
+    ]
+
+
+def decode(event, on_failure=None):
+    for record in event.get('Records', []):
+        try:
+            vpc_lifecycle_events = decode_record(record)
+        except Exception as error:
+            if on_failure is None:
+                raise
+            on_failure(record, error)
+            continue
+        yield from vpc_lifecycle_events
@@ -3,21 +3,53 @@ from auto_peering.vpc_peering_route import VPCPeeringRoute
 
 
 class VPCLink(object):
-    def __init__(self, ec2_gateways, logger, between, routes):
+    def __init__(self, ec2_gateways, logger, between, routes,
+                 vpc_peering_connections=None, private_route_tables=None,
+                 reconcile_routes=False):
         self.between = between
+        self.logger = logger
         self.peering_relationship = VPCPeeringRelationship(
             ec2_gateways,
             logger,
-            between=between)
+            between=between,
+            vpc_peering_connections=vpc_peering_connections)
         self.peering_routes = [
             VPCPeeringRoute(
                 ec2_gateways,
                 logger,
                 between=route,
-                peering_relationship=self.peering_relationship)
+                peering_relationship=self.peering_relationship,
+                private_route_tables=private_route_tables,
+                reconcile=reconcile_routes)
             for route in routes
         ]
 
+    def perform_relationship(self, action):
+        self.logger.info(
+            "Managing peering relationship between '%s' and '%s'.",
+            self.between[0].id,
+            self.between[1].id)
+        self.peering_relationship.perform(action)
+
+    def perform_routes(self, action):
+        self.logger.info(
+            "Managing peering routes between '%s' and '%s'.",
+            self.between[0].id,
+            self.between[1].id)
+        return [
+            peering_route.perform(action)
+            for peering_route in self.peering_routes
+        ]
+
+    def perform(self, action):
+        if action == 'destroy':
+            route_outcomes = self.perform_routes(action)
+            self.perform_relationship(action)
+            return route_outcomes
+
+        self.perform_relationship(action)
+        return self.perform_routes(action)
+
     def _to_dict(self):
         return {
             'vpcs': tuple(self.between),
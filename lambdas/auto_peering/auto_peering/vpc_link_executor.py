@@ -0,0 +1,295 @@
+import contextlib
+import json
+import threading
+
+from auto_peering.concurrency import map_concurrently
+from auto_peering.step_scheduler import StepScheduler
+
+
+class VPCLinkOutcome(object):
+    def __init__(self, vpc_link, action, result=None, error=None):
+        self.vpc_link = vpc_link
+        self.action = action
+        self.result = result
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def _to_dict(self):
+        return {
+            'vpcs': tuple(vpc.id for vpc in self.vpc_link.between),
+            'action': self.action,
+            'result': self.result,
+            'error': self.error,
+        }
+
+    def __repr__(self):
+        return "<%s.%s object at %s: %s>" % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            hex(id(self)),
+            repr(self._to_dict()))
+
+
+class VPCLinkFailures(Exception):
+    def __init__(self, vpc_link_outcomes):
+        self.vpc_link_outcomes = list(vpc_link_outcomes)
+        super().__init__(
+            "Failed to manage {} VPC links: {}".format(
+                len(self.vpc_link_outcomes),
+                '; '.join(
+                    "'{}' between '{}' and '{}': {}".format(
+                        vpc_link_outcome.action,
+                        vpc_link_outcome.vpc_link.between[0].id,
+                        vpc_link_outcome.vpc_link.between[1].id,
+                        vpc_link_outcome.error)
+                    for vpc_link_outcome in self.vpc_link_outcomes)))
+
+
+class VPCLinkExecutor(object):
+    def __init__(self, logger, max_workers=1, max_workers_per_account=0):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.max_workers_per_account = max_workers_per_account
+        self.account_semaphores = {}
+        self.lock = threading.Lock()
+
+    def __semaphores_for(self, vpc_link):
+        if self.max_workers_per_account <= 0:
+            return []
+
+        account_ids = sorted({vpc.account_id for vpc in vpc_link.between})
+        with self.lock:
+            return [
+                self.account_semaphores.setdefault(
+                    account_id,
+                    threading.BoundedSemaphore(self.max_workers_per_account))
+                for account_id in account_ids
+            ]
+
+    @contextlib.contextmanager
+    def __limits_for(self, vpc_link):
+        semaphores = self.__semaphores_for(vpc_link)
+        for semaphore in semaphores:
+            semaphore.acquire()
+        try:
+            yield
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+
+    def __limited(self, vpc_link, function):
+        def limited(*arguments):
+            with self.__limits_for(vpc_link):
+                return function(*arguments)
+
+        return limited
+
+    def __attempt(self, vpc_link, action, step):
+        try:
+            with self.__limits_for(vpc_link):
+                return VPCLinkOutcome(
+                    vpc_link, action, result=step(vpc_link))
+        except Exception as error:
+            self.logger.exception(
+                "Failed to '%s' VPC link between '%s' and '%s'. "
+                "Continuing.",
+                action, vpc_link.between[0].id, vpc_link.between[1].id)
+            return VPCLinkOutcome(vpc_link, action, error=error)
+
+    def __attempt_all(self, vpc_links, action, step):
+        return map_concurrently(
+            lambda vpc_link: self.__attempt(vpc_link, action, step),
+            vpc_links,
+            self.max_workers)
+
+    def execute(self, vpc_links, action):
+        return self.__attempt_all(
+            vpc_links, action,
+            lambda vpc_link: vpc_link.perform(action))
+
+    def provision_batched(self, vpc_links, vpc_peering_connection_waiter):
+        request_outcomes = self.__attempt_all(
+            vpc_links, 'provision',
+            lambda vpc_link:
+            vpc_link.peering_relationship.request_unless_established())
+        requested = {
+            request_outcome.result.id: request_outcome
+            for request_outcome in request_outcomes
+            if request_outcome.succeeded and request_outcome.result
+        }
+
+        accept_outcomes = {}
+        accepted_ids = set()
+
+        def accept(acceptor_vpc_peering_connection):
+            vpc_peering_connection_id = acceptor_vpc_peering_connection.id
+            request_outcome = requested[vpc_peering_connection_id]
+            accept_outcome = self.__attempt(
+                request_outcome.vpc_link, 'provision',
+                lambda vpc_link: vpc_link.peering_relationship.accept(
+                    request_outcome.result,
+                    acceptor_vpc_peering_connection))
+            accept_outcomes[vpc_peering_connection_id] = accept_outcome
+            if accept_outcome.result:
+                accepted_ids.add(vpc_peering_connection_id)
+
+        unavailable_ids = vpc_peering_connection_waiter.wait_for(
+            [(request_outcome.vpc_link.peering_relationship.accepter_vpc_of(
+                request_outcome.result), vpc_peering_connection_id)
+             for vpc_peering_connection_id, request_outcome
+             in requested.items()],
+            accept)
+        for vpc_peering_connection_id in unavailable_ids:
+            request_outcome = requested[vpc_peering_connection_id]
+            accept_outcomes[vpc_peering_connection_id] = self.__attempt(
+                request_outcome.vpc_link, 'provision',
+                lambda vpc_link: vpc_link.peering_relationship.abandon(
+                    request_outcome.result))
+
+        accepted_vpc_links = [
+            request_outcome.vpc_link
+            for request_outcome in request_outcomes
+            if request_outcome.succeeded and (
+                request_outcome.result is None or
+                request_outcome.result.id in accepted_ids)
+        ]
+        route_outcomes = self.__attempt_all(
+            accepted_vpc_links, 'provision',
+            lambda vpc_link: vpc_link.perform_routes('provision'))
+        route_outcomes_by_vpc_link = {
+            id(route_outcome.vpc_link): route_outcome
+            for route_outcome in route_outcomes
+        }
+
+        outcomes = []
+        for request_outcome in request_outcomes:
+            if not request_outcome.succeeded:
+                outcomes.append(request_outcome)
+                continue
+
+            vpc_link = request_outcome.vpc_link
+            if id(vpc_link) in route_outcomes_by_vpc_link:
+                outcomes.append(route_outcomes_by_vpc_link[id(vpc_link)])
+                continue
+
+            accept_outcome = accept_outcomes[request_outcome.result.id]
+            if accept_outcome.succeeded:
+                outcomes.append(VPCLinkOutcome(
+                    vpc_link, 'provision',
+                    error=Exception(
+                        "Peering connection '{}' was not accepted.".format(
+                            request_outcome.result.id))))
+            else:
+                outcomes.append(accept_outcome)
+
+        return outcomes
+
+    def __wait_step(self, vpc_link, vpc_peering_connection_waiter):
+        def wait(requester_vpc_peering_connection):
+            if requester_vpc_peering_connection is None:
+                return None
+
+            available = []
+            unavailable_ids = vpc_peering_connection_waiter.wait_for(
+                [(vpc_link.peering_relationship.accepter_vpc_of(
+                    requester_vpc_peering_connection),
+                  requester_vpc_peering_connection.id)],
+                available.append)
+            if unavailable_ids:
+                with self.__limits_for(vpc_link):
+                    vpc_link.peering_relationship.abandon(
+                        requester_vpc_peering_connection)
+                raise Exception(
+                    "Peering connection '{}' did not become available."
+                    .format(requester_vpc_peering_connection.id))
+            return available[0]
+
+        return wait
+
+    @staticmethod
+    def __accept_step(vpc_link):
+        def accept(requester_vpc_peering_connection,
+                   acceptor_vpc_peering_connection):
+            if requester_vpc_peering_connection is None:
+                return
+            if not vpc_link.peering_relationship.accept(
+                    requester_vpc_peering_connection,
+                    acceptor_vpc_peering_connection):
+                raise Exception(
+                    "Peering connection '{}' was not accepted.".format(
+                        requester_vpc_peering_connection.id))
+
+        return accept
+
+    @staticmethod
+    def __route_step(peering_route):
+        return lambda _: peering_route.perform('provision')
+
+    def provision_scheduled(self, vpc_links, vpc_peering_connection_waiter):
+        vpc_links = list(vpc_links)
+        step_scheduler = StepScheduler(
+            self.logger, max_workers=self.max_workers)
+
+        steps_by_vpc_link = []
+        for vpc_link in vpc_links:
+            link_name = "{}:{}".format(
+                vpc_link.between[0].id, vpc_link.between[1].id)
+            # Steps, rather than whole links, hold the per account limits so
+            # that no step waits on another while holding them. The wait step
+            # only polls, so it holds no limits at all.
+            request = step_scheduler.add(
+                "request:{}".format(link_name),
+                self.__limited(
+                    vpc_link,
+                    vpc_link.peering_relationship.request_unless_established))
+            wait = step_scheduler.add(
+                "wait:{}".format(link_name),
+                self.__wait_step(vpc_link, vpc_peering_connection_waiter),
+                depends_on=[request])
+            accept = step_scheduler.add(
+                "accept:{}".format(link_name),
+                self.__limited(vpc_link, self.__accept_step(vpc_link)),
+                depends_on=[request, wait])
+            routes = [
+                step_scheduler.add(
+                    "route:{}:{}".format(
+                        peering_route.vpc1.id, peering_route.vpc2.id),
+                    self.__limited(
+                        vpc_link, self.__route_step(peering_route)),
+                    depends_on=[accept])
+                for peering_route in vpc_link.peering_routes
+            ]
+            steps_by_vpc_link.append(
+                (vpc_link, [request, wait, accept] + routes, routes))
+
+        step_results = step_scheduler.run()
+        self.logger.info(
+            "Step timings: %s",
+            json.dumps([
+                step_results[name].timing()
+                for _, names, _ in steps_by_vpc_link
+                for name in names
+            ]))
+
+        outcomes = []
+        for vpc_link, names, routes in steps_by_vpc_link:
+            failed = next(
+                (step_results[name] for name in names
+                 if step_results[name].error is not None),
+                None)
+            if failed:
+                outcomes.append(VPCLinkOutcome(
+                    vpc_link, 'provision', error=failed.error))
+            elif not all(step_results[name].succeeded for name in names):
+                outcomes.append(VPCLinkOutcome(
+                    vpc_link, 'provision',
+                    error=Exception("Provisioning steps were skipped.")))
+            else:
+                outcomes.append(VPCLinkOutcome(
+                    vpc_link, 'provision',
+                    result=[step_results[name].value for name in routes]))
+
+        return outcomes
@@ -1,17 +1,43 @@
+from auto_peering import tracing
 from auto_peering.all_vpcs import AllVPCs
+from auto_peering.private_route_tables import PrivateRouteTables
 from auto_peering.vpc_link import VPCLink
+from auto_peering.vpc_peering_connections import VPCPeeringConnections
 
 
 class VPCLinks(object):
-    def __init__(self, ec2_gateways, logger):
+    def __init__(self, ec2_gateways, logger, all_vpcs=None,
+                 vpc_peering_connections=None, private_route_tables=None,
+                 reconcile_routes=False):
         self.ec2_gateways = ec2_gateways
-        self.all_vpcs = AllVPCs(self.ec2_gateways)
+        self.all_vpcs = all_vpcs or AllVPCs(self.ec2_gateways)
+        self.vpc_peering_connections = \
+            vpc_peering_connections or \
+            VPCPeeringConnections(self.ec2_gateways)
+        self.private_route_tables = \
+            private_route_tables or \
+            PrivateRouteTables(self.ec2_gateways)
+        self.reconcile_routes = reconcile_routes
         self.logger = logger
 
     def __vpc_link(self, between, routes):
-        return VPCLink(self.ec2_gateways, self.logger, between, routes)
+        return VPCLink(
+            self.ec2_gateways, self.logger, between, routes,
+            vpc_peering_connections=self.vpc_peering_connections,
+            private_route_tables=self.private_route_tables,
+            reconcile_routes=self.reconcile_routes)
 
     def resolve_for(self, target_account_id, target_vpc_id):
+        with tracing.span(
+                'resolve_vpc_links',
+                account_id=target_account_id,
+                vpc_id=target_vpc_id) as span:
+            vpc_links = self.__resolve_for(target_account_id, target_vpc_id)
+            span.set_attribute('link_count', len(vpc_links))
+
+        return vpc_links
+
+    def __resolve_for(self, target_account_id, target_vpc_id):
         self.logger.info(
             "Computing VPC links for VPC with ID: '%s' " 
             "in account with ID: '%s'.",
@@ -0,0 +1,107 @@
+import random
+import time
+
+from auto_peering.concurrency import map_concurrently
+from auto_peering.describe_cache import uncached
+
+DEFAULT_TIMEOUT_SECONDS = 60
+DEFAULT_INITIAL_DELAY_SECONDS = 0.5
+DEFAULT_MAXIMUM_DELAY_SECONDS = 8
+
+INITIATING_STATUS_CODE = 'initiating-request'
+
+
+class VPCPeeringConnectionWaiter(object):
+    def __init__(self, ec2_gateways, logger,
+                 max_workers=1,
+                 timeout_seconds=DEFAULT_TIMEOUT_SECONDS,
+                 initial_delay_seconds=DEFAULT_INITIAL_DELAY_SECONDS,
+                 maximum_delay_seconds=DEFAULT_MAXIMUM_DELAY_SECONDS,
+                 clock=time.monotonic,
+                 sleep=time.sleep,
+                 jitter=random.random):
+        self.ec2_gateways = ec2_gateways
+        self.logger = logger
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.initial_delay_seconds = initial_delay_seconds
+        self.maximum_delay_seconds = maximum_delay_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.jitter = jitter
+
+    def __poll(self, accepter_location, vpc_peering_connection_ids):
+        ec2_gateway = self.ec2_gateways.by_account_id_and_region(
+            *accepter_location)
+
+        with uncached():
+            vpc_peering_connections = list(
+                ec2_gateway.resource().vpc_peering_connections.filter(
+                    Filters=[{'Name': 'vpc-peering-connection-id',
+                              'Values': sorted(vpc_peering_connection_ids)}]))
+
+        return [
+            vpc_peering_connection
+            for vpc_peering_connection in vpc_peering_connections
+            if vpc_peering_connection.status['Code'] !=
+            INITIATING_STATUS_CODE
+        ]
+
+    def __delay_for(self, attempt):
+        return self.jitter() * min(
+            self.maximum_delay_seconds,
+            self.initial_delay_seconds * (2 ** attempt))
+
+    def wait_for(self, pending, on_available):
+        ids_by_accepter_location = {}
+        for accepter_vpc, vpc_peering_connection_id in pending:
+            ids_by_accepter_location.setdefault(
+                (accepter_vpc.account_id, accepter_vpc.region),
+                set()).add(vpc_peering_connection_id)
+
+        deadline = self.clock() + self.timeout_seconds
+        attempt = 0
+        while ids_by_accepter_location:
+            accepter_locations = sorted(ids_by_accepter_location)
+            available = [
+                vpc_peering_connection
+                for vpc_peering_connections in map_concurrently(
+                    lambda accepter_location: self.__poll(
+                        accepter_location,
+                        ids_by_accepter_location[accepter_location]),
+                    accepter_locations,
+                    self.max_workers)
+                for vpc_peering_connection in vpc_peering_connections
+            ]
+
+            for accepter_location in accepter_locations:
+                ids_by_accepter_location[accepter_location] -= {
+                    vpc_peering_connection.id
+                    for vpc_peering_connection in available
+                }
+                if not ids_by_accepter_location[accepter_location]:
+                    del ids_by_accepter_location[accepter_location]
+
+            map_concurrently(on_available, available, self.max_workers)
+
+            if not ids_by_accepter_location:
+                break
+
+            remaining_seconds = deadline - self.clock()
+            if remaining_seconds <= 0:
+                break
+
+            attempt = 0 if available else attempt + 1
+            delay = min(self.__delay_for(attempt), remaining_seconds)
+
+            self.logger.info(
+                "Waiting %.2f seconds for %d peering connections to exist.",
+                delay,
+                sum(len(ids) for ids in ids_by_accepter_location.values()))
+            self.sleep(delay)
+
+        return {
+            vpc_peering_connection_id
+            for ids in ids_by_accepter_location.values()
+            for vpc_peering_connection_id in ids
+        }
@@ -0,0 +1,116 @@
+import threading
+
+from auto_peering.concurrency import map_concurrently
+from auto_peering.describe_cache import uncached
+
+LIVE_STATUS_CODES = [
+    'initiating-request',
+    'pending-acceptance',
+    'provisioning',
+    'active'
+]
+
+
+class VPCPeeringConnections(object):
+    def __init__(self, ec2_gateways, max_workers=1):
+        self.ec2_gateways = ec2_gateways
+        self.max_workers = max_workers
+        self.vpc_peering_connections = {}
+        self.prefetched = set()
+        self.lock = threading.Lock()
+
+    def __fetch(self, accepter_vpc, requester_vpc):
+        ec2_gateway = \
+            self.ec2_gateways.by_account_id_and_region(
+                accepter_vpc.account_id, accepter_vpc.region)
+        ec2_resource = ec2_gateway.resource()
+
+        return next(
+            iter(ec2_resource.vpc_peering_connections.filter(
+                Filters=[{'Name': 'accepter-vpc-info.vpc-id',
+                          'Values': [accepter_vpc.id]},
+                         {'Name': 'requester-vpc-info.vpc-id',
+                          'Values': [requester_vpc.id]},
+                         {'Name': 'status-code',
+                          'Values': LIVE_STATUS_CODES}])),
+            None)
+
+    def __prefetch_in(self, ec2_gateway, accepter_vpc_ids,
+                      requester_vpc_ids):
+        ec2_resource = ec2_gateway.resource()
+
+        return list(ec2_resource.vpc_peering_connections.filter(
+            Filters=[{'Name': 'accepter-vpc-info.vpc-id',
+                      'Values': sorted(accepter_vpc_ids)},
+                     {'Name': 'requester-vpc-info.vpc-id',
+                      'Values': sorted(requester_vpc_ids)},
+                     {'Name': 'status-code',
+                      'Values': LIVE_STATUS_CODES}]))
+
+    def prefetch_for(self, vpc_links):
+        vpc_pairs_by_accepter_location = {}
+        for vpc_link in vpc_links:
+            vpc1, vpc2 = vpc_link.between
+            for accepter_vpc, requester_vpc in [(vpc1, vpc2), (vpc2, vpc1)]:
+                vpc_pairs_by_accepter_location.setdefault(
+                    (accepter_vpc.account_id, accepter_vpc.region),
+                    set()).add((accepter_vpc.id, requester_vpc.id))
+
+        def prefetch(accepter_location):
+            vpc_pairs = vpc_pairs_by_accepter_location[accepter_location]
+            return self.__prefetch_in(
+                self.ec2_gateways.by_account_id_and_region(
+                    *accepter_location),
+                {accepter_vpc_id for accepter_vpc_id, _ in vpc_pairs},
+                {requester_vpc_id for _, requester_vpc_id in vpc_pairs})
+
+        accepter_locations = sorted(vpc_pairs_by_accepter_location)
+        prefetched_vpc_peering_connections = map_concurrently(
+            prefetch, accepter_locations, self.max_workers)
+
+        with self.lock:
+            for accepter_location, vpc_peering_connections in zip(
+                    accepter_locations, prefetched_vpc_peering_connections):
+                for vpc_peering_connection in vpc_peering_connections:
+                    self.vpc_peering_connections.setdefault(
+                        (vpc_peering_connection.requester_vpc_info['VpcId'],
+                         vpc_peering_connection.accepter_vpc_info['VpcId']),
+                        vpc_peering_connection)
+                for accepter_vpc_id, requester_vpc_id in \
+                        vpc_pairs_by_accepter_location[accepter_location]:
+                    self.prefetched.add((requester_vpc_id, accepter_vpc_id))
+
+    def find(self, accepter_vpc, requester_vpc):
+        key = (requester_vpc.id, accepter_vpc.id)
+        with self.lock:
+            if key in self.prefetched:
+                return self.vpc_peering_connections.get(key)
+
+        return self.__fetch(accepter_vpc, requester_vpc)
+
+    def find_between(self, vpc1, vpc2):
+        return self.find(vpc1, vpc2) or self.find(vpc2, vpc1)
+
+    def refresh_between(self, vpc1, vpc2):
+        with uncached():
+            for accepter_vpc, requester_vpc in [(vpc1, vpc2), (vpc2, vpc1)]:
+                vpc_peering_connection = self.__fetch(
+                    accepter_vpc, requester_vpc)
+                if vpc_peering_connection:
+                    self.add(
+                        requester_vpc, accepter_vpc, vpc_peering_connection)
+                    return vpc_peering_connection
+
+        return None
+
+    def add(self, requester_vpc, accepter_vpc, vpc_peering_connection):
+        key = (requester_vpc.id, accepter_vpc.id)
+        with self.lock:
+            self.vpc_peering_connections[key] = vpc_peering_connection
+            self.prefetched.add(key)
+
+    def remove(self, vpc1, vpc2):
+        with self.lock:
+            for key in [(vpc1.id, vpc2.id), (vpc2.id, vpc1.id)]:
+                self.vpc_peering_connections.pop(key, None)
+                self.prefetched.add(key)
@@ -1,88 +1,220 @@
 from botocore.exceptions import ClientError
 
+from auto_peering import tracing
+from auto_peering.describe_cache import uncached
+from auto_peering.vpc_peering_connections import VPCPeeringConnections
+
+ESTABLISHED_STATUS_CODES = ['active', 'provisioning']
+PENDING_ACCEPTANCE_STATUS_CODE = 'pending-acceptance'
+INITIATING_REQUEST_STATUS_CODE = 'initiating-request'
+ALREADY_EXISTS_ERROR_CODE = 'VpcPeeringConnectionAlreadyExists'
+
 
 class VPCPeeringRelationship(object):
-    def __init__(self, ec2_gateways, logger, between):
+    def __init__(self, ec2_gateways, logger, between,
+                 vpc_peering_connections=None):
         self.vpc1 = between[0]
         self.vpc2 = between[1]
         self.ec2_gateways = ec2_gateways
         self.logger = logger
+        self.vpc_peering_connections = \
+            vpc_peering_connections or VPCPeeringConnections(ec2_gateways)
+        self.requested_vpc_peering_connection_ids = set()
 
-    def __peering_connection_for(self, vpc1, vpc2):
-        ec2_gateway = \
-            self.ec2_gateways.by_account_id_and_region(
-                vpc1.account_id, vpc1.region)
-        ec2_resource = ec2_gateway.resource()
+    def fetch(self):
+        return self.vpc_peering_connections.find_between(self.vpc1, self.vpc2)
 
-        return next(
-            iter(ec2_resource.vpc_peering_connections.filter(
-                Filters=[{'Name': 'accepter-vpc-info.vpc-id',
-                          'Values': [vpc1.id]},
-                         {'Name': 'requester-vpc-info.vpc-id',
-                          'Values': [vpc2.id]}])),
-            None)
+    def accepter_vpc_of(self, vpc_peering_connection):
+        # Connections requested here are always accepted by the second VPC
+        # but existing ones may have been requested from either side.
+        if vpc_peering_connection.id in \
+                self.requested_vpc_peering_connection_ids:
+            return self.vpc2
+        accepter_vpc_info = vpc_peering_connection.accepter_vpc_info or {}
+        if accepter_vpc_info.get('VpcId') == self.vpc1.id:
+            return self.vpc1
+        return self.vpc2
 
-    def fetch(self):
-        peering_connection = self.__peering_connection_for(
-            self.vpc1, self.vpc2)
-        if peering_connection:
-            return peering_connection
+    def __accepter_ec2_gateway(self, vpc_peering_connection):
+        accepter_vpc = self.accepter_vpc_of(vpc_peering_connection)
+        return self.ec2_gateways.by_account_id_and_region(
+            accepter_vpc.account_id, accepter_vpc.region)
 
-        peering_connection = self.__peering_connection_for(
-            self.vpc2, self.vpc1)
-        if peering_connection:
-            return peering_connection
+    def __wait_for(self, vpc_peering_connection):
+        self.logger.info(
+            "Waiting for peering connection between: '%s' and: '%s' to "
+            "exist.",
+            self.vpc1.id, self.vpc2.id)
+        with uncached():
+            waiter = self.__accepter_ec2_gateway(vpc_peering_connection)\
+                .client().get_waiter('vpc_peering_connection_exists')
+            waiter.wait(
+                VpcPeeringConnectionIds=[vpc_peering_connection.id],
+                WaiterConfig={'Delay': 2, 'MaxAttempts': 10})
 
-        return None
+            return self.__describe(vpc_peering_connection)
 
-    def provision(self):
-        vpc1_id = self.vpc1.id
-        vpc2_id = self.vpc2.id
+    def __describe(self, vpc_peering_connection):
+        with uncached():
+            return next(iter(
+                self.__accepter_ec2_gateway(vpc_peering_connection)
+                    .resource().vpc_peering_connections.filter(
+                        VpcPeeringConnectionIds=[
+                            vpc_peering_connection.id
+                        ])), None)
 
-        vpc2_region = self.vpc2.region
-        vpc2_account_id = self.vpc2.account_id
+    def __span(self, name, **attributes):
+        return tracing.span(
+            name,
+            requester_vpc_id=self.vpc1.id,
+            accepter_vpc_id=self.vpc2.id,
+            **attributes)
 
+    def request(self):
         self.logger.info(
             "Requesting peering connection between: '%s' and: '%s'.",
-            vpc1_id, vpc2_id)
-        requester_vpc_peering_connection = self. \
-            vpc1.request_vpc_peering_connection(PeerOwnerId=vpc2_account_id,
-                                                PeerVpcId=vpc2_id,
-                                                PeerRegion=vpc2_region)
+            self.vpc1.id, self.vpc2.id)
+        with self.__span('request_peering_connection'):
+            try:
+                vpc_peering_connection = \
+                    self.vpc1.request_vpc_peering_connection(
+                        PeerOwnerId=self.vpc2.account_id,
+                        PeerVpcId=self.vpc2.id,
+                        PeerRegion=self.vpc2.region)
+            except ClientError as error:
+                if error.response['Error']['Code'] != \
+                        ALREADY_EXISTS_ERROR_CODE:
+                    raise
+                return self.__requested_elsewhere(error)
+        self.requested_vpc_peering_connection_ids.add(
+            vpc_peering_connection.id)
+        return vpc_peering_connection
 
-        try:
-            ec2_gateway = self.ec2_gateways.\
-                by_account_id_and_region(vpc2_account_id, vpc2_region)
-            ec2_resource = ec2_gateway.resource()
-            ec2_client = ec2_gateway.client()
+    def __requested_elsewhere(self, error):
+        # EC2 allows only one live connection between two VPCs, so another
+        # invocation requested it first. That connection is carried on with
+        # instead, accepting it being safe to repeat.
+        vpc_peering_connection = self.vpc_peering_connections.refresh_between(
+            self.vpc1, self.vpc2)
+        if vpc_peering_connection is None:
+            raise error
 
-            vpc_peering_connection_id = requester_vpc_peering_connection.id
+        self.logger.info(
+            "Peering connection between: '%s' and: '%s' was already "
+            "requested. Continuing with: '%s'.",
+            self.vpc1.id, self.vpc2.id, vpc_peering_connection.id)
+        return vpc_peering_connection
 
-            self.logger.info(
-                "Waiting for peering connection between: '%s' and: '%s' to "
-                "exist.",
-                vpc1_id, vpc2_id)
-            waiter = ec2_client.get_waiter('vpc_peering_connection_exists')
-            waiter.wait(
-                VpcPeeringConnectionIds=[vpc_peering_connection_id],
-                WaiterConfig={'Delay': 2, 'MaxAttempts': 10})
+    def accept(self, requester_vpc_peering_connection,
+               acceptor_vpc_peering_connection=None):
+        with self.__span('accept_peering_connection') as span:
+            accepted = self.__accept(
+                requester_vpc_peering_connection,
+                acceptor_vpc_peering_connection)
+            span.set_attribute('accepted', accepted)
+
+        return accepted
+
+    def __accept(self, requester_vpc_peering_connection,
+                 acceptor_vpc_peering_connection):
+        try:
+            if acceptor_vpc_peering_connection is None:
+                acceptor_vpc_peering_connection = self.__wait_for(
+                    requester_vpc_peering_connection)
 
             self.logger.info(
                 "Accepting peering connection between: '%s' and: '%s'.",
-                vpc1_id, vpc2_id)
-
-            acceptor_vpc_peering_connection = next(iter(
-                ec2_resource.vpc_peering_connections.filter(
-                    VpcPeeringConnectionIds=[
-                        vpc_peering_connection_id
-                    ])), None)
+                self.vpc1.id, self.vpc2.id)
             acceptor_vpc_peering_connection.accept()
+            self.vpc_peering_connections.add(
+                self.vpc1, self.vpc2, acceptor_vpc_peering_connection)
+            return True
         except ClientError as error:
+            # Another invocation may have accepted the same connection first.
+            if self.__accepted_elsewhere(requester_vpc_peering_connection):
+                return True
+
             self.logger.warn(
                 "Could not accept peering connection between: '%s' and: '%s'. "
                 "Error was: %s",
-                vpc1_id, vpc2_id, error)
-            requester_vpc_peering_connection.delete()
+                self.vpc1.id, self.vpc2.id, error)
+            self.__delete_if_requested(requester_vpc_peering_connection)
+            return False
+
+    def __accepted_elsewhere(self, requester_vpc_peering_connection):
+        try:
+            vpc_peering_connection = self.__describe(
+                requester_vpc_peering_connection)
+        except ClientError:
+            return False
+        status_code = vpc_peering_connection.status['Code'] \
+            if vpc_peering_connection else None
+
+        if status_code not in ESTABLISHED_STATUS_CODES:
+            return False
+
+        self.logger.info(
+            "Peering connection between: '%s' and: '%s' was already "
+            "accepted with status: '%s'. Continuing.",
+            self.vpc1.id, self.vpc2.id, status_code)
+        self.vpc_peering_connections.add(
+            self.vpc1, self.vpc2, vpc_peering_connection)
+        return True
+
+    def __delete_if_requested(self, requester_vpc_peering_connection):
+        # Connections requested by other invocations may already be routed
+        # through, so only those requested here are ever deleted.
+        if requester_vpc_peering_connection.id not in \
+                self.requested_vpc_peering_connection_ids:
+            self.logger.warn(
+                "Leaving peering connection between: '%s' and: '%s' to the "
+                "invocation that requested it.",
+                self.vpc1.id, self.vpc2.id)
+            return
+        requester_vpc_peering_connection.delete()
+
+    def abandon(self, requester_vpc_peering_connection):
+        self.logger.warn(
+            "Peering connection between: '%s' and: '%s' did not become "
+            "available to accept. Deleting.",
+            self.vpc1.id, self.vpc2.id)
+        with self.__span('abandon_peering_connection'):
+            self.__delete_if_requested(requester_vpc_peering_connection)
+
+    def __existing(self):
+        vpc_peering_connection = self.fetch()
+        status_code = vpc_peering_connection.status['Code'] \
+            if vpc_peering_connection else None
+
+        if status_code in ESTABLISHED_STATUS_CODES:
+            self.logger.info(
+                "Peering connection between: '%s' and: '%s' already "
+                "exists with status: '%s'. Skipping.",
+                self.vpc1.id, self.vpc2.id, status_code)
+
+        return vpc_peering_connection, status_code
+
+    def request_unless_established(self):
+        vpc_peering_connection, status_code = self.__existing()
+
+        if status_code in ESTABLISHED_STATUS_CODES:
+            return None
+        if status_code in [PENDING_ACCEPTANCE_STATUS_CODE,
+                           INITIATING_REQUEST_STATUS_CODE]:
+            return vpc_peering_connection
+        return self.request()
+
+    def provision(self):
+        vpc_peering_connection, status_code = self.__existing()
+
+        if status_code in ESTABLISHED_STATUS_CODES:
+            return
+        if status_code == PENDING_ACCEPTANCE_STATUS_CODE:
+            self.accept(vpc_peering_connection, vpc_peering_connection)
+        elif status_code == INITIATING_REQUEST_STATUS_CODE:
+            self.accept(vpc_peering_connection)
+        else:
+            self.accept(self.request())
 
     def destroy(self):
         vpc_peering_connection = self.fetch()
@@ -92,6 +224,7 @@ class VPCPeeringRelationship(object):
                 vpc_peering_connection.requester_vpc.id,
                 vpc_peering_connection.accepter_vpc.id)
             vpc_peering_connection.delete()
+            self.vpc_peering_connections.remove(self.vpc1, self.vpc2)
         else:
             self.logger.info(
                 "No peering connection to destroy between: '%s' and: '%s'.",
@@ -99,7 +232,8 @@ class VPCPeeringRelationship(object):
                 self.vpc2.id)
 
     def perform(self, action):
-        getattr(self, action)()
+        with self.__span('perform_relationship', action=action):
+            getattr(self, action)()
 
     def _to_dict(self):
         return {
@@ -1,41 +1,116 @@
 from botocore.exceptions import ClientError
 
+from auto_peering import tracing
+from auto_peering.private_route_tables import PrivateRouteTables
+
+ROUTE_ALREADY_EXISTS_ERROR_CODE = 'RouteAlreadyExists'
+
 
 class VPCPeeringRoute(object):
     def __init__(self,
                  ec2_gateways,
                  logger,
                  between,
-                 peering_relationship):
+                 peering_relationship,
+                 private_route_tables=None,
+                 reconcile=False):
         self.vpc1 = between[0]
         self.vpc2 = between[1]
         self.vpc_peering_relationship = peering_relationship
         self.ec2_gateways = ec2_gateways
+        self.private_route_tables = \
+            private_route_tables or PrivateRouteTables(ec2_gateways)
+        self.reconcile = reconcile
         self.logger = logger
 
     def __private_route_tables_for(self, vpc):
-        ec2_gateway = self.ec2_gateways.\
-            by_account_id_and_region(vpc.account_id, vpc.region)
+        return self.private_route_tables.for_vpc(vpc)
 
-        return ec2_gateway.resource().route_tables.filter(
-            Filters=[
-                {'Name': 'vpc-id', 'Values': [vpc.id]},
-                {'Name': 'tag:Tier', 'Values': ['private']}])
-
-    def __create_routes_in(self, route_tables, destination_vpc,
+    def __already_routed_in(self, route_table, source_vpc, destination_vpc,
+                            vpc_peering_connection):
+        route = self.private_route_tables.routes_in(route_table)\
+            .get(destination_vpc.cidr_block)
+        # Reconciliation only creates routes missing from the snapshot, so
+        # the conflicting route is newer than it and its target decides the
+        # outcome. Describe the VPC's route tables again, at most once.
+        if route is None and self.reconcile:
+            self.private_route_tables.refresh(source_vpc)
+            route = self.private_route_tables.routes_in(route_table)\
+                .get(destination_vpc.cidr_block)
+
+        return route is not None and \
+            route.get('VpcPeeringConnectionId') == vpc_peering_connection.id
+
+    def __create_routes_in(self, route_tables, source_vpc, destination_vpc,
                            vpc_peering_connection):
+        created = 0
+        already_present = 0
         for route_table in route_tables:
             try:
                 route_table.create_route(
                     DestinationCidrBlock=destination_vpc.cidr_block,
                     VpcPeeringConnectionId=vpc_peering_connection.id)
+                self.private_route_tables.add_route(
+                    route_table,
+                    destination_vpc.cidr_block,
+                    vpc_peering_connection.id)
+                created += 1
                 self.logger.info(
                     "Route creation succeeded for '%s'. Continuing.",
                     route_table.id)
             except ClientError as error:
+                # Another invocation may have created the same route first.
+                if error.response['Error']['Code'] == \
+                        ROUTE_ALREADY_EXISTS_ERROR_CODE and \
+                        self.__already_routed_in(
+                            route_table, source_vpc, destination_vpc,
+                            vpc_peering_connection):
+                    self.private_route_tables.add_route(
+                        route_table,
+                        destination_vpc.cidr_block,
+                        vpc_peering_connection.id)
+                    already_present += 1
+                    self.logger.info(
+                        "Route already present for '%s'. Continuing.",
+                        route_table.id)
+                    continue
                 self.logger.warn(
                     "Route creation failed for '%s'. Error was: %s",
                     route_table.id, error)
+        return created, already_present
+
+    def __reconcile_routes_in(self, route_tables, source_vpc,
+                              destination_vpc, vpc_peering_connection):
+        missing_route_tables = []
+        already_present = 0
+        conflicting = 0
+        for route_table in route_tables:
+            route = self.private_route_tables.routes_in(route_table)\
+                .get(destination_vpc.cidr_block)
+            if route is None:
+                missing_route_tables.append(route_table)
+            elif route.get('VpcPeeringConnectionId') == \
+                    vpc_peering_connection.id:
+                already_present += 1
+                self.logger.info(
+                    "Route already present for '%s'. Continuing.",
+                    route_table.id)
+            else:
+                conflicting += 1
+                self.logger.warning(
+                    "Route conflict for '%s' as existing route does not "
+                    "pertain to VPC peering connection '%s'. Continuing.",
+                    route_table.id, vpc_peering_connection.id)
+
+        created, already_created = self.__create_routes_in(
+            missing_route_tables, source_vpc, destination_vpc,
+            vpc_peering_connection)
+
+        return {
+            'created': created,
+            'already_present': already_present + already_created,
+            'conflicting': conflicting
+        }
 
     def __create_routes_for(self, source_vpc, destination_vpc,
                             vpc_peering_connection):
@@ -44,22 +119,42 @@ class VPCPeeringRoute(object):
             source_vpc.id, destination_vpc.id, destination_vpc.cidr_block,
             vpc_peering_connection.id)
 
-        self.__create_routes_in(
-            self.__private_route_tables_for(source_vpc),
-            destination_vpc, vpc_peering_connection)
+        route_tables = self.__private_route_tables_for(source_vpc)
+
+        if not self.reconcile:
+            self.__create_routes_in(
+                route_tables, source_vpc, destination_vpc,
+                vpc_peering_connection)
+            return None
+
+        outcome = self.__reconcile_routes_in(
+            route_tables, source_vpc, destination_vpc,
+            vpc_peering_connection)
+        self.logger.info(
+            "Route reconciliation for '%s' pointing at '%s' complete: "
+            "%d created, %d already present, %d conflicting.",
+            source_vpc.id, destination_vpc.id,
+            outcome['created'], outcome['already_present'],
+            outcome['conflicting'])
+
+        return outcome
 
     def __delete_routes_in(self, route_tables, source_vpc, destination_vpc,
                            vpc_peering_connection):
+        ec2_gateway = self.ec2_gateways.\
+            by_account_id_and_region(source_vpc.account_id,
+                                     source_vpc.region)
+        ec2_resource = ec2_gateway.resource()
         for route_table in route_tables:
             try:
-                ec2_gateway = self.ec2_gateways.\
-                    by_account_id_and_region(source_vpc.account_id,
-                                             source_vpc.region)
-                ec2_resource = ec2_gateway.resource()
-                route = ec2_resource.Route(
-                    route_table.id, destination_vpc.cidr_block)
-                if route.vpc_peering_connection_id == vpc_peering_connection.id:
-                    route.delete()
+                route = self.private_route_tables.routes_in(route_table)\
+                    .get(destination_vpc.cidr_block, {})
+                if route.get('VpcPeeringConnectionId') == \
+                        vpc_peering_connection.id:
+                    ec2_resource.Route(
+                        route_table.id, destination_vpc.cidr_block).delete()
+                    self.private_route_tables.remove_route(
+                        route_table, destination_vpc.cidr_block)
                     self.logger.info(
                         "Route deletion succeeded for '%s'. Continuing.",
                          route_table.id)
@@ -82,23 +177,42 @@ class VPCPeeringRoute(object):
             vpc_peering_connection.id)
 
         self.__delete_routes_in(
-            self.__private_route_tables_for(source_vpc),
+            self.private_route_tables.referencing(
+                source_vpc, vpc_peering_connection.id),
             source_vpc,
             destination_vpc,
             vpc_peering_connection)
 
     def provision(self):
         vpc_peering_connection = self.vpc_peering_relationship.fetch()
+        if vpc_peering_connection is None:
+            self.logger.warning(
+                "No peering connection to route through between: '%s' and: "
+                "'%s'. Skipping.",
+                self.vpc1.id, self.vpc2.id)
+            return None
 
-        self.__create_routes_for(self.vpc1, self.vpc2, vpc_peering_connection)
+        return self.__create_routes_for(
+            self.vpc1, self.vpc2, vpc_peering_connection)
 
     def destroy(self):
         vpc_peering_connection = self.vpc_peering_relationship.fetch()
+        if vpc_peering_connection is None:
+            self.logger.info(
+                "No peering connection to remove routes for between: '%s' "
+                "and: '%s'. Skipping.",
+                self.vpc1.id, self.vpc2.id)
+            return
 
         self.__delete_routes_for(self.vpc1, self.vpc2, vpc_peering_connection)
 
     def perform(self, action):
-        getattr(self, action)()
+        with tracing.span(
+                'perform_route',
+                action=action,
+                source_vpc_id=self.vpc1.id,
+                destination_vpc_id=self.vpc2.id):
+            return getattr(self, action)()
 
     def _to_dict(self):
         return {
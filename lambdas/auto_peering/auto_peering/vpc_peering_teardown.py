@@ -0,0 +1,201 @@
+from botocore.exceptions import ClientError
+
+from auto_peering.concurrency import map_concurrently
+from auto_peering.vpc import VPC
+from auto_peering.vpc_peering_connections import LIVE_STATUS_CODES
+
+VPC_INFO_FILTER_PREFIXES = ['requester-vpc-info', 'accepter-vpc-info']
+
+
+class VPCPeeringTeardownFailures(Exception):
+    def __init__(self, vpc_id, vpc_peering_connection_ids):
+        self.vpc_id = vpc_id
+        self.vpc_peering_connection_ids = sorted(vpc_peering_connection_ids)
+        super().__init__(
+            "Failed to destroy {} peering connections for VPC '{}': {}"
+            .format(
+                len(self.vpc_peering_connection_ids),
+                self.vpc_id,
+                ', '.join(self.vpc_peering_connection_ids)))
+
+
+class VPCPeeringTeardown(object):
+    def __init__(self, ec2_gateways, logger, max_workers=1):
+        self.ec2_gateways = ec2_gateways
+        self.logger = logger
+        self.max_workers = max_workers
+
+    @staticmethod
+    def __find_in(ec2_gateway, vpc_info_filter_prefix, vpc_id):
+        return list(ec2_gateway.resource().vpc_peering_connections.filter(
+            Filters=[{'Name': '{}.vpc-id'.format(vpc_info_filter_prefix),
+                      'Values': [vpc_id]},
+                     {'Name': 'status-code',
+                      'Values': LIVE_STATUS_CODES}]))
+
+    def __find_for(self, account_id, vpc_id):
+        searches = [
+            (ec2_gateway, vpc_info_filter_prefix)
+            for ec2_gateway in self.ec2_gateways.by_account_id(account_id)
+            for vpc_info_filter_prefix in VPC_INFO_FILTER_PREFIXES
+        ]
+        vpc_peering_connections = {}
+        for found in map_concurrently(
+                lambda search: self.__find_in(search[0], search[1], vpc_id),
+                searches,
+                self.max_workers):
+            for vpc_peering_connection in found:
+                vpc_peering_connections.setdefault(
+                    vpc_peering_connection.id, vpc_peering_connection)
+
+        return list(vpc_peering_connections.values())
+
+    def __managed_in(self, location, vpc_ids):
+        ec2_gateway = self.ec2_gateways.by_account_id_and_region(*location)
+        vpcs = [
+            VPC(vpc_response, ec2_gateway.account_id, ec2_gateway.region)
+            for vpc_response in ec2_gateway.resource().vpcs.filter(
+                Filters=[{'Name': 'vpc-id', 'Values': sorted(vpc_ids)}])
+        ]
+
+        return {
+            vpc.id
+            for vpc in vpcs
+            if vpc.component and vpc.deployment_identifier
+        }
+
+    def __managed_among(self, vpc_infos):
+        vpc_ids_by_location = {}
+        for vpc_info in vpc_infos:
+            location = (vpc_info['OwnerId'], vpc_info['Region'])
+            if self.ec2_gateways.covers(*location):
+                vpc_ids_by_location.setdefault(
+                    location, set()).add(vpc_info['VpcId'])
+
+        locations = sorted(vpc_ids_by_location)
+        return {
+            vpc_id
+            for managed_vpc_ids in map_concurrently(
+                lambda location: self.__managed_in(
+                    location, vpc_ids_by_location[location]),
+                locations,
+                self.max_workers)
+            for vpc_id in managed_vpc_ids
+        }
+
+    def __delete_routes_in(self, vpc_info, vpc_peering_connection_id):
+        if not self.ec2_gateways.covers(
+                vpc_info['OwnerId'], vpc_info['Region']):
+            self.logger.info(
+                "Not deleting routes in VPC '%s' outside of the search "
+                "accounts and regions.", vpc_info['VpcId'])
+            return True
+
+        ec2_gateway = self.ec2_gateways.by_account_id_and_region(
+            vpc_info['OwnerId'], vpc_info['Region'])
+        route_tables = ec2_gateway.resource().route_tables.filter(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc_info['VpcId']]},
+                {'Name': 'tag:Tier', 'Values': ['private']},
+                {'Name': 'route.vpc-peering-connection-id',
+                 'Values': [vpc_peering_connection_id]}])
+
+        deleted = True
+        for route_table in route_tables:
+            for route in route_table.routes_attribute:
+                if route.get('VpcPeeringConnectionId') != \
+                        vpc_peering_connection_id or \
+                        'DestinationCidrBlock' not in route:
+                    continue
+                try:
+                    ec2_gateway.client().delete_route(
+                        RouteTableId=route_table.id,
+                        DestinationCidrBlock=route['DestinationCidrBlock'])
+                    self.logger.info(
+                        "Route deletion succeeded for '%s'. Continuing.",
+                        route_table.id)
+                except ClientError as error:
+                    self.logger.warn(
+                        "Route deletion failed for '%s'. Error was: %s",
+                        route_table.id, error)
+                    deleted = False
+
+        return deleted
+
+    def __destroy(self, vpc_peering_connection):
+        requester_vpc_info = vpc_peering_connection.requester_vpc_info
+        accepter_vpc_info = vpc_peering_connection.accepter_vpc_info
+
+        self.logger.info(
+            "Destroying peering connection '%s' between: '%s' and: '%s'.",
+            vpc_peering_connection.id,
+            requester_vpc_info['VpcId'],
+            accepter_vpc_info['VpcId'])
+
+        # The connection is deleted even when its routes could not be, so
+        # that a failure at one end does not leave the connection behind.
+        routes_deleted = True
+        for vpc_info in [requester_vpc_info, accepter_vpc_info]:
+            try:
+                routes_deleted = self.__delete_routes_in(
+                    vpc_info, vpc_peering_connection.id) and routes_deleted
+            except Exception as error:
+                self.logger.warn(
+                    "Could not delete routes in '%s' using peering "
+                    "connection '%s'. Error was: %s",
+                    vpc_info['VpcId'], vpc_peering_connection.id, error)
+                routes_deleted = False
+
+        try:
+            vpc_peering_connection.delete()
+        except Exception as error:
+            self.logger.warn(
+                "Could not destroy peering connection '%s'. Error was: %s",
+                vpc_peering_connection.id, error)
+            return False
+
+        return routes_deleted
+
+    @staticmethod
+    def __peer_vpc_info_for(vpc_peering_connection, vpc_id):
+        if vpc_peering_connection.requester_vpc_info['VpcId'] == vpc_id:
+            return vpc_peering_connection.accepter_vpc_info
+        return vpc_peering_connection.requester_vpc_info
+
+    def destroy_for(self, account_id, vpc_id):
+        vpc_peering_connections = self.__find_for(account_id, vpc_id)
+        self.logger.info(
+            "Found %d peering connections for VPC with ID: '%s'.",
+            len(vpc_peering_connections), vpc_id)
+
+        # Only connections with peers this lambda could have linked the VPC
+        # to, in the search accounts and regions and tagged as components,
+        # are destroyed. Others were not created by it and are left alone.
+        managed_vpc_ids = self.__managed_among(
+            self.__peer_vpc_info_for(vpc_peering_connection, vpc_id)
+            for vpc_peering_connection in vpc_peering_connections)
+        managed_vpc_peering_connections = []
+        for vpc_peering_connection in vpc_peering_connections:
+            peer_vpc_id = self.__peer_vpc_info_for(
+                vpc_peering_connection, vpc_id)['VpcId']
+            if peer_vpc_id in managed_vpc_ids:
+                managed_vpc_peering_connections.append(vpc_peering_connection)
+            else:
+                self.logger.info(
+                    "Leaving peering connection '%s' with unmanaged VPC "
+                    "'%s'.", vpc_peering_connection.id, peer_vpc_id)
+
+        destroyed = map_concurrently(
+            self.__destroy, managed_vpc_peering_connections, self.max_workers)
+
+        return [
+            vpc_peering_connection.id
+            for vpc_peering_connection, succeeded
+            in zip(managed_vpc_peering_connections, destroyed)
+            if succeeded
+        ], [
+            vpc_peering_connection.id
+            for vpc_peering_connection, succeeded
+            in zip(managed_vpc_peering_connections, destroyed)
+            if not succeeded
+        ]
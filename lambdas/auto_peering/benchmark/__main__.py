@@ -0,0 +1,398 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import boto3
+
+from benchmark import cassettes, load
+from benchmark.fake_aws import ANY_REGION, lognormal_latency
+from benchmark.fleets import FleetSpec
+from benchmark.scenarios import (
+    SCENARIOS, Environment, environment_variables, load_handler,
+    preserved_handler_state)
+
+DEFAULT_VPC_COUNTS = '1000,10000,50000'
+DEFAULT_SCENARIOS = 'discovery,resolution,handler'
+# Only the lambda's own configuration is recorded, never credentials.
+CONFIGURATION_VARIABLES = [
+    'AWS_REGION',
+    'AWS_SEARCH_REGIONS',
+    'AWS_SEARCH_PARALLELISM',
+    'AWS_SEARCH_ACCOUNTS',
+    'AWS_PEERING_ROLE_NAME',
+    'AWS_DISCOVERY_MODE',
+    'AWS_VPC_INVENTORY_TTL',
+    'AWS_SESSION_CACHE_SIZE',
+    'AWS_ROUTE_MODE',
+    'AWS_LINK_PARALLELISM',
+    'AWS_LINK_PARALLELISM_PER_ACCOUNT',
+    'AWS_PROVISIONING_MODE',
+    'AWS_DESTROY_MODE',
+]
+
+
+def integers(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def names(value):
+    unknown = [part for part in value.split(',') if part not in SCENARIOS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            "Unknown scenarios: {}.".format(', '.join(unknown)))
+    return value.split(',')
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def fake_aws_options_for(simulation):
+    options = {
+        'seed': simulation['seed'],
+        'consistency_delay_seconds': simulation['consistency_delay_seconds'],
+    }
+    if simulation['latency_ms']:
+        options['latencies'] = {
+            ANY_REGION: lognormal_latency(simulation['latency_ms'] / 1000.0)}
+    if simulation['throttling_rate']:
+        options['throttling_rates'] = {
+            ANY_REGION: simulation['throttling_rate']}
+    return options
+
+
+def simulation_for(arguments):
+    return {
+        'latency_ms': arguments.latency_ms,
+        'throttling_rate': arguments.throttling_rate,
+        'consistency_delay_seconds': arguments.consistency_delay_seconds,
+        'seed': arguments.seed,
+    }
+
+
+def baseline_spec_for(spec):
+    return FleetSpec(
+        spec.fan_out + 1,
+        accounts=spec.accounts,
+        regions=spec.regions,
+        fan_out=spec.fan_out,
+        private_route_tables=spec.private_route_tables,
+        seed=spec.seed)
+
+
+def peak_memory_bytes_of(scenario, environment):
+    tracemalloc.start()
+    try:
+        scenario(environment)
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_memory_bytes
+
+
+def measure(scenario_name, spec, repeat, search_parallelism, simulation):
+    scenario = SCENARIOS[scenario_name]
+    fake_aws_options = fake_aws_options_for(simulation)
+
+    wall_seconds = []
+    for _ in range(repeat):
+        environment = Environment(
+            spec, search_parallelism, fake_aws_options)
+        started_at = time.perf_counter()
+        scenario(environment)
+        wall_seconds.append(time.perf_counter() - started_at)
+
+    # Peak memory is dominated by loading botocore's service models for
+    # each session, so it is also reported over that of the smallest fleet
+    # with the same accounts and regions.
+    baseline_peak_memory_bytes = peak_memory_bytes_of(
+        scenario,
+        Environment(
+            baseline_spec_for(spec), search_parallelism, fake_aws_options))
+    environment = Environment(spec, search_parallelism, fake_aws_options)
+    peak_memory_bytes = peak_memory_bytes_of(scenario, environment)
+
+    api_calls = environment.fake_aws.call_counts()
+    return {
+        'scenario': scenario_name,
+        'fleet': spec._to_dict(),
+        'search_parallelism': search_parallelism,
+        'simulation': simulation,
+        'wall_seconds': round(min(wall_seconds), 4),
+        'wall_seconds_all': [round(value, 4) for value in wall_seconds],
+        'peak_memory_bytes': peak_memory_bytes,
+        'baseline_peak_memory_bytes': baseline_peak_memory_bytes,
+        'peak_memory_delta_bytes':
+            peak_memory_bytes - baseline_peak_memory_bytes,
+        'api_calls': dict(sorted(api_calls.items())),
+        'api_calls_total': sum(api_calls.values()),
+        'throttled_calls': sum(
+            environment.fake_aws.throttle_counts().values()),
+    }
+
+
+def metadata():
+    return {
+        'commit': commit(),
+        'created_at': datetime.datetime.now(datetime.timezone.utc)
+        .isoformat(),
+        'python': platform.python_version(),
+        'boto3': boto3.__version__,
+    }
+
+
+def write(results, output):
+    with open(output, 'w') as file:
+        json.dump({'metadata': metadata(), 'results': results}, file,
+                  indent=2)
+
+
+def run(arguments):
+    results = []
+    for vpcs in arguments.vpcs:
+        spec = FleetSpec(
+            vpcs,
+            accounts=arguments.accounts,
+            regions=arguments.regions,
+            fan_out=arguments.fan_out,
+            private_route_tables=arguments.private_route_tables,
+            seed=arguments.seed)
+        for scenario_name in arguments.scenarios:
+            result = measure(
+                scenario_name, spec, arguments.repeat,
+                arguments.search_parallelism,
+                simulation_for(arguments))
+            print("{:<20} {:>7} VPCs {:>9.3f}s {:>12} bytes {:>7} calls"
+                  .format(scenario_name, vpcs, result['wall_seconds'],
+                          result['peak_memory_delta_bytes'],
+                          result['api_calls_total']),
+                  file=sys.stderr)
+            results.append(result)
+
+    write(results, arguments.output)
+
+
+def load_event(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def record(arguments):
+    event = load_event(arguments.event)
+    recorder = cassettes.Recorder(anonymiser=cassettes.Anonymiser(
+        cidrs=arguments.anonymise_cidrs))
+
+    with preserved_handler_state():
+        handler = load_handler(recorder, None)
+        handler.peer_vpcs_for(event, None)
+
+    recorder.save(
+        arguments.cassette, event=event,
+        environment={name: os.environ[name]
+                     for name in CONFIGURATION_VARIABLES
+                     if name in os.environ})
+    print("Recorded {} calls to {}.".format(
+        len(recorder.interactions), arguments.cassette), file=sys.stderr)
+
+
+def replay(arguments):
+    # Identifiers in cassettes are anonymised, so the handler is run for
+    # the recorded event and configuration unless others are given.
+    header = cassettes.load_header(arguments.cassette)
+    event = load_event(arguments.event) if arguments.event \
+        else header['event']
+
+    wall_seconds = []
+    for _ in range(arguments.repeat):
+        player = cassettes.Player(
+            cassettes.load(arguments.cassette),
+            time_scale=arguments.time_scale)
+        with contextlib.redirect_stdout(io.StringIO()), \
+                environment_variables(header['environment']), \
+                preserved_handler_state():
+            handler = load_handler(player, None)
+            started_at = time.perf_counter()
+            handler.peer_vpcs_for(event, None)
+            wall_seconds.append(time.perf_counter() - started_at)
+
+    result = {
+        'scenario': 'replay',
+        'cassette': arguments.cassette,
+        'time_scale': arguments.time_scale,
+        'wall_seconds': round(min(wall_seconds), 4),
+        'wall_seconds_all': [round(value, 4) for value in wall_seconds],
+        'api_calls_total': player.replayed,
+    }
+    print("{:<20} {:>9.3f}s {:>7} calls".format(
+        'replay', result['wall_seconds'], result['api_calls_total']),
+        file=sys.stderr)
+    write([result], arguments.output)
+
+
+def load_test(arguments):
+    spec = FleetSpec(
+        arguments.vpcs,
+        accounts=arguments.accounts,
+        regions=arguments.regions,
+        fan_out=arguments.fan_out,
+        private_route_tables=arguments.private_route_tables,
+        seed=arguments.seed)
+    simulation = simulation_for(arguments)
+    environment = Environment(
+        spec, arguments.search_parallelism,
+        fake_aws_options_for(simulation))
+
+    if arguments.events:
+        events = load.remapped(
+            load.read_events(arguments.events),
+            environment.fake_aws, environment.fleet)
+    else:
+        events = load.synthetic_events(
+            environment.fleet, arguments.event_count,
+            destroy_ratio=arguments.destroy_ratio, seed=arguments.seed)
+
+    result = dict(
+        load.LoadRun(
+            environment, events,
+            rate=arguments.rate,
+            concurrency=arguments.concurrency).run(),
+        scenario='load',
+        fleet=spec._to_dict(),
+        search_parallelism=arguments.search_parallelism,
+        simulation=simulation,
+        wall_seconds=None)
+    result['wall_seconds'] = result['duration_seconds']
+
+    latency = result['latency_seconds'] or {}
+    print("{:<20} {:>7} events {:>9.1f}/min p50 {}s p95 {}s p99 {}s "
+          "{} errors {} logged errors".format(
+              'load', result['events'], result['events_per_minute'] or 0,
+              latency.get('p50'), latency.get('p95'), latency.get('p99'),
+              result['errors'], result['logged_errors']),
+          file=sys.stderr)
+    write([result], arguments.output)
+
+
+def key_for(result):
+    return (result['scenario'],
+            json.dumps(result.get('fleet'), sort_keys=True),
+            result.get('cassette'),
+            result.get('search_parallelism'),
+            json.dumps(result.get('simulation'), sort_keys=True))
+
+
+def change(baseline, candidate):
+    if not baseline or candidate is None:
+        return 'n/a'
+    return '{:+.1f}%'.format((candidate - baseline) * 100.0 / baseline)
+
+
+def compare(arguments):
+    with open(arguments.baseline) as file:
+        baseline = {key_for(result): result
+                    for result in json.load(file)['results']}
+    with open(arguments.candidate) as file:
+        candidates = json.load(file)['results']
+
+    print("{:<20} {:>7} {:>10} {:>10} {:>10}".format(
+        'scenario', 'vpcs', 'wall', 'memory', 'calls'))
+    for candidate in candidates:
+        result = baseline.get(key_for(candidate))
+        if result is None:
+            continue
+        print("{:<20} {:>7} {:>10} {:>10} {:>10}".format(
+            candidate['scenario'],
+            (candidate.get('fleet') or {}).get('vpcs', '-'),
+            change(result['wall_seconds'], candidate['wall_seconds']),
+            change(result.get('peak_memory_delta_bytes'),
+                   candidate.get('peak_memory_delta_bytes')),
+            change(result['api_calls_total'],
+                   candidate['api_calls_total'])))
+
+
+def add_fleet_arguments(argument_parser):
+    argument_parser.add_argument('--accounts', type=int, default=4)
+    argument_parser.add_argument('--regions', type=int, default=2)
+    argument_parser.add_argument('--fan-out', type=int, default=4)
+    argument_parser.add_argument(
+        '--private-route-tables', type=int, default=1)
+    argument_parser.add_argument(
+        '--search-parallelism', type=int, default=1)
+    argument_parser.add_argument('--seed', type=int, default=0)
+
+
+def add_simulation_arguments(argument_parser):
+    argument_parser.add_argument('--latency-ms', type=float, default=0)
+    argument_parser.add_argument('--throttling-rate', type=float, default=0)
+    argument_parser.add_argument(
+        '--consistency-delay-seconds', type=float, default=0)
+
+
+def parser():
+    argument_parser = argparse.ArgumentParser(
+        prog='python -m benchmark',
+        description='Benchmark the auto peering lambda against synthetic '
+                    'fleets served by an in-memory EC2 and STS.')
+    subparsers = argument_parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument(
+        '--vpcs', type=integers, default=integers(DEFAULT_VPC_COUNTS))
+    add_fleet_arguments(run_parser)
+    add_simulation_arguments(run_parser)
+    run_parser.add_argument(
+        '--scenarios', type=names, default=names(DEFAULT_SCENARIOS))
+    run_parser.add_argument('--repeat', type=int, default=1)
+    run_parser.add_argument('--output', default='benchmark-results.json')
+    run_parser.set_defaults(function=run)
+
+    load_parser = subparsers.add_parser('load')
+    load_parser.add_argument('--vpcs', type=int, default=1000)
+    add_fleet_arguments(load_parser)
+    add_simulation_arguments(load_parser)
+    load_parser.add_argument('--events')
+    load_parser.add_argument('--event-count', type=int, default=100)
+    load_parser.add_argument('--destroy-ratio', type=float, default=0.0)
+    load_parser.add_argument('--rate', type=float, default=0.0)
+    load_parser.add_argument('--concurrency', type=int, default=1)
+    load_parser.add_argument('--output', default='load-results.json')
+    load_parser.set_defaults(function=load_test)
+
+    record_parser = subparsers.add_parser('record')
+    record_parser.add_argument('--event', required=True)
+    record_parser.add_argument('--cassette', required=True)
+    record_parser.add_argument('--anonymise-cidrs', action='store_true')
+    record_parser.set_defaults(function=record)
+
+    replay_parser = subparsers.add_parser('replay')
+    replay_parser.add_argument('--event')
+    replay_parser.add_argument('--cassette', required=True)
+    replay_parser.add_argument('--time-scale', type=float, default=1.0)
+    replay_parser.add_argument('--repeat', type=int, default=1)
+    replay_parser.add_argument('--output', default='replay-results.json')
+    replay_parser.set_defaults(function=replay)
+
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.set_defaults(function=compare)
+
+    return argument_parser
+
+
+if __name__ == '__main__':
+    parsed_arguments = parser().parse_args()
+    parsed_arguments.function(parsed_arguments)
@@ -0,0 +1,268 @@
+import copy
+import datetime
+import gzip
+import ipaddress
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from botocore.awsrequest import AWSResponse
+
+VERSION = 1
+PARAMS = 'cassette_params'
+STARTED_AT = 'cassette_started_at'
+REPLAY_URL = 'https://cassette.invalid/'
+SECRETS = ['Credentials']
+REPLAYED_CREDENTIALS = {
+    'AccessKeyId': 'ASIAREPLAYEDACCESSKEY',
+    'SecretAccessKey': 'replayed-secret-access-key',
+    'SessionToken': 'replayed-session-token',
+}
+REPLAYED_CREDENTIALS_LIFETIME = datetime.timedelta(hours=1)
+
+IDENTIFIER = re.compile(
+    r'\b(?P<resource>(?:vpc|pcx)-[0-9a-f]{8,17})\b'
+    r'|(?<![0-9A-Za-z-])(?P<account>\d{12})(?![0-9A-Za-z])')
+CIDR = re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}/\d{1,2}\b')
+ANONYMOUS_NETWORK = ipaddress.ip_network('10.0.0.0/8')
+
+
+class UnrecordedRequestError(Exception):
+    pass
+
+
+def encode(value):
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(
+        "Object of type '{}' cannot be recorded.".format(
+            type(value).__name__))
+
+
+def decoder_for(offset):
+    def decode(value):
+        if set(value) == {'__datetime__'}:
+            return datetime.datetime.fromisoformat(
+                value['__datetime__']) + offset
+        return value
+
+    return decode
+
+
+def key_for(account_id, region, operation_name, params):
+    return (account_id, region, operation_name,
+            json.dumps(params, sort_keys=True, default=encode))
+
+
+def open_cassette(path, mode):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't')
+    return open(path, mode)
+
+
+def now_utc():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def metadata_in(parsed):
+    metadata = parsed.get('ResponseMetadata', {})
+    return {name: metadata[name]
+            for name in ['HTTPStatusCode', 'RetryAttempts']
+            if name in metadata}
+
+
+class Anonymiser(object):
+    def __init__(self, cidrs=False):
+        self.cidrs = cidrs
+        self.identifiers = {}
+        self.networks = {}
+        self.counters = {}
+        self.next_address = int(ANONYMOUS_NETWORK.network_address)
+
+    def anonymise(self, value):
+        if isinstance(value, str):
+            value = IDENTIFIER.sub(self.__identifier, value)
+            if self.cidrs:
+                value = CIDR.sub(self.__network, value)
+            return value
+        if isinstance(value, dict):
+            return {name: self.anonymise(item)
+                    for name, item in value.items()}
+        if isinstance(value, list):
+            return [self.anonymise(item) for item in value]
+        return value
+
+    def __identifier(self, match):
+        identifier = match.group(0)
+        if identifier not in self.identifiers:
+            kind = identifier.split('-')[0] \
+                if match.group('resource') else 'account'
+            number = next(self.counters.setdefault(kind, itertools.count(1)))
+            self.identifiers[identifier] = \
+                '{:012d}'.format(number) if kind == 'account' \
+                else '{}-a{:016x}'.format(kind, number)
+        return self.identifiers[identifier]
+
+    def __network(self, match):
+        cidr = match.group(0)
+        try:
+            network = ipaddress.ip_network(cidr, strict=False)
+        except ValueError:
+            return cidr
+        if network.prefixlen < ANONYMOUS_NETWORK.prefixlen:
+            return cidr
+        if cidr not in self.networks:
+            # Networks are allocated in turn, each aligned to its own size,
+            # so that distinct networks never overlap once anonymised.
+            size = network.num_addresses
+            address = -(-self.next_address // size) * size
+            self.next_address = address + size
+            self.networks[cidr] = str(ipaddress.ip_network(
+                (address, network.prefixlen)))
+        return self.networks[cidr]
+
+
+class Recorder(object):
+    def __init__(self, clock=time.perf_counter, now=now_utc,
+                 anonymiser=None):
+        self.clock = clock
+        self.anonymiser = anonymiser or Anonymiser()
+        self.recorded_at = now()
+        self.interactions = []
+        self.lock = threading.Lock()
+
+    def register(self, events, account_id):
+        events.register(
+            'before-parameter-build', self.__before_parameter_build)
+        events.register('before-call', self.__before_call)
+        events.register('after-call', self.__after_call(account_id))
+
+    def __before_parameter_build(self, params, context, **_):
+        context[PARAMS] = copy.deepcopy(params)
+
+    def __before_call(self, context, **_):
+        context[STARTED_AT] = self.clock()
+
+    def __after_call(self, account_id):
+        def handler(http_response, parsed, model, context, **_):
+            started_at = context.pop(STARTED_AT, None)
+            if started_at is None:
+                return
+
+            # Secrets, such as assumed role credentials, are never recorded
+            # and are replaced with fakes on replay.
+            response = {name: value for name, value in parsed.items()
+                        if name not in SECRETS}
+            response['ResponseMetadata'] = metadata_in(parsed)
+            with self.lock:
+                self.interactions.append({
+                    'account_id': account_id,
+                    'region': context.get('client_region'),
+                    'operation': model.name,
+                    'params': context.get(PARAMS, {}),
+                    'status_code': http_response.status_code,
+                    'latency_seconds': round(
+                        self.clock() - started_at, 6),
+                    'response': copy.deepcopy(response),
+                })
+
+        return handler
+
+    def save(self, path, event=None, environment=None):
+        with self.lock, open_cassette(path, 'w') as file:
+            file.write(json.dumps({
+                'version': VERSION,
+                'recorded_at': self.recorded_at.isoformat(),
+                'event': self.anonymiser.anonymise(event),
+                'environment': self.anonymiser.anonymise(environment or {}),
+            }) + '\n')
+            for interaction in self.interactions:
+                file.write(json.dumps(
+                    self.anonymiser.anonymise(interaction),
+                    separators=(',', ':'), default=encode) + '\n')
+
+
+def header_of(file):
+    header = json.loads(file.readline())
+    if header.get('version') != VERSION:
+        raise ValueError(
+            "Unsupported cassette version '{}'.".format(
+                header.get('version')))
+    return header
+
+
+def load_header(path):
+    with open_cassette(path, 'r') as file:
+        return header_of(file)
+
+
+def load(path, now=now_utc):
+    with open_cassette(path, 'r') as file:
+        header = header_of(file)
+        offset = now() - datetime.datetime.fromisoformat(
+            header['recorded_at'])
+        return [json.loads(line, object_hook=decoder_for(offset))
+                for line in file if line.strip()]
+
+
+class Player(object):
+    def __init__(self, interactions, time_scale=1.0, sleep=time.sleep,
+                 now=now_utc):
+        self.time_scale = time_scale
+        self.sleep = sleep
+        self.now = now
+        self.interactions = {}
+        self.lock = threading.Lock()
+        self.replayed = 0
+        for interaction in interactions:
+            self.interactions.setdefault(
+                key_for(interaction['account_id'], interaction['region'],
+                        interaction['operation'], interaction['params']),
+                deque()).append(interaction)
+
+    def register(self, events, account_id):
+        events.register(
+            'before-parameter-build', self.__before_parameter_build)
+        events.register_last('before-call', self.__before_call(account_id))
+
+    def __before_parameter_build(self, params, context, **_):
+        context[PARAMS] = copy.deepcopy(params)
+
+    def __next_interaction_for(self, key):
+        with self.lock:
+            interactions = self.interactions.get(key)
+            if not interactions:
+                raise UnrecordedRequestError(
+                    "No recorded response for {} in account '{}' and "
+                    "region '{}' with parameters {}.".format(
+                        key[2], key[0], key[1], key[3]))
+            self.replayed += 1
+            if len(interactions) > 1:
+                return interactions.popleft()
+            return interactions[0]
+
+    def __before_call(self, account_id):
+        def handler(model, context, **_):
+            interaction = self.__next_interaction_for(key_for(
+                account_id, context.get('client_region'), model.name,
+                context.get(PARAMS, {})))
+
+            if self.time_scale:
+                self.sleep(interaction['latency_seconds'] * self.time_scale)
+
+            response = copy.deepcopy(interaction['response'])
+            if interaction['operation'] == 'AssumeRole' and \
+                    interaction['status_code'] == 200:
+                response['Credentials'] = dict(
+                    REPLAYED_CREDENTIALS,
+                    Expiration=self.now() + REPLAYED_CREDENTIALS_LIFETIME)
+
+            return (
+                AWSResponse(
+                    REPLAY_URL, interaction['status_code'], {}, None),
+                response)
+
+        return handler
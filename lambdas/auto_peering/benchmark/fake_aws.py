@@ -0,0 +1,613 @@
+import copy
+import datetime
+import fnmatch
+import itertools
+import math
+import random
+import threading
+import time
+from collections import Counter
+
+from botocore.awsrequest import AWSResponse
+
+STS_OPERATIONS = ['AssumeRole', 'GetCallerIdentity']
+LIVE_VPC_PEERING_CONNECTION_STATUS_CODES = [
+    'initiating-request', 'pending-acceptance', 'provisioning', 'active']
+ANY_REGION = '*'
+
+
+def fixed_latency(seconds):
+    return lambda generator: seconds
+
+
+def uniform_latency(minimum_seconds, maximum_seconds):
+    return lambda generator: generator.uniform(
+        minimum_seconds, maximum_seconds)
+
+
+def lognormal_latency(median_seconds, sigma=0.5):
+    return lambda generator: generator.lognormvariate(
+        math.log(median_seconds), sigma)
+
+
+def for_region(values_by_region, region, default=None):
+    return values_by_region.get(
+        region, values_by_region.get(ANY_REGION, default))
+
+
+class TokenBucket(object):
+    def __init__(self, rate_per_second, burst, now):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now):
+        self.tokens = min(
+            self.burst,
+            self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class FakeAWSError(Exception):
+    def __init__(self, code, message, status_code=400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class FakeRawResponse(object):
+    def __init__(self, body):
+        self.body = body
+
+    def stream(self, **_):
+        yield self.body
+
+
+def body_for(operation_name):
+    return '<{0}Response><{0}Result/></{0}Response>'\
+        .format(operation_name).encode()
+
+
+def error_body_for(operation_name, error):
+    if operation_name in STS_OPERATIONS:
+        template = '<ErrorResponse><Error><Code>{}</Code>' \
+                   '<Message>{}</Message></Error></ErrorResponse>'
+    else:
+        template = '<Response><Errors><Error><Code>{}</Code>' \
+                   '<Message>{}</Message></Error></Errors></Response>'
+    return template.format(error.code, error.message).encode()
+
+
+def tag_value(resource, key):
+    return next(
+        (tag['Value'] for tag in resource.get('Tags', [])
+         if tag['Key'] == key),
+        None)
+
+
+def matches(values, patterns):
+    return any(
+        fnmatch.fnmatchcase(value, pattern)
+        for value in values
+        if value is not None
+        for pattern in patterns)
+
+
+def vpc_values_for(vpc, name):
+    if name.startswith('tag:'):
+        return [tag_value(vpc, name[4:])]
+    if name == 'vpc-id':
+        return [vpc['VpcId']]
+    if name == 'owner-id':
+        return [vpc['OwnerId']]
+    if name in ['cidr', 'cidr-block-association.cidr-block']:
+        return [vpc['CidrBlock']]
+    raise FakeAWSError(
+        'InvalidParameterValue', "Unsupported filter '{}'.".format(name))
+
+
+def vpc_peering_connection_values_for(vpc_peering_connection, name):
+    if name.startswith('tag:'):
+        return [tag_value(vpc_peering_connection, name[4:])]
+    if name == 'vpc-peering-connection-id':
+        return [vpc_peering_connection['VpcPeeringConnectionId']]
+    if name == 'status-code':
+        return [vpc_peering_connection['Status']['Code']]
+    for side, info in [('requester-vpc-info', 'RequesterVpcInfo'),
+                       ('accepter-vpc-info', 'AccepterVpcInfo')]:
+        if name == side + '.vpc-id':
+            return [vpc_peering_connection[info]['VpcId']]
+        if name == side + '.owner-id':
+            return [vpc_peering_connection[info]['OwnerId']]
+    raise FakeAWSError(
+        'InvalidParameterValue', "Unsupported filter '{}'.".format(name))
+
+
+def route_table_values_for(route_table, name):
+    if name.startswith('tag:'):
+        return [tag_value(route_table, name[4:])]
+    if name == 'vpc-id':
+        return [route_table['VpcId']]
+    if name == 'route-table-id':
+        return [route_table['RouteTableId']]
+    if name == 'route.vpc-peering-connection-id':
+        return [route.get('VpcPeeringConnectionId')
+                for route in route_table['Routes']]
+    if name == 'route.destination-cidr-block':
+        return [route.get('DestinationCidrBlock')
+                for route in route_table['Routes']]
+    raise FakeAWSError(
+        'InvalidParameterValue', "Unsupported filter '{}'.".format(name))
+
+
+def filtered(resources, filters, values_for):
+    return [
+        resource
+        for resource in resources
+        if all(matches(values_for(resource, filter['Name']),
+                       filter['Values'])
+               for filter in filters or [])
+    ]
+
+
+def paginated(key, resources, params):
+    start = int(params.get('NextToken') or 0)
+    maximum_results = params.get('MaxResults')
+    end = len(resources) if maximum_results is None \
+        else start + maximum_results
+    page = {key: copy.deepcopy(resources[start:end])}
+    if end < len(resources):
+        page['NextToken'] = str(end)
+    return page
+
+
+class FakeAWS(object):
+    def __init__(self, latencies=None, throttling_rates=None,
+                 request_limits=None, consistency_delay_seconds=0,
+                 seed=0, clock=time.monotonic, sleep=time.sleep):
+        self.latencies = latencies or {}
+        self.throttling_rates = throttling_rates or {}
+        self.request_limits = request_limits or {}
+        self.consistency_delay_seconds = consistency_delay_seconds
+        self.generator = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.vpcs = {}
+        self.vpc_ids_by_location = {}
+        self.vpc_peering_connections = {}
+        self.route_tables = {}
+        self.route_table_ids_by_vpc_id = {}
+        self.visible_at = {}
+        self.status_changes = {}
+        self.token_buckets = {}
+        self.calls = []
+        self.throttled_calls = []
+        self.ids = itertools.count(1)
+        self.lock = threading.RLock()
+        self.current = threading.local()
+        self.operations = {
+            'DescribeVpcs': self.__describe_vpcs,
+            'DescribeVpcPeeringConnections':
+                self.__describe_vpc_peering_connections,
+            'CreateVpcPeeringConnection':
+                self.__create_vpc_peering_connection,
+            'AcceptVpcPeeringConnection':
+                self.__accept_vpc_peering_connection,
+            'DeleteVpcPeeringConnection':
+                self.__delete_vpc_peering_connection,
+            'DescribeRouteTables': self.__describe_route_tables,
+            'CreateRoute': self.__create_route,
+            'DeleteRoute': self.__delete_route,
+            'AssumeRole': self.__assume_role,
+            'GetCallerIdentity': self.__get_caller_identity,
+        }
+
+    def __id_for(self, prefix):
+        return '{}-{:017x}'.format(prefix, next(self.ids))
+
+    def add_vpc(self, account_id, region, cidr_block, tags=(),
+                private_route_tables=1):
+        with self.lock:
+            vpc_id = self.__id_for('vpc')
+            self.vpcs[vpc_id] = {
+                'VpcId': vpc_id,
+                'OwnerId': account_id,
+                'CidrBlock': cidr_block,
+                'State': 'available',
+                'Tags': list(tags),
+                'Region': region,
+            }
+            self.vpc_ids_by_location.setdefault(
+                (account_id, region), []).append(vpc_id)
+            for _ in range(private_route_tables):
+                route_table_id = self.__id_for('rtb')
+                self.route_tables[route_table_id] = {
+                    'RouteTableId': route_table_id,
+                    'VpcId': vpc_id,
+                    'OwnerId': account_id,
+                    'Routes': [{'DestinationCidrBlock': cidr_block,
+                                'GatewayId': 'local',
+                                'Origin': 'CreateRouteTable',
+                                'State': 'active'}],
+                    'Tags': [{'Key': 'Tier', 'Value': 'private'}],
+                    'Associations': [],
+                }
+                self.route_table_ids_by_vpc_id.setdefault(
+                    vpc_id, []).append(route_table_id)
+            return vpc_id
+
+    def call_counts(self):
+        with self.lock:
+            return dict(Counter(
+                operation_name for _, _, operation_name in self.calls))
+
+    def throttle_counts(self):
+        with self.lock:
+            return dict(Counter(
+                operation_name
+                for _, _, operation_name in self.throttled_calls))
+
+    def routes_in(self, vpc_id):
+        with self.lock:
+            return [
+                copy.deepcopy(route)
+                for route_table_id
+                in self.route_table_ids_by_vpc_id.get(vpc_id, [])
+                for route in self.route_tables[route_table_id]['Routes']
+            ]
+
+    def register(self, events, account_id):
+        events.register(
+            'before-parameter-build', self.__before_parameter_build(
+                account_id))
+        events.register('before-send', self.__before_send)
+        events.register('before-parse', self.__before_parse)
+
+        return events
+
+    def __before_parameter_build(self, account_id):
+        def handler(params, model, context, **_):
+            self.current.call = (
+                account_id,
+                context.get('client_region'),
+                model.name,
+                copy.deepcopy(params))
+
+        return handler
+
+    def __is_throttled(self, account_id, region, operation_name):
+        throttling_rate = for_region(self.throttling_rates, region, 0)
+        if throttling_rate and self.generator.random() < throttling_rate:
+            return True
+
+        request_limit = for_region(self.request_limits, region)
+        if request_limit is None:
+            return False
+        key = (account_id, region, operation_name)
+        if key not in self.token_buckets:
+            self.token_buckets[key] = TokenBucket(
+                *request_limit, now=self.clock())
+        return not self.token_buckets[key].take(self.clock())
+
+    def __before_send(self, request, **_):
+        call = account_id, region, operation_name, params = self.current.call
+        with self.lock:
+            self.calls.append(call[:3])
+            latency = for_region(self.latencies, region)
+            latency_seconds = latency(self.generator) if latency else 0
+            throttled = self.__is_throttled(account_id, region, operation_name)
+            if throttled:
+                self.throttled_calls.append(call[:3])
+
+        if latency_seconds > 0:
+            self.sleep(latency_seconds)
+
+        try:
+            if throttled:
+                raise FakeAWSError(
+                    'RequestLimitExceeded', 'Request limit exceeded.', 503)
+            operation = self.operations.get(operation_name)
+            if operation is None:
+                raise FakeAWSError(
+                    'UnsupportedOperation',
+                    "Operation '{}' is not supported.".format(
+                        operation_name))
+            with self.lock:
+                self.current.result = operation(account_id, region, params)
+        except FakeAWSError as error:
+            self.current.result = None
+            return AWSResponse(
+                request.url, error.status_code, {},
+                FakeRawResponse(error_body_for(operation_name, error)))
+
+        return AWSResponse(
+            request.url, 200, {}, FakeRawResponse(body_for(operation_name)))
+
+    def __before_parse(self, customized_response_dict, **_):
+        if self.current.result is not None:
+            customized_response_dict.update(self.current.result)
+
+    def __propagate(self, key):
+        if self.consistency_delay_seconds:
+            self.visible_at[key] = \
+                self.clock() + self.consistency_delay_seconds
+
+    def __is_visible(self, key):
+        visible_at = self.visible_at.get(key)
+        return visible_at is None or visible_at <= self.clock()
+
+    def __change_status(self, vpc_peering_connection, status):
+        if self.consistency_delay_seconds:
+            self.status_changes.setdefault(
+                vpc_peering_connection['VpcPeeringConnectionId'],
+                [(float('-inf'), vpc_peering_connection['Status'])]).append(
+                (self.clock() + self.consistency_delay_seconds, status))
+        vpc_peering_connection['Status'] = status
+
+    def __observed_vpc_peering_connection(self, vpc_peering_connection):
+        now = self.clock()
+        status_changes = self.status_changes.get(
+            vpc_peering_connection['VpcPeeringConnectionId'], [])
+        visible_statuses = [
+            status for changed_at, status in status_changes
+            if changed_at <= now]
+        if not visible_statuses:
+            return vpc_peering_connection
+        return dict(vpc_peering_connection, Status=visible_statuses[-1])
+
+    def __observed_route_table(self, route_table):
+        return dict(route_table, Routes=[
+            route for route in route_table['Routes']
+            if self.__is_visible(
+                (route_table['RouteTableId'],
+                 route.get('DestinationCidrBlock')))
+        ])
+
+    def __visible_vpc_peering_connections(self, account_id, region):
+        return [
+            vpc_peering_connection
+            for vpc_peering_connection in self.vpc_peering_connections.values()
+            if self.__is_visible(
+                vpc_peering_connection['VpcPeeringConnectionId']) and any(
+                vpc_peering_connection[info]['OwnerId'] == account_id and
+                vpc_peering_connection[info]['Region'] == region
+                for info in ['RequesterVpcInfo', 'AccepterVpcInfo'])
+        ]
+
+    def __vpc_peering_connection_for(self, account_id, region, params):
+        vpc_peering_connection_id = params['VpcPeeringConnectionId']
+        vpc_peering_connection = next(
+            (vpc_peering_connection
+             for vpc_peering_connection
+             in self.__visible_vpc_peering_connections(account_id, region)
+             if vpc_peering_connection['VpcPeeringConnectionId'] ==
+             vpc_peering_connection_id),
+            None)
+        if vpc_peering_connection is None:
+            raise FakeAWSError(
+                'InvalidVpcPeeringConnectionID.NotFound',
+                "The vpcPeeringConnection ID '{}' does not exist".format(
+                    vpc_peering_connection_id))
+        return vpc_peering_connection
+
+    def __route_table_for(self, account_id, params):
+        route_table = self.route_tables.get(params['RouteTableId'])
+        if route_table is None or route_table['OwnerId'] != account_id:
+            raise FakeAWSError(
+                'InvalidRouteTableID.NotFound',
+                "The routeTable ID '{}' does not exist".format(
+                    params['RouteTableId']))
+        return route_table
+
+    def __describe_vpcs(self, account_id, region, params):
+        vpcs = [
+            self.vpcs[vpc_id]
+            for vpc_id
+            in self.vpc_ids_by_location.get((account_id, region), [])
+        ]
+        if params.get('VpcIds'):
+            missing_vpc_ids = set(params['VpcIds']) - {
+                vpc['VpcId'] for vpc in vpcs}
+            if missing_vpc_ids:
+                raise FakeAWSError(
+                    'InvalidVpcID.NotFound',
+                    "The vpc ID '{}' does not exist".format(
+                        sorted(missing_vpc_ids)[0]))
+            vpcs = [vpc for vpc in vpcs if vpc['VpcId'] in params['VpcIds']]
+
+        return paginated(
+            'Vpcs',
+            filtered(vpcs, params.get('Filters'), vpc_values_for),
+            params)
+
+    def __describe_vpc_peering_connections(self, account_id, region, params):
+        vpc_peering_connections = self.__visible_vpc_peering_connections(
+            account_id, region)
+        if params.get('VpcPeeringConnectionIds'):
+            vpc_peering_connections = [
+                self.__vpc_peering_connection_for(
+                    account_id, region,
+                    {'VpcPeeringConnectionId': vpc_peering_connection_id})
+                for vpc_peering_connection_id
+                in params['VpcPeeringConnectionIds']
+            ]
+        vpc_peering_connections = [
+            self.__observed_vpc_peering_connection(vpc_peering_connection)
+            for vpc_peering_connection in vpc_peering_connections
+        ]
+
+        return paginated(
+            'VpcPeeringConnections',
+            filtered(vpc_peering_connections, params.get('Filters'),
+                     vpc_peering_connection_values_for),
+            params)
+
+    def __create_vpc_peering_connection(self, account_id, region, params):
+        requester_vpc = self.vpcs.get(params['VpcId'])
+        peer_owner_id = params.get('PeerOwnerId') or account_id
+        peer_region = params.get('PeerRegion') or region
+        accepter_vpc = self.vpcs.get(params['PeerVpcId'])
+        if requester_vpc is None or \
+                requester_vpc['OwnerId'] != account_id or \
+                requester_vpc['Region'] != region:
+            raise FakeAWSError(
+                'InvalidVpcID.NotFound',
+                "The vpc ID '{}' does not exist".format(params['VpcId']))
+        if accepter_vpc is None or \
+                accepter_vpc['OwnerId'] != peer_owner_id or \
+                accepter_vpc['Region'] != peer_region:
+            raise FakeAWSError(
+                'InvalidVpcID.NotFound',
+                "The vpc ID '{}' does not exist".format(params['PeerVpcId']))
+        if any(vpc_peering_connection['Status']['Code'] in
+               LIVE_VPC_PEERING_CONNECTION_STATUS_CODES and
+               {vpc_peering_connection['RequesterVpcInfo']['VpcId'],
+                vpc_peering_connection['AccepterVpcInfo']['VpcId']} ==
+               {requester_vpc['VpcId'], accepter_vpc['VpcId']}
+               for vpc_peering_connection
+               in self.vpc_peering_connections.values()):
+            raise FakeAWSError(
+                'VpcPeeringConnectionAlreadyExists',
+                'A VPC peering connection between the VPCs already exists.')
+
+        vpc_peering_connection_id = self.__id_for('pcx')
+        vpc_peering_connection = {
+            'VpcPeeringConnectionId': vpc_peering_connection_id,
+            'Status': {'Code': 'pending-acceptance',
+                       'Message': 'Pending Acceptance by {}'.format(
+                           peer_owner_id)},
+            'RequesterVpcInfo': {
+                'VpcId': requester_vpc['VpcId'],
+                'OwnerId': account_id,
+                'Region': region,
+                'CidrBlock': requester_vpc['CidrBlock'],
+            },
+            'AccepterVpcInfo': {
+                'VpcId': accepter_vpc['VpcId'],
+                'OwnerId': peer_owner_id,
+                'Region': peer_region,
+            },
+            'Tags': [],
+        }
+        self.vpc_peering_connections[vpc_peering_connection_id] = \
+            vpc_peering_connection
+        self.__propagate(vpc_peering_connection_id)
+
+        return {'VpcPeeringConnection': copy.deepcopy(vpc_peering_connection)}
+
+    def __accept_vpc_peering_connection(self, account_id, region, params):
+        vpc_peering_connection = self.__vpc_peering_connection_for(
+            account_id, region, params)
+        accepter_vpc_info = vpc_peering_connection['AccepterVpcInfo']
+        if accepter_vpc_info['OwnerId'] != account_id or \
+                accepter_vpc_info['Region'] != region:
+            raise FakeAWSError(
+                'OperationNotPermitted',
+                'Only the accepter may accept a peering connection.')
+        if vpc_peering_connection['Status']['Code'] != 'pending-acceptance':
+            raise FakeAWSError(
+                'InvalidStateTransition',
+                "Cannot accept a peering connection in state '{}'.".format(
+                    vpc_peering_connection['Status']['Code']))
+
+        self.__change_status(
+            vpc_peering_connection, {'Code': 'active', 'Message': 'Active'})
+        accepter_vpc_info['CidrBlock'] = \
+            self.vpcs[accepter_vpc_info['VpcId']]['CidrBlock']
+
+        return {'VpcPeeringConnection': copy.deepcopy(vpc_peering_connection)}
+
+    def __delete_vpc_peering_connection(self, account_id, region, params):
+        vpc_peering_connection = self.__vpc_peering_connection_for(
+            account_id, region, params)
+        self.__change_status(
+            vpc_peering_connection, {'Code': 'deleted', 'Message': 'Deleted'})
+
+        return {'Return': True}
+
+    def __describe_route_tables(self, account_id, region, params):
+        route_tables = [
+            self.__observed_route_table(self.route_tables[route_table_id])
+            for vpc_id
+            in self.vpc_ids_by_location.get((account_id, region), [])
+            for route_table_id
+            in self.route_table_ids_by_vpc_id.get(vpc_id, [])
+        ]
+        if params.get('RouteTableIds'):
+            route_tables = [
+                route_table for route_table in route_tables
+                if route_table['RouteTableId'] in params['RouteTableIds']
+            ]
+
+        return paginated(
+            'RouteTables',
+            filtered(route_tables, params.get('Filters'),
+                     route_table_values_for),
+            params)
+
+    def __create_route(self, account_id, _, params):
+        route_table = self.__route_table_for(account_id, params)
+        destination_cidr_block = params['DestinationCidrBlock']
+        if any(route.get('DestinationCidrBlock') == destination_cidr_block
+               for route in route_table['Routes']):
+            raise FakeAWSError(
+                'RouteAlreadyExists',
+                "The route identified by {} already exists.".format(
+                    destination_cidr_block))
+
+        route_table['Routes'].append({
+            'DestinationCidrBlock': destination_cidr_block,
+            'VpcPeeringConnectionId': params.get('VpcPeeringConnectionId'),
+            'Origin': 'CreateRoute',
+            'State': 'active',
+        })
+        self.__propagate(
+            (route_table['RouteTableId'], destination_cidr_block))
+
+        return {'Return': True}
+
+    def __delete_route(self, account_id, _, params):
+        route_table = self.__route_table_for(account_id, params)
+        routes = [
+            route for route in route_table['Routes']
+            if route.get('DestinationCidrBlock') !=
+            params['DestinationCidrBlock']
+        ]
+        if len(routes) == len(route_table['Routes']):
+            raise FakeAWSError(
+                'InvalidRoute.NotFound',
+                "No route with destination-cidr-block {} in route "
+                "table {}".format(
+                    params['DestinationCidrBlock'], params['RouteTableId']))
+
+        route_table['Routes'] = routes
+        return {}
+
+    def __assume_role(self, _, __, params):
+        return {
+            'Credentials': {
+                'AccessKeyId': 'ASIA{:016X}'.format(next(self.ids)),
+                'SecretAccessKey': 'fake-secret-access-key',
+                'SessionToken': 'fake-session-token',
+                'Expiration': datetime.datetime.now(datetime.timezone.utc) +
+                datetime.timedelta(hours=1),
+            },
+            'AssumedRoleUser': {
+                'AssumedRoleId': 'AROAFAKE:{}'.format(
+                    params['RoleSessionName']),
+                'Arn': params['RoleArn'],
+            },
+        }
+
+    def __get_caller_identity(self, account_id, _, __):
+        return {
+            'Account': account_id,
+            'Arn': 'arn:aws:iam::{}:user/fake'.format(account_id),
+            'UserId': 'AIDAFAKE',
+        }
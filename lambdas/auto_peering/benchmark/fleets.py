@@ -0,0 +1,107 @@
+import ipaddress
+import random
+
+from test import builders, randoms
+
+REGIONS = [
+    'eu-west-1',
+    'us-east-1',
+    'eu-west-2',
+    'us-west-2',
+    'ap-southeast-1',
+    'ap-northeast-1',
+    'eu-central-1',
+    'ca-central-1',
+]
+BASE_ADDRESS = int(ipaddress.IPv4Address('10.0.0.0'))
+VPC_PREFIX_LENGTH = 28
+
+
+class FleetSpec(object):
+    def __init__(self, vpcs, accounts=1, regions=1, fan_out=2,
+                 private_route_tables=1, seed=0):
+        if regions > len(REGIONS):
+            raise ValueError(
+                "At most {} regions are supported.".format(len(REGIONS)))
+        if fan_out >= vpcs:
+            raise ValueError("Fan-out must be less than the number of VPCs.")
+
+        self.vpcs = vpcs
+        self.accounts = accounts
+        self.regions = regions
+        self.fan_out = fan_out
+        self.private_route_tables = private_route_tables
+        self.seed = seed
+
+    def _to_dict(self):
+        return {
+            'vpcs': self.vpcs,
+            'accounts': self.accounts,
+            'regions': self.regions,
+            'fan_out': self.fan_out,
+            'private_route_tables': self.private_route_tables,
+            'seed': self.seed,
+        }
+
+    def __repr__(self):
+        return "<%s.%s object at %s: %s>" % (
+            self.__class__.__module__,
+            self.__class__.__name__,
+            hex(id(self)),
+            repr(self._to_dict()))
+
+
+class Fleet(object):
+    def __init__(self, account_ids, regions, vpc_ids, target_account_id,
+                 target_vpc_id):
+        self.account_ids = account_ids
+        self.regions = regions
+        self.vpc_ids = vpc_ids
+        self.target_account_id = target_account_id
+        self.target_vpc_id = target_vpc_id
+
+
+def cidr_block_for(index):
+    return str(ipaddress.IPv4Network(
+        (BASE_ADDRESS + index * 2 ** (32 - VPC_PREFIX_LENGTH),
+         VPC_PREFIX_LENGTH)))
+
+
+def component_for(index):
+    return 'service{}'.format(index)
+
+
+def sample_excluding(index, population, count):
+    sample = set()
+    while len(sample) < count:
+        candidate = random.randrange(population)
+        if candidate != index:
+            sample.add(candidate)
+    return sorted(sample)
+
+
+def build_fleet(fake_aws, spec):
+    random.seed(spec.seed)
+
+    account_ids = [randoms.account_id() for _ in range(spec.accounts)]
+    regions = REGIONS[:spec.regions]
+    deployment_identifier = 'fleet{}'.format(spec.seed)
+
+    vpc_ids = []
+    for index in range(spec.vpcs):
+        dependencies = sample_excluding(index, spec.vpcs, spec.fan_out)
+        vpc_ids.append(fake_aws.add_vpc(
+            account_ids[index % spec.accounts],
+            regions[(index // spec.accounts) % spec.regions],
+            cidr_block_for(index),
+            builders.build_vpc_tags(
+                component=component_for(index),
+                deployment_identifier=deployment_identifier,
+                dependencies=[
+                    '{}-{}'.format(
+                        component_for(dependency), deployment_identifier)
+                    for dependency in dependencies
+                ]),
+            private_route_tables=spec.private_route_tables))
+
+    return Fleet(account_ids, regions, vpc_ids, account_ids[0], vpc_ids[0])
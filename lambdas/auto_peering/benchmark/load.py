@@ -0,0 +1,241 @@
+import contextlib
+import importlib.util
+import io
+import json
+import logging
+import math
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+import boto3
+
+from auto_peering.vpc_lifecycle_events import decode_record
+from benchmark.scenarios import environment_variables
+from test import builders
+
+HANDLER_MODULE = 'vpc_auto_peering_lambda'
+
+
+def read_events(path):
+    with open(path) as file:
+        content = file.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def write_events(events, path):
+    with open(path, 'w') as file:
+        for event in events:
+            file.write(json.dumps(event) + '\n')
+
+
+def synthetic_events(fleet, count, destroy_ratio=0.0, seed=0):
+    generator = random.Random(seed)
+    return [
+        builders.build_s3_event_sns_message(
+            'ObjectRemoved:Delete'
+            if generator.random() < destroy_ratio
+            else 'ObjectCreated:Put',
+            fleet.account_ids[index % len(fleet.account_ids)],
+            fleet.vpc_ids[index])
+        for index in (generator.randrange(len(fleet.vpc_ids))
+                      for _ in range(count))
+    ]
+
+
+def with_message_rewritten(record, rewrite):
+    # Records are delivered either by SNS or by SQS, as in
+    # vpc_lifecycle_events. Account and VPC IDs need no escaping, so they can
+    # be replaced in the encoded message however deeply it is nested.
+    if 'Sns' in record:
+        return dict(record, Sns=dict(
+            record['Sns'], Message=rewrite(record['Sns']['Message'])))
+    return dict(record, body=rewrite(record['body']))
+
+
+def remapped(events, fake_aws, fleet):
+    replacements = {}
+
+    def replacement_for(location):
+        if location not in replacements:
+            replacement_vpc_id = fleet.vpc_ids[
+                len(replacements) % len(fleet.vpc_ids)]
+            replacements[location] = (
+                fake_aws.vpcs[replacement_vpc_id]['OwnerId'],
+                replacement_vpc_id)
+        return replacements[location]
+
+    def remapped_record(record):
+        substitutions = [
+            (original, replacement)
+            for vpc_lifecycle_event in decode_record(record)
+            if vpc_lifecycle_event.vpc_id not in fake_aws.vpcs
+            for location in [(vpc_lifecycle_event.account_id,
+                              vpc_lifecycle_event.vpc_id)]
+            for original, replacement in zip(
+                location, replacement_for(location))
+        ]
+        if not substitutions:
+            return record
+
+        def rewrite(message):
+            for original, replacement in substitutions:
+                message = message.replace(original, replacement)
+            return message
+
+        return with_message_rewritten(record, rewrite)
+
+    return [
+        dict(event, Records=[
+            remapped_record(record) for record in event.get('Records', [])
+        ])
+        for event in events
+    ]
+
+
+@contextlib.contextmanager
+def loaded_containers(listener, default_account_id, count):
+    default_session = boto3.DEFAULT_SESSION
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    try:
+        boto3.setup_default_session()
+        listener.register(boto3.DEFAULT_SESSION.events, default_account_id)
+
+        containers = []
+        for _ in range(count):
+            specification = importlib.util.find_spec(HANDLER_MODULE)
+            container = importlib.util.module_from_spec(specification)
+            specification.loader.exec_module(container)
+            container.session_store.listeners.append(listener)
+            containers.append(container)
+        root_logger.setLevel(logging.WARNING)
+
+        yield containers
+    finally:
+        boto3.DEFAULT_SESSION = default_session
+        root_logger.setLevel(level)
+
+
+def percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100.0 * len(ordered)) - 1)]
+
+
+def summary_for(values):
+    return {
+        'p50': round(percentile(values, 50), 4),
+        'p95': round(percentile(values, 95), 4),
+        'p99': round(percentile(values, 99), 4),
+        'max': round(max(values), 4),
+    } if values else None
+
+
+class ErrorLogCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+@contextlib.contextmanager
+def counting_error_logs():
+    root_logger = logging.getLogger()
+    handlers = root_logger.handlers[:]
+    error_log_counter = ErrorLogCounter()
+    root_logger.handlers = [error_log_counter]
+    try:
+        yield error_log_counter
+    finally:
+        root_logger.handlers = handlers
+
+
+class LoadRun(object):
+    def __init__(self, environment, events, rate=0.0, concurrency=1,
+                 clock=time.perf_counter, sleep=time.sleep):
+        self.environment = environment
+        self.events = events
+        self.rate = rate
+        self.concurrency = concurrency
+        self.clock = clock
+        self.sleep = sleep
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.queue_delays = []
+        self.errors = Counter()
+
+    def __scheduled_at(self, started_at, index):
+        if not self.rate:
+            return started_at
+        return started_at + index / self.rate
+
+    def __work(self, container):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            scheduled_at, event = item
+            delay = scheduled_at - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+
+            invoked_at = self.clock()
+            try:
+                container.peer_vpcs_for(event, None)
+            except Exception as exception:
+                with self.lock:
+                    self.errors[type(exception).__name__] += 1
+            finished_at = self.clock()
+
+            with self.lock:
+                self.latencies.append(finished_at - invoked_at)
+                self.queue_delays.append(max(0.0, invoked_at - scheduled_at))
+
+    def run(self):
+        with environment_variables(
+                self.environment.environment_variables()), \
+                contextlib.redirect_stdout(io.StringIO()), \
+                counting_error_logs() as error_log_counter, \
+                loaded_containers(
+                    self.environment.fake_aws,
+                    self.environment.fleet.target_account_id,
+                    self.concurrency) as containers:
+            started_at = self.clock()
+            for index, event in enumerate(self.events):
+                self.pending.put(
+                    (self.__scheduled_at(started_at, index), event))
+            for _ in containers:
+                self.pending.put(None)
+
+            workers = [
+                threading.Thread(target=self.__work, args=(container,))
+                for container in containers
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            duration = self.clock() - started_at
+
+        return {
+            'events': len(self.events),
+            'concurrency': self.concurrency,
+            'rate_per_second': self.rate,
+            'duration_seconds': round(duration, 4),
+            'events_per_minute': round(
+                len(self.events) * 60.0 / duration, 2) if duration else None,
+            'latency_seconds': summary_for(self.latencies),
+            'queue_delay_seconds': summary_for(self.queue_delays),
+            'errors': sum(self.errors.values()),
+            'errors_by_type': dict(self.errors),
+            'logged_errors': error_log_counter.count,
+        }
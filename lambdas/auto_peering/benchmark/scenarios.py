@@ -0,0 +1,145 @@
+import contextlib
+import importlib
+import io
+import logging
+import os
+
+import boto3
+
+from auto_peering.all_vpcs import AllVPCs
+from auto_peering.ec2_gateways import EC2Gateways
+from auto_peering.session_store import SessionStore
+from auto_peering.vpc_links import VPCLinks
+from benchmark.fake_aws import FakeAWS
+from benchmark.fleets import build_fleet
+from test import builders
+
+PEERING_ROLE_NAME = 'vpc-auto-peering-role'
+FAKE_CREDENTIALS = {
+    'AWS_ACCESS_KEY_ID': 'benchmark-access-key',
+    'AWS_SECRET_ACCESS_KEY': 'benchmark-secret-key',
+}
+
+logger = logging.getLogger('benchmark')
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+
+class Environment(object):
+    def __init__(self, spec, search_parallelism=1, fake_aws_options=None):
+        self.spec = spec
+        self.search_parallelism = search_parallelism
+        self.fake_aws = FakeAWS(**(fake_aws_options or {}))
+        self.fleet = build_fleet(self.fake_aws, spec)
+
+        session = boto3.session.Session(
+            aws_access_key_id=FAKE_CREDENTIALS['AWS_ACCESS_KEY_ID'],
+            aws_secret_access_key=FAKE_CREDENTIALS['AWS_SECRET_ACCESS_KEY'],
+            region_name=self.fleet.regions[0])
+        self.fake_aws.register(session.events, self.fleet.target_account_id)
+        self.session_store = SessionStore(
+            session.client('sts'), PEERING_ROLE_NAME,
+            listeners=[self.fake_aws])
+        self.ec2_gateways = EC2Gateways(
+            self.session_store, self.fleet.account_ids, self.fleet.regions)
+
+    def all_vpcs(self):
+        return AllVPCs(
+            self.ec2_gateways, max_workers=self.search_parallelism)
+
+    def environment_variables(self):
+        return dict(
+            FAKE_CREDENTIALS,
+            AWS_REGION=self.fleet.regions[0],
+            AWS_DEFAULT_REGION=self.fleet.regions[0],
+            AWS_SEARCH_ACCOUNTS=','.join(self.fleet.account_ids),
+            AWS_SEARCH_REGIONS=','.join(self.fleet.regions),
+            AWS_SEARCH_PARALLELISM=str(self.search_parallelism),
+            AWS_PEERING_ROLE_NAME=PEERING_ROLE_NAME)
+
+    def event_for(self, event_name):
+        return builders.build_s3_event_sns_message(
+            event_name,
+            self.fleet.target_account_id,
+            self.fleet.target_vpc_id)
+
+
+@contextlib.contextmanager
+def environment_variables(variables):
+    previous = {name: os.environ.get(name) for name in variables}
+    os.environ.update(variables)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextlib.contextmanager
+def preserved_handler_state():
+    # Loading the handler replaces boto3's default session and sets log
+    # levels, all of which are restored once the handler has been run.
+    loggers = [logging.getLogger(name) for name in [None, 'boto3', 'botocore']]
+    levels = [each.level for each in loggers]
+    default_session = boto3.DEFAULT_SESSION
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        for each, level in zip(loggers, levels):
+            each.setLevel(level)
+        boto3.DEFAULT_SESSION = default_session
+
+
+def load_handler(listener, default_account_id):
+    boto3.setup_default_session()
+    listener.register(boto3.DEFAULT_SESSION.events, default_account_id)
+
+    import vpc_auto_peering_lambda
+    handler = importlib.reload(vpc_auto_peering_lambda)
+    handler.session_store.listeners.append(listener)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    return handler
+
+
+def run_handler(environment, event_names):
+    with environment_variables(environment.environment_variables()), \
+            preserved_handler_state(), \
+            contextlib.redirect_stdout(io.StringIO()):
+        handler = load_handler(
+            environment.fake_aws, environment.fleet.target_account_id)
+        for event_name in event_names:
+            handler.peer_vpcs_for(environment.event_for(event_name), None)
+
+
+def discovery(environment):
+    return environment.all_vpcs().find_all()
+
+
+def resolution(environment):
+    return VPCLinks(
+        environment.ec2_gateways, logger,
+        all_vpcs=environment.all_vpcs())\
+        .resolve_for(
+            environment.fleet.target_account_id,
+            environment.fleet.target_vpc_id)
+
+
+def handler(environment):
+    run_handler(environment, ['ObjectCreated:Put'])
+
+
+def handler_round_trip(environment):
+    run_handler(environment, ['ObjectCreated:Put', 'ObjectRemoved:Delete'])
+
+
+SCENARIOS = {
+    'discovery': discovery,
+    'resolution': resolution,
+    'handler': handler,
+    'handler_round_trip': handler_round_trip,
+}
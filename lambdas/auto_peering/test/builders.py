@@ -1,3 +1,5 @@
+import json
+
 from test import randoms
 
 
@@ -22,3 +24,24 @@ def build_vpc_tags(**kwargs):
                                          randoms.dependencies()))
         }
     ]
+
+
+def build_s3_event_sns_message(event_name, account_id, vpc_id,
+                               type='vpc-existence'):
+    s3_event = {'Records': [{
+        'eventName': event_name,
+        's3': {'object': {'key': '/'.join([type, account_id, vpc_id])}}
+    }]}
+    return {'Records': [{'Sns': {'Message': json.dumps(s3_event)}}]}
+
+
+def build_s3_event_sqs_message(event_name, account_id, vpc_id, message_id,
+                               type='vpc-existence'):
+    sns_message = build_s3_event_sns_message(
+        event_name, account_id, vpc_id, type=type)['Records'][0]['Sns']
+    return {'Records': [{
+        'eventSource': 'aws:sqs',
+        'messageId': message_id,
+        'body': json.dumps({'Type': 'Notification',
+                            'Message': sns_message['Message']})
+    }]}
@@ -37,6 +37,11 @@ class EC2Gateways(object):
     def all(self):
         return self.ec2_gateways
 
+    def covers(self, account_id, region):
+        return any(ec2_gateway.account_id == account_id and
+                   ec2_gateway.region == region
+                   for ec2_gateway in self.ec2_gateways)
+
     def by_account_id_and_region(self, account_id, region):
         return next(ec2_gateway
                     for ec2_gateway
@@ -1,3 +1,5 @@
+import datetime
+
 import test.randoms as randoms
 
 
@@ -13,7 +15,8 @@ def sts_assume_role_response_for(**kwargs):
         randoms.session_token())
     expiration = kwargs.get(
         'expiration',
-        "2022-01-06T15:29:47Z")
+        datetime.datetime.now(datetime.timezone.utc) +
+        datetime.timedelta(hours=1))
 
     return {
         'Credentials': {
@@ -0,0 +1,108 @@
+import contextlib
+import io
+from collections import Counter
+
+from benchmark.fake_aws import FakeAWS
+from benchmark.scenarios import (
+    environment_variables, load_handler, preserved_handler_state)
+from test import builders, randoms
+
+REGIONS = ['eu-west-1', 'us-east-1']
+ACCOUNTS = 2
+SEARCH_SCOPES = ACCOUNTS * len(REGIONS)
+LINK_COUNTS = [4, 12]
+DEPLOYMENT_IDENTIFIER = 'budget'
+
+PROVISION = 'ObjectCreated:Put'
+DESTROY = 'ObjectRemoved:Delete'
+
+
+def component_for(index):
+    return 'component{}'.format(index)
+
+
+class Scenario(object):
+    def __init__(self, **environment):
+        self.fake_aws = FakeAWS()
+        self.account_ids = [randoms.account_id() for _ in range(ACCOUNTS)]
+        self.environment = dict(
+            AWS_ACCESS_KEY_ID='access-key',
+            AWS_SECRET_ACCESS_KEY='secret-key',
+            AWS_REGION=REGIONS[0],
+            AWS_DEFAULT_REGION=REGIONS[0],
+            AWS_SEARCH_ACCOUNTS=','.join(self.account_ids),
+            AWS_SEARCH_REGIONS=','.join(REGIONS),
+            **environment)
+        self.vpc_ids = []
+        self.handler = None
+
+    def add_vpc(self, dependencies=()):
+        index = len(self.vpc_ids)
+        self.vpc_ids.append(self.fake_aws.add_vpc(
+            self.account_ids[index % ACCOUNTS],
+            REGIONS[(index // ACCOUNTS) % len(REGIONS)],
+            '10.{}.{}.0/24'.format(index // 256, index % 256),
+            builders.build_vpc_tags(
+                component=component_for(index),
+                deployment_identifier=DEPLOYMENT_IDENTIFIER,
+                dependencies=[
+                    '{}-{}'.format(
+                        component_for(dependency), DEPLOYMENT_IDENTIFIER)
+                    for dependency in dependencies
+                ])))
+
+    def invoke(self, event_name, type='vpc-existence'):
+        return self.invoke_with(builders.build_s3_event_sns_message(
+            event_name, self.account_ids[0], self.vpc_ids[0], type=type))
+
+    def active_vpc_peering_connection_count(self):
+        return sum(
+            1
+            for vpc_peering_connection
+            in list(self.fake_aws.vpc_peering_connections.values())
+            if vpc_peering_connection['Status']['Code'] == 'active')
+
+    def peering_route_count(self):
+        return sum(
+            1
+            for vpc_id in self.vpc_ids
+            for route in self.fake_aws.routes_in(vpc_id)
+            if 'VpcPeeringConnectionId' in route)
+
+    def handle(self, event):
+        with environment_variables(self.environment), \
+                preserved_handler_state(), \
+                contextlib.redirect_stdout(io.StringIO()):
+            if self.handler is None:
+                self.handler = load_handler(
+                    self.fake_aws, self.account_ids[0])
+            return self.handler.peer_vpcs_for(event, None)
+
+    def invoke_with(self, event):
+        before = Counter(self.fake_aws.call_counts())
+        self.handle(event)
+        return dict(Counter(self.fake_aws.call_counts()) - before)
+
+
+def dependencies_scenario(links, **environment):
+    scenario = Scenario(**environment)
+    scenario.add_vpc(dependencies=range(1, links + 1))
+    for _ in range(links):
+        scenario.add_vpc()
+    return scenario
+
+
+def dependents_scenario(links, **environment):
+    scenario = Scenario(**environment)
+    scenario.add_vpc()
+    for _ in range(links):
+        scenario.add_vpc(dependencies=[0])
+    return scenario
+
+
+def bidirectional_scenario(links, **environment):
+    scenario = Scenario(**environment)
+    scenario.add_vpc(dependencies=range(1, links + 1))
+    for _ in range(links):
+        scenario.add_vpc(dependencies=[0])
+    return scenario
@@ -247,3 +247,53 @@ class TestAllVPCs(unittest.TestCase):
                 VPC(vpc_4_response, account_2_id, region_1_id)
             }
         )
+
+    def test_find_all_concurrently_preserves_gateway_order(self):
+        account_1_id = randoms.account_id()
+        account_2_id = randoms.account_id()
+        region_1_id = randoms.region()
+        region_2_id = randoms.region()
+
+        vpc_1_response = mocks.build_vpc_response_mock(name="VPC 1")
+        vpc_2_response = mocks.build_vpc_response_mock(name="VPC 2")
+        vpc_3_response = mocks.build_vpc_response_mock(name="VPC 3")
+        vpc_4_response = mocks.build_vpc_response_mock(name="VPC 4")
+
+        ec2_gateway_1_1 = mocks.EC2Gateway(account_1_id, region_1_id)
+        ec2_gateway_1_2 = mocks.EC2Gateway(account_1_id, region_2_id)
+        ec2_gateway_2_1 = mocks.EC2Gateway(account_2_id, region_1_id)
+        ec2_gateway_2_2 = mocks.EC2Gateway(account_2_id, region_2_id)
+
+        ec2_gateways = mocks.EC2Gateways([
+            ec2_gateway_1_1, ec2_gateway_1_2, ec2_gateway_2_1, ec2_gateway_2_2,
+        ])
+
+        ec2_gateway_1_1.resource().vpcs.all = \
+            mock.Mock(
+                name="Account 1 region 1 VPCs",
+                return_value=[vpc_1_response])
+        ec2_gateway_1_2.resource().vpcs.all = \
+            mock.Mock(
+                name="Account 1 region 2 VPCs",
+                return_value=[])
+        ec2_gateway_2_1.resource().vpcs.all = \
+            mock.Mock(
+                name="Account 2 region 1 VPCs",
+                return_value=[vpc_2_response, vpc_3_response])
+        ec2_gateway_2_2.resource().vpcs.all = \
+            mock.Mock(
+                name="Account 2 region 2 VPCs",
+                return_value=[vpc_4_response])
+
+        all_vpcs = AllVPCs(ec2_gateways, max_workers=4)
+
+        found_vpcs = all_vpcs.find_all()
+
+        self.assertEqual(
+            found_vpcs,
+            [
+                VPC(vpc_1_response, account_1_id, region_1_id),
+                VPC(vpc_2_response, account_2_id, region_1_id),
+                VPC(vpc_3_response, account_2_id, region_1_id),
+                VPC(vpc_4_response, account_2_id, region_2_id)
+            ])
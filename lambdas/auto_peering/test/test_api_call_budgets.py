@@ -0,0 +1,188 @@
+import unittest
+
+from test import builders
+from test.scenarios import (
+    ACCOUNTS, LINK_COUNTS, PROVISION, DESTROY, SEARCH_SCOPES, Scenario,
+    bidirectional_scenario, dependencies_scenario, dependents_scenario)
+
+
+class TestAPICallBudgets(unittest.TestCase):
+    def assertWithinBudget(self, call_counts, budgets, links):
+        over_budget = {
+            operation_name: (count, fixed + per_link * links)
+            for operation_name, count in call_counts.items()
+            for fixed, per_link in [budgets.get(operation_name, (0, 0))]
+            if count > fixed + per_link * links
+        }
+        self.assertEqual(
+            over_budget, {},
+            "Calls exceed budget for {} links as "
+            "{{operation: (calls, budget)}}".format(links))
+
+    def assertPeered(self, scenario, links, routes_per_link=1):
+        self.assertEqual(
+            (scenario.active_vpc_peering_connection_count(),
+             scenario.peering_route_count()),
+            (links, routes_per_link * links),
+            "Expected active peering connections and routes")
+
+    def test_provisioning_with_dependencies(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 2),
+            'CreateVpcPeeringConnection': (0, 1),
+            'AcceptVpcPeeringConnection': (0, 1),
+            'DescribeRouteTables': (1, 0),
+            'CreateRoute': (0, 1),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = dependencies_scenario(links)
+
+                self.assertWithinBudget(
+                    scenario.invoke(PROVISION), budgets, links)
+                self.assertPeered(scenario, links)
+
+    def test_destroying_with_dependents(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 0),
+            'DescribeRouteTables': (0, 1),
+            'DeleteRoute': (0, 1),
+            'DeleteVpcPeeringConnection': (0, 1),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = dependents_scenario(links)
+                scenario.invoke(PROVISION)
+                self.assertPeered(scenario, links)
+
+                self.assertWithinBudget(
+                    scenario.invoke(DESTROY), budgets, links)
+                self.assertPeered(scenario, 0)
+
+    def test_fast_destroying_with_dependents(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 0),
+            'DescribeRouteTables': (0, 2),
+            'DeleteRoute': (0, 1),
+            'DeleteVpcPeeringConnection': (0, 1),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = dependents_scenario(
+                    links, AWS_DESTROY_MODE='fast')
+                scenario.invoke(PROVISION)
+                self.assertPeered(scenario, links)
+
+                self.assertWithinBudget(
+                    scenario.invoke(DESTROY), budgets, links)
+                self.assertPeered(scenario, 0)
+
+    def test_replaying_destroy_event(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 0),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = dependents_scenario(links)
+                scenario.invoke(PROVISION)
+                scenario.invoke(DESTROY)
+
+                self.assertWithinBudget(
+                    scenario.invoke(DESTROY), budgets, links)
+                self.assertPeered(scenario, 0)
+
+    def test_replaying_provisioning_event(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 0),
+            'DescribeRouteTables': (1, 0),
+        }
+        route_modes = {
+            'create': ({}, {'CreateRoute': (0, 1)}),
+            'reconcile': ({'AWS_ROUTE_MODE': 'reconcile'}, {}),
+        }
+        for route_mode, (environment, route_budgets) in route_modes.items():
+            for links in LINK_COUNTS:
+                with self.subTest(route_mode=route_mode, links=links):
+                    scenario = dependencies_scenario(links, **environment)
+                    scenario.invoke(PROVISION)
+
+                    self.assertWithinBudget(
+                        scenario.invoke(PROVISION),
+                        {**budgets, **route_budgets},
+                        links)
+                    self.assertPeered(scenario, links)
+
+    def test_provisioning_bidirectional_links(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES + 1, 0),
+            'DescribeVpcPeeringConnections': (SEARCH_SCOPES, 2),
+            'CreateVpcPeeringConnection': (0, 1),
+            'AcceptVpcPeeringConnection': (0, 1),
+            'DescribeRouteTables': (1, 1),
+            'CreateRoute': (0, 2),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = bidirectional_scenario(links)
+
+                self.assertWithinBudget(
+                    scenario.invoke(PROVISION), budgets, links)
+                self.assertPeered(scenario, links, routes_per_link=2)
+
+    def test_ignoring_events_for_other_object_types(self):
+        scenario = dependencies_scenario(LINK_COUNTS[0])
+
+        self.assertEqual(
+            scenario.invoke(PROVISION, type='vpc-configuration'), {})
+        self.assertPeered(scenario, 0)
+
+    def test_provisioning_batch_of_vpcs(self):
+        budgets = {
+            'GetCallerIdentity': (1, 0),
+            'AssumeRole': (ACCOUNTS, 0),
+            'DescribeVpcs': (SEARCH_SCOPES, 0),
+            'DescribeVpcPeeringConnections': (2 * SEARCH_SCOPES, 2),
+            'CreateVpcPeeringConnection': (0, 1),
+            'AcceptVpcPeeringConnection': (0, 1),
+            'DescribeRouteTables': (2, 0),
+            'CreateRoute': (0, 1),
+        }
+        for links in LINK_COUNTS:
+            with self.subTest(links=links):
+                scenario = Scenario()
+                scenario.add_vpc(dependencies=range(2, links + 2))
+                scenario.add_vpc(dependencies=range(2, links + 2))
+                for _ in range(links):
+                    scenario.add_vpc()
+                events = [
+                    builders.build_s3_event_sns_message(
+                        PROVISION, scenario.account_ids[index % ACCOUNTS],
+                        scenario.vpc_ids[index])
+                    for index in range(2)
+                ]
+
+                self.assertWithinBudget(
+                    scenario.invoke_with({'Records': [
+                        record
+                        for event in events
+                        for record in event['Records']
+                    ]}),
+                    budgets, 2 * links)
+                self.assertPeered(scenario, 2 * links)
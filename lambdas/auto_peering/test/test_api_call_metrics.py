@@ -0,0 +1,218 @@
+import json
+import unittest
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+from auto_peering.api_call_metrics import APICallMetrics
+from auto_peering.describe_cache import DescribeCache
+from test import randoms
+
+
+class FakeClock(object):
+    def __init__(self, step):
+        self.now = 0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def build_session():
+    return boto3.session.Session(
+        aws_access_key_id='access-key',
+        aws_secret_access_key='secret-key')
+
+
+def respond_with(client, status_code, parsed):
+    def respond(**_):
+        return (AWSResponse(
+            'https://ec2.amazonaws.com', status_code, {}, None), parsed)
+
+    client.meta.events.register_last('before-call', respond)
+    return client
+
+
+class TestAPICallMetrics(unittest.TestCase):
+    def setUp(self):
+        self.account_id = randoms.account_id()
+        self.region = randoms.region()
+        self.api_call_metrics = APICallMetrics(
+            clock=FakeClock(0.25), timestamp=lambda: 1700000000)
+        self.session = build_session()
+        self.api_call_metrics.register(self.session.events, self.account_id)
+
+    def test_counts_calls_retries_and_latency_per_operation(self):
+        ec2_client = respond_with(
+            self.session.client('ec2', self.region), 200,
+            {'Vpcs': [], 'ResponseMetadata': {'RetryAttempts': 2}})
+
+        ec2_client.describe_vpcs()
+        ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            self.api_call_metrics.statistics(),
+            {(self.account_id, self.region, 'DescribeVpcs'): {
+                'calls': 2,
+                'retries': 4,
+                'throttles': 0,
+                'errors': 0,
+                'latencies': [250.0, 250.0],
+            }})
+
+    def test_counts_failed_calls_as_errors(self):
+        ec2_client = respond_with(
+            self.session.client('ec2', self.region), 400,
+            {'Error': {'Code': 'InvalidVpcID.NotFound', 'Message': ''}})
+
+        with self.assertRaises(Exception):
+            ec2_client.describe_vpcs()
+
+        statistics = self.api_call_metrics.statistics()[
+            (self.account_id, self.region, 'DescribeVpcs')]
+        self.assertEqual(statistics['calls'], 1)
+        self.assertEqual(statistics['errors'], 1)
+
+    def test_counts_throttled_attempts(self):
+        ec2_client = self.session.client('ec2', self.region)
+        operation_model = ec2_client.meta.service_model.operation_model(
+            'DescribeVpcs')
+        throttled = (
+            AWSResponse('https://ec2.amazonaws.com', 503, {}, None),
+            {'Error': {'Code': 'RequestLimitExceeded', 'Message': ''}})
+        succeeded = (
+            AWSResponse('https://ec2.amazonaws.com', 200, {}, None),
+            {'Vpcs': []})
+
+        for response in [throttled, succeeded]:
+            ec2_client.meta.events.emit(
+                'needs-retry.ec2.DescribeVpcs',
+                response=response,
+                endpoint=None,
+                operation=operation_model,
+                attempts=1,
+                caught_exception=None,
+                request_dict={'context': {'client_region': self.region}})
+
+        self.assertEqual(
+            self.api_call_metrics.statistics()[
+                (self.account_id, self.region, 'DescribeVpcs')]['throttles'],
+            1)
+
+    def test_does_not_count_describe_cache_hits(self):
+        ec2_client = respond_with(
+            DescribeCache().register(
+                self.session.client('ec2', self.region),
+                self.account_id, self.region),
+            200, {'Vpcs': []})
+
+        ec2_client.describe_vpcs()
+        ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            self.api_call_metrics.statistics()[
+                (self.account_id, self.region, 'DescribeVpcs')]['calls'],
+            1)
+
+    def test_resets_metrics(self):
+        ec2_client = respond_with(
+            self.session.client('ec2', self.region), 200, {'Vpcs': []})
+
+        ec2_client.describe_vpcs()
+        self.api_call_metrics.reset()
+
+        self.assertEqual(self.api_call_metrics.statistics(), {})
+
+    def test_emits_one_embedded_metric_document_per_dimension_set(self):
+        ec2_client = respond_with(
+            self.session.client('ec2', self.region), 200,
+            {'Vpcs': [], 'RouteTables': []})
+
+        ec2_client.describe_vpcs()
+        ec2_client.describe_route_tables()
+
+        documents = [
+            json.loads(line) for line in self.api_call_metrics.emf()
+        ]
+
+        self.assertEqual(
+            [document['Operation'] for document in documents],
+            ['DescribeRouteTables', 'DescribeVpcs'])
+        self.assertEqual(documents[1], {
+            '_aws': {
+                'Timestamp': 1700000000000,
+                'CloudWatchMetrics': [{
+                    'Namespace': 'VPCAutoPeering',
+                    'Dimensions': [['Account', 'Region', 'Operation']],
+                    'Metrics': [
+                        {'Name': 'Calls', 'Unit': 'Count'},
+                        {'Name': 'Retries', 'Unit': 'Count'},
+                        {'Name': 'Throttles', 'Unit': 'Count'},
+                        {'Name': 'Errors', 'Unit': 'Count'},
+                        {'Name': 'Latency', 'Unit': 'Milliseconds'},
+                    ],
+                }],
+            },
+            'Account': self.account_id,
+            'Region': self.region,
+            'Operation': 'DescribeVpcs',
+            'Calls': 1,
+            'Retries': 0,
+            'Throttles': 0,
+            'Errors': 0,
+            'Latency': [250.0],
+        })
+
+    def test_emits_global_region_for_region_less_calls(self):
+        for region in [None, 'aws-global']:
+            with self.subTest(region=region):
+                api_call_metrics = APICallMetrics()
+                session = build_session()
+                api_call_metrics.register(session.events, self.account_id)
+                sts_client = respond_with(
+                    session.client('sts', 'aws-global'), 200,
+                    {'Account': self.account_id})
+                sts_client.meta.events.register_first(
+                    'before-call',
+                    lambda context, region=region, **_:
+                    context.update(client_region=region))
+
+                sts_client.get_caller_identity()
+
+                document = json.loads(api_call_metrics.emf()[0])
+                self.assertEqual(document['Region'], 'global')
+
+    def test_splits_latencies_across_documents_of_at_most_100_values(self):
+        ec2_client = respond_with(
+            self.session.client('ec2', self.region), 200, {'Vpcs': []})
+
+        for _ in range(250):
+            ec2_client.describe_vpcs()
+
+        documents = [
+            json.loads(line) for line in self.api_call_metrics.emf()
+        ]
+
+        self.assertEqual(
+            [len(document['Latency']) for document in documents],
+            [100, 100, 50])
+        self.assertEqual(documents[0]['Calls'], 250)
+        self.assertNotIn('Calls', documents[1])
+        self.assertEqual(
+            documents[2]['_aws']['CloudWatchMetrics'][0]['Metrics'],
+            [{'Name': 'Latency', 'Unit': 'Milliseconds'}])
+        self.assertEqual(documents[2]['Operation'], 'DescribeVpcs')
+
+    def test_uses_default_account_for_unattributed_clients(self):
+        api_call_metrics = APICallMetrics()
+        session = build_session()
+        api_call_metrics.register(session.events, None)
+        ec2_client = respond_with(
+            session.client('ec2', self.region), 200, {'Vpcs': []})
+
+        ec2_client.describe_vpcs()
+
+        document = json.loads(
+            api_call_metrics.emf(default_account_id=self.account_id)[0])
+        self.assertEqual(document['Account'], self.account_id)
@@ -0,0 +1,252 @@
+import datetime
+import ipaddress
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import boto3
+from botocore.exceptions import ClientError
+
+from auto_peering.ec2_gateways import EC2Gateways
+from auto_peering.session_store import SessionStore
+from benchmark import cassettes
+from benchmark.fake_aws import FakeAWS
+from test import builders, randoms
+
+
+class TestCassettes(unittest.TestCase):
+    def setUp(self):
+        self.account_id = randoms.account_id()
+        self.region = 'eu-west-1'
+        self.role_name = randoms.role_name()
+        self.directory = tempfile.mkdtemp()
+        self.fake_aws = FakeAWS()
+        self.vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24',
+            builders.build_vpc_tags(component='app'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def ec2_resource_for(self, account_id, *listeners):
+        session = boto3.session.Session(
+            aws_access_key_id='access-key',
+            aws_secret_access_key='secret-key',
+            region_name=self.region)
+        for listener in listeners:
+            listener.register(session.events, None)
+        session_store = SessionStore(
+            session.client('sts'), self.role_name, listeners=listeners)
+        return EC2Gateways(session_store, [account_id], [self.region])\
+            .by_account_id_and_region(account_id, self.region)\
+            .resource()
+
+    def record(self, path, exercise):
+        recorder = cassettes.Recorder()
+        exercise(self.ec2_resource_for(
+            self.account_id, self.fake_aws, recorder))
+        recorder.save(path)
+        return recorder
+
+    def test_replays_recorded_responses_without_calling_aws(self):
+        path = os.path.join(self.directory, 'cassette.jsonl.gz')
+        anonymise = self.record(
+            path, lambda ec2_resource: list(ec2_resource.vpcs.all()))\
+            .anonymiser.anonymise
+        calls = len(self.fake_aws.calls)
+
+        player = cassettes.Player(cassettes.load(path), time_scale=0)
+        vpcs = list(self.ec2_resource_for(
+            anonymise(self.account_id), player).vpcs.all())
+
+        self.assertEqual([vpc.id for vpc in vpcs], [anonymise(self.vpc_id)])
+        self.assertEqual(vpcs[0].cidr_block, '10.0.0.0/24')
+        self.assertEqual(len(self.fake_aws.calls), calls)
+        self.assertEqual(player.replayed, 2)
+
+    def test_replays_recorded_errors(self):
+        path = os.path.join(self.directory, 'cassette.jsonl')
+
+        def exercise(ec2_resource):
+            with self.assertRaises(ClientError):
+                ec2_resource.VpcPeeringConnection('pcx-missing').load()
+
+        anonymise = self.record(path, exercise).anonymiser.anonymise
+
+        with self.assertRaises(ClientError) as context:
+            self.ec2_resource_for(
+                anonymise(self.account_id),
+                cassettes.Player(cassettes.load(path), time_scale=0))\
+                .VpcPeeringConnection('pcx-missing').load()
+        self.assertEqual(
+            context.exception.response['Error']['Code'],
+            'InvalidVpcPeeringConnectionID.NotFound')
+
+    def test_sleeps_for_scaled_recorded_latency(self):
+        sleeps = []
+        player = cassettes.Player([{
+            'account_id': None,
+            'region': self.region,
+            'operation': 'GetCallerIdentity',
+            'params': {},
+            'status_code': 200,
+            'latency_seconds': 0.2,
+            'response': {'Account': self.account_id},
+        }], time_scale=0.5, sleep=sleeps.append)
+        session = boto3.session.Session(
+            aws_access_key_id='access-key',
+            aws_secret_access_key='secret-key',
+            region_name=self.region)
+        player.register(session.events, None)
+
+        response = session.client('sts').get_caller_identity()
+
+        self.assertEqual(response['Account'], self.account_id)
+        self.assertEqual(sleeps, [0.1])
+
+    def test_raises_for_unrecorded_requests(self):
+        path = os.path.join(self.directory, 'cassette.jsonl')
+        anonymise = self.record(
+            path, lambda ec2_resource: list(ec2_resource.vpcs.all()))\
+            .anonymiser.anonymise
+
+        ec2_resource = self.ec2_resource_for(
+            anonymise(self.account_id),
+            cassettes.Player(cassettes.load(path), time_scale=0))
+
+        with self.assertRaises(cassettes.UnrecordedRequestError):
+            list(ec2_resource.vpcs.filter(
+                Filters=[{'Name': 'tag:Component', 'Values': ['db']}]))
+
+    def test_never_persists_secrets_or_real_identifiers(self):
+        path = os.path.join(self.directory, 'cassette.jsonl')
+        self.record(path, lambda ec2_resource: list(ec2_resource.vpcs.all()))
+
+        with open(path) as file:
+            cassette = file.read()
+
+        self.assertIn('"AssumeRole"', cassette)
+        for secret in ['Credentials', 'SecretAccessKey', 'SessionToken',
+                       'fake-secret-access-key', 'fake-session-token']:
+            self.assertNotIn(secret, cassette)
+        self.assertNotIn(self.account_id, cassette)
+        self.assertNotIn(self.vpc_id, cassette)
+
+    def test_replays_fake_credentials_for_assumed_roles(self):
+        now = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+        role_arn = 'arn:aws:iam::{}:role/{}'.format(
+            self.account_id, self.role_name)
+        player = cassettes.Player([{
+            'account_id': None,
+            'region': self.region,
+            'operation': 'AssumeRole',
+            'params': {'RoleArn': role_arn, 'RoleSessionName': 'replay'},
+            'status_code': 200,
+            'latency_seconds': 0.1,
+            'response': {'AssumedRoleUser': {
+                'AssumedRoleId': 'AROAREPLAYED:replay',
+                'Arn': role_arn}},
+        }], time_scale=0, now=lambda: now)
+        session = boto3.session.Session(
+            aws_access_key_id='access-key',
+            aws_secret_access_key='secret-key',
+            region_name=self.region)
+        player.register(session.events, None)
+
+        response = session.client('sts').assume_role(
+            RoleArn=role_arn, RoleSessionName='replay')
+
+        self.assertEqual(
+            response['Credentials']['SecretAccessKey'],
+            'replayed-secret-access-key')
+        self.assertEqual(
+            response['Credentials']['Expiration'],
+            now + datetime.timedelta(hours=1))
+
+    def test_shifts_recorded_times_to_time_of_replay(self):
+        path = os.path.join(self.directory, 'cassette.jsonl')
+        recorded_at = datetime.datetime(
+            2024, 1, 1, tzinfo=datetime.timezone.utc)
+        recorder = cassettes.Recorder(now=lambda: recorded_at)
+        recorder.interactions.append({
+            'account_id': self.account_id,
+            'region': self.region,
+            'operation': 'DescribeVpcPeeringConnections',
+            'params': {},
+            'status_code': 200,
+            'latency_seconds': 0.1,
+            'response': {'VpcPeeringConnections': [{
+                'ExpirationTime':
+                    recorded_at + datetime.timedelta(days=7)}]},
+        })
+        recorder.save(path)
+        later = recorded_at + datetime.timedelta(days=2)
+
+        interactions = cassettes.load(path, now=lambda: later)
+
+        self.assertEqual(
+            interactions[0]['response']['VpcPeeringConnections'][0]
+            ['ExpirationTime'],
+            later + datetime.timedelta(days=7))
+
+    def test_records_anonymised_event_and_environment(self):
+        path = os.path.join(self.directory, 'cassette.jsonl')
+        recorder = self.record(
+            path, lambda ec2_resource: list(ec2_resource.vpcs.all()))
+        anonymise = recorder.anonymiser.anonymise
+        event = builders.build_s3_event_sns_message(
+            'Create', self.account_id, self.vpc_id)
+
+        recorder.save(
+            path, event=event,
+            environment={'AWS_SEARCH_ACCOUNTS': self.account_id})
+
+        header = cassettes.load_header(path)
+        self.assertEqual(header['event'], anonymise(event))
+        self.assertEqual(
+            header['environment'],
+            {'AWS_SEARCH_ACCOUNTS': anonymise(self.account_id)})
+        self.assertNotIn(self.vpc_id, json.dumps(header))
+
+
+class TestAnonymiser(unittest.TestCase):
+    def test_remaps_identifiers_consistently(self):
+        account_id = randoms.account_id()
+        vpc_id = randoms.vpc_id()
+        peering_connection_id = 'pcx-{}'.format(randoms.numeric_string(17))
+        anonymiser = cassettes.Anonymiser()
+
+        anonymised = anonymiser.anonymise({
+            'OwnerId': account_id,
+            'Arn': 'arn:aws:iam::{}:role/peering'.format(account_id),
+            'VpcIds': [vpc_id, vpc_id],
+            'VpcPeeringConnectionId': peering_connection_id,
+            'CidrBlock': '172.16.0.0/16',
+        })
+
+        self.assertEqual(anonymised['OwnerId'], '000000000001')
+        self.assertEqual(
+            anonymised['Arn'], 'arn:aws:iam::000000000001:role/peering')
+        self.assertEqual(
+            anonymised['VpcIds'], ['vpc-a0000000000000001'] * 2)
+        self.assertEqual(
+            anonymised['VpcPeeringConnectionId'], 'pcx-a0000000000000001')
+        self.assertEqual(anonymised['CidrBlock'], '172.16.0.0/16')
+        self.assertEqual(anonymiser.anonymise(vpc_id), 'vpc-a0000000000000001')
+
+    def test_optionally_remaps_cidrs_to_distinct_networks(self):
+        anonymiser = cassettes.Anonymiser(cidrs=True)
+
+        anonymised = anonymiser.anonymise([
+            '172.16.0.0/24', '192.168.0.0/16', '172.16.0.0/24'])
+
+        networks = [ipaddress.ip_network(cidr) for cidr in anonymised]
+        self.assertEqual(anonymised[0], anonymised[2])
+        self.assertEqual(
+            [network.prefixlen for network in networks], [24, 16, 24])
+        self.assertFalse(networks[0].overlaps(networks[1]))
+        self.assertTrue(all(
+            network.subnet_of(ipaddress.ip_network('10.0.0.0/8'))
+            for network in networks))
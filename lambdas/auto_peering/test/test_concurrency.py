@@ -0,0 +1,39 @@
+import threading
+import unittest
+
+from auto_peering.concurrency import map_concurrently
+
+
+class TestMapConcurrently(unittest.TestCase):
+    def test_returns_results_in_order_of_items(self):
+        results = map_concurrently(
+            lambda item: item * 2, [3, 1, 2], max_workers=3)
+
+        self.assertEqual(results, [6, 2, 4])
+
+    def test_runs_in_calling_thread_when_single_worker(self):
+        calling_thread = threading.current_thread()
+
+        results = map_concurrently(
+            lambda item: threading.current_thread(), [1, 2], max_workers=1)
+
+        self.assertEqual(results, [calling_thread, calling_thread])
+
+    def test_runs_items_concurrently_when_multiple_workers(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait_for_others(item):
+            barrier.wait()
+            return item
+
+        results = map_concurrently(
+            wait_for_others, [1, 2, 3], max_workers=3)
+
+        self.assertEqual(results, [1, 2, 3])
+
+    def test_propagates_exceptions(self):
+        def fail(item):
+            raise ValueError(item)
+
+        with self.assertRaises(ValueError):
+            map_concurrently(fail, [1, 2], max_workers=2)
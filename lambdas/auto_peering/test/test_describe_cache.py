@@ -0,0 +1,165 @@
+import unittest
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+from auto_peering.describe_cache import DescribeCache, uncached
+from test import randoms
+
+
+def build_ec2_client(region):
+    return boto3.session.Session(
+        aws_access_key_id='access-key',
+        aws_secret_access_key='secret-key',
+        region_name=region).client('ec2')
+
+
+class FakeEC2(object):
+    def __init__(self, client, responses, during=None):
+        self.responses = responses
+        self.during = during or {}
+        self.calls = []
+        client.meta.events.register_last('before-call.ec2', self.respond)
+
+    def respond(self, model, **_):
+        self.calls.append(model.name)
+        during = self.during.pop(model.name, None)
+        if during:
+            during()
+        return (AWSResponse('https://ec2.amazonaws.com', 200, {}, None),
+                self.responses[model.name])
+
+
+class TestDescribeCache(unittest.TestCase):
+    def setUp(self):
+        self.account_id = randoms.account_id()
+        self.region = randoms.region()
+        self.describe_cache = DescribeCache()
+        self.ec2_client = self.describe_cache.register(
+            build_ec2_client(self.region), self.account_id, self.region)
+        self.fake_ec2 = FakeEC2(self.ec2_client, {
+            'DescribeVpcs': {'Vpcs': [{'VpcId': randoms.vpc_id()}]},
+            'DescribeRouteTables': {'RouteTables': []},
+            'CreateRoute': {'Return': True},
+        })
+
+    def test_returns_cached_response_for_repeated_describe(self):
+        vpc_id = randoms.vpc_id()
+
+        first = self.ec2_client.describe_vpcs(VpcIds=[vpc_id])
+        second = self.ec2_client.describe_vpcs(VpcIds=[vpc_id])
+
+        self.assertEqual(self.fake_ec2.calls, ['DescribeVpcs'])
+        self.assertEqual(first['Vpcs'], second['Vpcs'])
+        self.assertEqual(
+            self.describe_cache.statistics(),
+            {'DescribeVpcs': {'hits': 1, 'misses': 1, 'hit_rate': 0.5}})
+
+    def test_keys_on_normalised_parameters(self):
+        self.ec2_client.describe_route_tables(
+            Filters=[{'Name': 'vpc-id', 'Values': ['vpc-1']}])
+        self.ec2_client.describe_route_tables(
+            Filters=[{'Values': ['vpc-1'], 'Name': 'vpc-id'}])
+        self.ec2_client.describe_route_tables(
+            Filters=[{'Name': 'vpc-id', 'Values': ['vpc-2']}])
+
+        self.assertEqual(
+            self.fake_ec2.calls,
+            ['DescribeRouteTables', 'DescribeRouteTables'])
+
+    def test_keys_on_account_and_region(self):
+        other_ec2_client = self.describe_cache.register(
+            build_ec2_client(self.region), randoms.account_id(), self.region)
+        other_fake_ec2 = FakeEC2(other_ec2_client, self.fake_ec2.responses)
+
+        self.ec2_client.describe_vpcs()
+        other_ec2_client.describe_vpcs()
+
+        self.assertEqual(self.fake_ec2.calls, ['DescribeVpcs'])
+        self.assertEqual(other_fake_ec2.calls, ['DescribeVpcs'])
+
+    def test_invalidates_affected_describes_on_mutation(self):
+        self.ec2_client.describe_vpcs()
+        self.ec2_client.describe_route_tables()
+        self.ec2_client.create_route(
+            RouteTableId='rtb-1', DestinationCidrBlock='10.0.0.0/24',
+            VpcPeeringConnectionId='pcx-1')
+        self.ec2_client.describe_route_tables()
+        self.ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            self.fake_ec2.calls,
+            ['DescribeVpcs', 'DescribeRouteTables', 'CreateRoute',
+             'DescribeRouteTables'])
+
+    def test_invalidates_only_the_mutating_account_and_region(self):
+        other_ec2_client = self.describe_cache.register(
+            build_ec2_client(self.region), randoms.account_id(), self.region)
+        other_fake_ec2 = FakeEC2(other_ec2_client, self.fake_ec2.responses)
+
+        other_ec2_client.describe_route_tables()
+        self.ec2_client.create_route(
+            RouteTableId='rtb-1', DestinationCidrBlock='10.0.0.0/24',
+            VpcPeeringConnectionId='pcx-1')
+        other_ec2_client.describe_route_tables()
+
+        self.assertEqual(other_fake_ec2.calls, ['DescribeRouteTables'])
+
+    def test_invalidates_both_sides_of_accepted_peering_connection(self):
+        accepter_account_id = randoms.account_id()
+        accepter_ec2_client = self.describe_cache.register(
+            build_ec2_client(self.region), accepter_account_id, self.region)
+        accepter_fake_ec2 = FakeEC2(accepter_ec2_client, {
+            'AcceptVpcPeeringConnection': {'VpcPeeringConnection': {
+                'RequesterVpcInfo': {
+                    'OwnerId': self.account_id, 'Region': self.region},
+                'AccepterVpcInfo': {
+                    'OwnerId': accepter_account_id, 'Region': self.region},
+            }},
+        })
+        self.fake_ec2.responses['DescribeVpcPeeringConnections'] = {
+            'VpcPeeringConnections': []}
+
+        self.ec2_client.describe_vpc_peering_connections()
+        accepter_ec2_client.accept_vpc_peering_connection(
+            VpcPeeringConnectionId='pcx-1')
+        self.ec2_client.describe_vpc_peering_connections()
+
+        self.assertEqual(
+            self.fake_ec2.calls,
+            ['DescribeVpcPeeringConnections',
+             'DescribeVpcPeeringConnections'])
+        self.assertEqual(
+            accepter_fake_ec2.calls, ['AcceptVpcPeeringConnection'])
+
+    def test_does_not_cache_describe_in_flight_during_mutation(self):
+        self.fake_ec2.during['DescribeRouteTables'] = \
+            lambda: self.ec2_client.create_route(
+                RouteTableId='rtb-1', DestinationCidrBlock='10.0.0.0/24',
+                VpcPeeringConnectionId='pcx-1')
+
+        self.ec2_client.describe_route_tables()
+        self.ec2_client.describe_route_tables()
+
+        self.assertEqual(
+            self.fake_ec2.calls,
+            ['DescribeRouteTables', 'CreateRoute', 'DescribeRouteTables'])
+
+    def test_bypasses_cache_when_uncached(self):
+        self.ec2_client.describe_vpcs()
+        with uncached():
+            self.ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            self.fake_ec2.calls, ['DescribeVpcs', 'DescribeVpcs'])
+
+    def test_forgets_responses_on_reset(self):
+        self.ec2_client.describe_vpcs()
+        self.describe_cache.reset()
+        self.ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            self.fake_ec2.calls, ['DescribeVpcs', 'DescribeVpcs'])
+        self.assertEqual(
+            self.describe_cache.statistics(),
+            {'DescribeVpcs': {'hits': 0, 'misses': 1, 'hit_rate': 0.0}})
@@ -1,56 +1,109 @@
+import threading
 import unittest
 import unittest.mock as mock
 
-from auto_peering.ec2_gateway import EC2Gateway
+import boto3
+
+from auto_peering.ec2_gateway import EC2Gateway, DEFAULT_CONFIG
 
 from test import randoms
 
 
+def build_session():
+    return boto3.session.Session(
+        aws_access_key_id='access-key',
+        aws_secret_access_key='secret-key')
+
+
 class TestEC2Gateway(unittest.TestCase):
-    def test_returns_ec2_client_for_region_from_session(self):
-        session = mock.Mock(name='Session')
+    def test_builds_one_ec2_client_for_region_from_session(self):
+        session = build_session()
         account_id = randoms.account_id()
         region = randoms.region()
 
-        expected_client = mock.Mock(name='EC2 Client')
-        session.client = mock.Mock(
-            name='Client',
-            return_value=expected_client)
+        with mock.patch.object(
+                session, 'client', wraps=session.client) as session_client:
+            ec2_gateway = EC2Gateway(session, account_id, region)
 
-        ec2_gateway = EC2Gateway(session, account_id, region)
+            ec2_client = ec2_gateway.client()
+            ec2_gateway.resource()
 
-        actual_client = ec2_gateway.client()
+        self.assertEqual(len(session_client.mock_calls), 1)
+        self.assertEqual(
+            ec2_client.meta.config.max_pool_connections,
+            DEFAULT_CONFIG.max_pool_connections)
+        self.assertEqual(ec2_client.meta.region_name, region)
 
-        session_client_calls = session.client.mock_calls
-        self.assertEqual(len(session_client_calls), 1)
+    def test_returns_ec2_resource_wrapping_ec2_client(self):
+        session = build_session()
+        account_id = randoms.account_id()
+        region = randoms.region()
 
-        session_client_call = session_client_calls[0]
-        self.assertEqual(
-            session_client_call,
-            mock.call('ec2', region))
+        ec2_gateway = EC2Gateway(session, account_id, region)
+
+        ec2_resource = ec2_gateway.resource()
 
-        self.assertEqual(actual_client, expected_client)
+        self.assertIs(ec2_resource.meta.client, ec2_gateway.client())
+        self.assertEqual(ec2_resource.meta.client.meta.region_name, region)
 
-    def test_returns_ec2_resource_for_region_from_session(self):
-        session = mock.Mock(name='Session')
+    def test_reuses_ec2_client_and_resource(self):
+        session = build_session()
         account_id = randoms.account_id()
         region = randoms.region()
 
-        expected_resource = mock.Mock(name='EC2 Resource')
-        session.resource = mock.Mock(
-            name='Resource',
-            return_value=expected_resource)
+        ec2_gateway = EC2Gateway(session, account_id, region)
+
+        first_client = ec2_gateway.client()
+        second_client = ec2_gateway.client()
+        first_resource = ec2_gateway.resource()
+        second_resource = ec2_gateway.resource()
+
+        self.assertIs(first_client, second_client)
+        self.assertIs(first_resource, second_resource)
+
+    def test_builds_ec2_resource_per_thread_around_shared_client(self):
+        session = build_session()
+        account_id = randoms.account_id()
+        region = randoms.region()
 
         ec2_gateway = EC2Gateway(session, account_id, region)
 
-        actual_resource = ec2_gateway.resource()
+        results = {}
 
-        session_resource_calls = session.resource.mock_calls
-        self.assertEqual(len(session_resource_calls), 1)
+        def use_gateway(name):
+            results[name] = (ec2_gateway.client(), ec2_gateway.resource())
 
-        session_resource_call = session_resource_calls[0]
-        self.assertEqual(
-            session_resource_call,
-            mock.call('ec2', region))
+        threads = [
+            threading.Thread(target=use_gateway, args=(name,))
+            for name in ['first', 'second']
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        first_client, first_resource = results['first']
+        second_client, second_resource = results['second']
+
+        self.assertIs(first_client, second_client)
+        self.assertIsNot(first_resource, second_resource)
+        self.assertIs(first_resource.meta.client, first_client)
+        self.assertIs(second_resource.meta.client, first_client)
 
-        self.assertEqual(actual_resource, expected_resource)
+    def test_registers_describe_cache_once_on_shared_ec2_client(self):
+        session = build_session()
+        describe_cache = mock.Mock(name='Describe cache')
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        ec2_gateway = EC2Gateway(
+            session, account_id, region, describe_cache=describe_cache)
+
+        ec2_client = ec2_gateway.client()
+        ec2_gateway.resource()
+        ec2_gateway.client()
+        ec2_gateway.resource()
+
+        self.assertEqual(
+            describe_cache.register.mock_calls,
+            [mock.call(ec2_client, account_id, region)])
@@ -1,3 +1,4 @@
+import threading
 import unittest
 from unittest import mock
 
@@ -97,3 +98,56 @@ class TestEC2Gateways(unittest.TestCase):
         self.assertEqual(
             ec2_gateway_instance,
             EC2Gateway(session, account_id, region))
+
+    def test_reuses_ec2_gateway_for_account_and_region(self):
+        session_store = mock.Mock(name="SessionStore")
+
+        account_id = randoms.account_id()
+        region = randoms.region()
+        session = mock.Mock(name="Session for account 1")
+
+        session_store.get_session_for = mock.Mock(
+            name="SessionStore#get_session_for",
+            return_value=session)
+
+        ec2_gateways = EC2Gateways(session_store, [account_id], [region])
+
+        first_ec2_gateway = \
+            ec2_gateways.by_account_id_and_region(account_id, region)
+        second_ec2_gateway = ec2_gateways.all()[0]
+        third_ec2_gateway = ec2_gateways.by_account_id(account_id)[0]
+
+        self.assertIs(first_ec2_gateway, second_ec2_gateway)
+        self.assertIs(first_ec2_gateway, third_ec2_gateway)
+        self.assertEqual(
+            len(session_store.get_session_for.mock_calls), 1)
+
+    def test_fetches_sessions_for_different_accounts_concurrently(self):
+        session_store = mock.Mock(name="SessionStore")
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get_session_for(account_id):
+            barrier.wait()
+            return mock.Mock(name="Session for {}".format(account_id))
+
+        session_store.get_session_for = mock.Mock(
+            name="SessionStore#get_session_for",
+            side_effect=get_session_for)
+
+        account_ids = [randoms.account_id(), randoms.account_id()]
+        region = randoms.region()
+        ec2_gateways = EC2Gateways(session_store, account_ids, [region])
+
+        threads = [
+            threading.Thread(
+                target=ec2_gateways.by_account_id_and_region,
+                args=(account_id, region))
+            for account_id in account_ids
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual(len(ec2_gateways.all()), 2)
@@ -0,0 +1,278 @@
+import unittest
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from auto_peering.ec2_gateways import EC2Gateways
+from auto_peering.session_store import SessionStore
+from benchmark.fake_aws import FakeAWS, fixed_latency
+from test import builders, randoms
+
+
+class TestFakeAWS(unittest.TestCase):
+    def setUp(self):
+        self.account_id = randoms.account_id()
+        self.peer_account_id = randoms.account_id()
+        self.region = 'eu-west-1'
+        self.peer_region = 'us-east-1'
+        self.now = 0
+        self.sleeps = []
+        self.use(FakeAWS())
+
+    def use(self, fake_aws):
+        self.fake_aws = fake_aws
+        self.session = boto3.session.Session(
+            aws_access_key_id='access-key',
+            aws_secret_access_key='secret-key',
+            region_name=self.region)
+        self.fake_aws.register(self.session.events, self.account_id)
+        self.session_store = SessionStore(
+            self.session.client('sts'), randoms.role_name(),
+            listeners=[self.fake_aws])
+        self.ec2_gateways = EC2Gateways(
+            self.session_store,
+            [self.account_id, self.peer_account_id],
+            [self.region, self.peer_region])
+
+    def use_simulated(self, **options):
+        self.use(FakeAWS(
+            clock=lambda: self.now, sleep=self.sleeps.append, **options))
+
+    def resource_for(self, account_id, region):
+        return self.ec2_gateways.by_account_id_and_region(
+            account_id, region).resource()
+
+    def test_describes_vpcs_in_calling_account_and_region(self):
+        vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24',
+            builders.build_vpc_tags(component='app'))
+        self.fake_aws.add_vpc(
+            self.peer_account_id, self.region, '10.0.1.0/24')
+
+        vpcs = list(
+            self.resource_for(self.account_id, self.region).vpcs.all())
+
+        self.assertEqual([vpc.id for vpc in vpcs], [vpc_id])
+        self.assertIn(
+            {'Key': 'Component', 'Value': 'app'}, vpcs[0].tags)
+        self.assertEqual(vpcs[0].cidr_block, '10.0.0.0/24')
+
+    def test_filters_and_paginates_vpcs(self):
+        vpc_ids = [
+            self.fake_aws.add_vpc(
+                self.account_id, self.region, '10.0.{}.0/24'.format(index),
+                builders.build_vpc_tags(
+                    component='app' if index % 2 else 'db'))
+            for index in range(12)
+        ]
+
+        vpcs = list(
+            self.resource_for(self.account_id, self.region).vpcs
+            .filter(Filters=[{'Name': 'tag:Component', 'Values': ['a*']}])
+            .page_size(5))
+
+        self.assertEqual(
+            [vpc.id for vpc in vpcs], vpc_ids[1::2])
+
+    def test_manages_peering_connection_lifecycle_across_accounts(self):
+        requester_vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24')
+        accepter_vpc_id = self.fake_aws.add_vpc(
+            self.peer_account_id, self.peer_region, '10.0.1.0/24')
+
+        requester_vpc_peering_connection = self.resource_for(
+            self.account_id, self.region).Vpc(requester_vpc_id)\
+            .request_vpc_peering_connection(
+                PeerOwnerId=self.peer_account_id,
+                PeerVpcId=accepter_vpc_id,
+                PeerRegion=self.peer_region)
+        accepter_vpc_peering_connection = self.resource_for(
+            self.peer_account_id, self.peer_region)\
+            .VpcPeeringConnection(requester_vpc_peering_connection.id)
+
+        self.assertEqual(
+            accepter_vpc_peering_connection.status['Code'],
+            'pending-acceptance')
+
+        accepter_vpc_peering_connection.accept()
+        requester_vpc_peering_connection.reload()
+
+        self.assertEqual(
+            requester_vpc_peering_connection.status['Code'], 'active')
+
+        requester_vpc_peering_connection.delete()
+
+        self.assertEqual(
+            list(self.resource_for(self.peer_account_id, self.peer_region)
+                 .vpc_peering_connections.filter(
+                     Filters=[{'Name': 'status-code',
+                               'Values': ['active']}])),
+            [])
+
+    def test_rejects_second_live_peering_connection_between_vpcs(self):
+        vpc_id_1 = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24')
+        vpc_id_2 = self.fake_aws.add_vpc(
+            self.peer_account_id, self.peer_region, '10.0.1.0/24')
+
+        vpc_peering_connection = self.resource_for(
+            self.account_id, self.region).Vpc(vpc_id_1)\
+            .request_vpc_peering_connection(
+                PeerOwnerId=self.peer_account_id,
+                PeerVpcId=vpc_id_2,
+                PeerRegion=self.peer_region)
+
+        with self.assertRaises(ClientError) as context:
+            self.resource_for(self.peer_account_id, self.peer_region)\
+                .Vpc(vpc_id_2).request_vpc_peering_connection(
+                    PeerOwnerId=self.account_id,
+                    PeerVpcId=vpc_id_1,
+                    PeerRegion=self.region)
+        self.assertEqual(
+            context.exception.response['Error']['Code'],
+            'VpcPeeringConnectionAlreadyExists')
+
+        vpc_peering_connection.delete()
+        self.resource_for(self.peer_account_id, self.peer_region)\
+            .Vpc(vpc_id_2).request_vpc_peering_connection(
+                PeerOwnerId=self.account_id,
+                PeerVpcId=vpc_id_1,
+                PeerRegion=self.region)
+
+    def test_creates_and_deletes_routes(self):
+        vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24')
+        ec2_resource = self.resource_for(self.account_id, self.region)
+        route_table = next(iter(ec2_resource.route_tables.filter(
+            Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]},
+                     {'Name': 'tag:Tier', 'Values': ['private']}])))
+
+        route_table.create_route(
+            DestinationCidrBlock='10.0.1.0/24',
+            VpcPeeringConnectionId='pcx-1')
+
+        self.assertEqual(
+            [route_table.id for route_table in ec2_resource.route_tables
+             .filter(Filters=[{'Name': 'route.vpc-peering-connection-id',
+                               'Values': ['pcx-1']}])],
+            [route_table.id])
+
+        with self.assertRaises(ClientError) as context:
+            route_table.create_route(
+                DestinationCidrBlock='10.0.1.0/24',
+                VpcPeeringConnectionId='pcx-2')
+        self.assertEqual(
+            context.exception.response['Error']['Code'],
+            'RouteAlreadyExists')
+
+        ec2_resource.Route(route_table.id, '10.0.1.0/24').delete()
+
+        self.assertEqual(
+            [route['DestinationCidrBlock']
+             for route in self.fake_aws.routes_in(vpc_id)],
+            ['10.0.0.0/24'])
+
+    def test_counts_calls_per_operation(self):
+        self.fake_aws.add_vpc(self.account_id, self.region, '10.0.0.0/24')
+
+        list(self.resource_for(self.account_id, self.region).vpcs.all())
+        list(self.resource_for(self.account_id, self.peer_region).vpcs.all())
+
+        self.assertEqual(
+            self.fake_aws.call_counts(),
+            {'AssumeRole': 1, 'DescribeVpcs': 2})
+
+    def test_injects_latency_per_region(self):
+        self.use_simulated(latencies={self.peer_region: fixed_latency(0.25)})
+        self.fake_aws.add_vpc(self.account_id, self.peer_region, '10.0.0.0/24')
+
+        list(self.resource_for(self.account_id, self.region).vpcs.all())
+        list(self.resource_for(self.account_id, self.peer_region).vpcs.all())
+
+        self.assertEqual(self.sleeps, [0.25])
+
+    def test_throttles_calls_beyond_request_limit(self):
+        self.use_simulated(request_limits={'*': (1, 2)})
+        ec2_client = self.session.client(
+            'ec2', config=Config(retries={'total_max_attempts': 1}))
+
+        ec2_client.describe_vpcs()
+        ec2_client.describe_vpcs()
+        with self.assertRaises(ClientError) as context:
+            ec2_client.describe_vpcs()
+        self.now = 1
+        ec2_client.describe_vpcs()
+
+        self.assertEqual(
+            context.exception.response['Error']['Code'],
+            'RequestLimitExceeded')
+        self.assertEqual(
+            self.fake_aws.throttle_counts(), {'DescribeVpcs': 1})
+        self.assertEqual(
+            self.fake_aws.call_counts(), {'DescribeVpcs': 4})
+
+    def test_delays_visibility_of_peering_connection_changes(self):
+        self.use_simulated(consistency_delay_seconds=5)
+        requester_vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24')
+        accepter_vpc_id = self.fake_aws.add_vpc(
+            self.peer_account_id, self.peer_region, '10.0.1.0/24')
+
+        vpc_peering_connection_id = self.resource_for(
+            self.account_id, self.region).Vpc(requester_vpc_id)\
+            .request_vpc_peering_connection(
+                PeerOwnerId=self.peer_account_id,
+                PeerVpcId=accepter_vpc_id,
+                PeerRegion=self.peer_region).id
+        accepter_resource = self.resource_for(
+            self.peer_account_id, self.peer_region)
+
+        with self.assertRaises(ClientError) as context:
+            accepter_resource.VpcPeeringConnection(
+                vpc_peering_connection_id).accept()
+        self.assertEqual(
+            context.exception.response['Error']['Code'],
+            'InvalidVpcPeeringConnectionID.NotFound')
+
+        self.now = 5
+        accepter_resource.VpcPeeringConnection(
+            vpc_peering_connection_id).accept()
+        requester_vpc_peering_connection = self.resource_for(
+            self.account_id, self.region).VpcPeeringConnection(
+            vpc_peering_connection_id)
+
+        self.assertEqual(
+            requester_vpc_peering_connection.status['Code'],
+            'pending-acceptance')
+
+        self.now = 10
+        requester_vpc_peering_connection.reload()
+
+        self.assertEqual(
+            requester_vpc_peering_connection.status['Code'], 'active')
+
+    def test_delays_visibility_of_created_routes(self):
+        self.use_simulated(consistency_delay_seconds=5)
+        vpc_id = self.fake_aws.add_vpc(
+            self.account_id, self.region, '10.0.0.0/24')
+        ec2_resource = self.resource_for(self.account_id, self.region)
+        route_table = next(iter(ec2_resource.route_tables.filter(
+            Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])))
+
+        route_table.create_route(
+            DestinationCidrBlock='10.0.1.0/24',
+            VpcPeeringConnectionId='pcx-1')
+
+        def route_tables_for_peering_connection():
+            return [
+                route_table.id for route_table in ec2_resource.route_tables
+                .filter(Filters=[{'Name': 'route.vpc-peering-connection-id',
+                                  'Values': ['pcx-1']}])]
+
+        self.assertEqual(route_tables_for_peering_connection(), [])
+
+        self.now = 5
+
+        self.assertEqual(
+            route_tables_for_peering_connection(), [route_table.id])
@@ -0,0 +1,50 @@
+import unittest
+
+from benchmark.fake_aws import FakeAWS
+from benchmark.fleets import FleetSpec, build_fleet
+
+
+class TestBuildFleet(unittest.TestCase):
+    def test_spreads_vpcs_across_accounts_and_regions(self):
+        fake_aws = FakeAWS()
+
+        fleet = build_fleet(
+            fake_aws, FleetSpec(12, accounts=3, regions=2, fan_out=2))
+
+        self.assertEqual(len(fleet.vpc_ids), 12)
+        self.assertEqual(
+            sorted(len(vpc_ids)
+                   for vpc_ids in fake_aws.vpc_ids_by_location.values()),
+            [2] * 6)
+        self.assertEqual(fleet.target_vpc_id, fleet.vpc_ids[0])
+
+    def test_gives_each_vpc_fan_out_dependencies_on_other_vpcs(self):
+        fake_aws = FakeAWS()
+
+        fleet = build_fleet(fake_aws, FleetSpec(20, fan_out=3))
+
+        for vpc_id in fleet.vpc_ids:
+            vpc = fake_aws.vpcs[vpc_id]
+            component = next(
+                tag['Value'] for tag in vpc['Tags']
+                if tag['Key'] == 'Component')
+            dependencies = next(
+                tag['Value'] for tag in vpc['Tags']
+                if tag['Key'] == 'Dependencies').split(',')
+            self.assertEqual(len(set(dependencies)), 3)
+            self.assertFalse(
+                any(dependency.startswith(component + '-')
+                    for dependency in dependencies))
+
+    def test_builds_same_fleet_for_same_seed(self):
+        first_fake_aws = FakeAWS()
+        second_fake_aws = FakeAWS()
+
+        build_fleet(first_fake_aws, FleetSpec(10, seed=7))
+        build_fleet(second_fake_aws, FleetSpec(10, seed=7))
+
+        self.assertEqual(first_fake_aws.vpcs, second_fake_aws.vpcs)
+
+    def test_rejects_fan_out_not_less_than_vpc_count(self):
+        with self.assertRaises(ValueError):
+            FleetSpec(3, fan_out=3)
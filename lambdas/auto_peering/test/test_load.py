@@ -0,0 +1,154 @@
+import logging
+import unittest
+from collections import Counter
+
+import boto3
+
+from benchmark import load
+from benchmark.fleets import FleetSpec
+from benchmark.scenarios import Environment
+from test import builders, randoms
+
+
+class TestPercentile(unittest.TestCase):
+    def test_uses_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(load.percentile(values, 50), 50)
+        self.assertEqual(load.percentile(values, 95), 95)
+        self.assertEqual(load.percentile(values, 99), 99)
+        self.assertEqual(load.percentile([3, 1, 2], 50), 2)
+
+    def test_returns_none_without_values(self):
+        self.assertIsNone(load.percentile([], 50))
+
+
+class TestRemapped(unittest.TestCase):
+    def test_maps_unknown_vpcs_onto_fleet_consistently(self):
+        environment = Environment(FleetSpec(6, accounts=2, fan_out=2))
+        account_id = randoms.account_id()
+        vpc_id_1 = randoms.vpc_id()
+        vpc_id_2 = randoms.vpc_id()
+        events = [
+            builders.build_s3_event_sns_message(
+                'ObjectCreated:Put', account_id, vpc_id_1),
+            builders.build_s3_event_sns_message(
+                'ObjectCreated:Put', account_id, vpc_id_2),
+            builders.build_s3_event_sns_message(
+                'ObjectRemoved:Delete', account_id, vpc_id_1),
+        ]
+
+        remapped_events = load.remapped(
+            events, environment.fake_aws, environment.fleet)
+
+        fleet = environment.fleet
+        self.assertEqual(remapped_events, [
+            builders.build_s3_event_sns_message(
+                'ObjectCreated:Put', fleet.account_ids[0], fleet.vpc_ids[0]),
+            builders.build_s3_event_sns_message(
+                'ObjectCreated:Put', fleet.account_ids[1], fleet.vpc_ids[1]),
+            builders.build_s3_event_sns_message(
+                'ObjectRemoved:Delete',
+                fleet.account_ids[0], fleet.vpc_ids[0]),
+        ])
+
+    def test_remaps_events_delivered_through_sqs(self):
+        environment = Environment(FleetSpec(6, accounts=2, fan_out=2))
+        account_id = randoms.account_id()
+        vpc_id = randoms.vpc_id()
+        events = [
+            builders.build_s3_event_sqs_message(
+                'ObjectCreated:Put', account_id, vpc_id, 'message-1'),
+        ]
+
+        remapped_events = load.remapped(
+            events, environment.fake_aws, environment.fleet)
+
+        fleet = environment.fleet
+        self.assertEqual(remapped_events, [
+            builders.build_s3_event_sqs_message(
+                'ObjectCreated:Put', fleet.account_ids[0], fleet.vpc_ids[0],
+                'message-1'),
+        ])
+
+
+def peering_state_of(fake_aws):
+    vpc_peering_connections = fake_aws.vpc_peering_connections.values()
+    status_codes = {
+        vpc_peering_connection['VpcPeeringConnectionId']:
+            vpc_peering_connection['Status']['Code']
+        for vpc_peering_connection in vpc_peering_connections
+    }
+    live_counts = Counter(
+        frozenset([vpc_peering_connection['RequesterVpcInfo']['VpcId'],
+                   vpc_peering_connection['AccepterVpcInfo']['VpcId']])
+        for vpc_peering_connection in vpc_peering_connections
+        if vpc_peering_connection['Status']['Code'] != 'deleted')
+    route_status_codes = Counter(
+        status_codes.get(route['VpcPeeringConnectionId'])
+        for vpc_id in fake_aws.vpcs
+        for route in fake_aws.routes_in(vpc_id)
+        if 'VpcPeeringConnectionId' in route)
+
+    return {
+        'links': len(live_counts),
+        'connections_per_link': set(live_counts.values()),
+        'connection_status_codes': set(
+            status_codes[vpc_peering_connection_id]
+            for vpc_peering_connection_id in status_codes
+        ) - {'deleted'},
+        'routes_by_connection_status_code': dict(route_status_codes),
+    }
+
+
+class TestLoadRun(unittest.TestCase):
+    def test_reports_latency_throughput_and_errors(self):
+        environment = Environment(FleetSpec(12, accounts=2, fan_out=2))
+        events = load.synthetic_events(environment.fleet, 4) + [
+            {'Records': [{'Sns': {'Message': 'not json'}}]}]
+
+        default_session = boto3.DEFAULT_SESSION
+        level = logging.getLogger().level
+
+        report = load.LoadRun(environment, events, concurrency=2).run()
+
+        self.assertIs(boto3.DEFAULT_SESSION, default_session)
+        self.assertEqual(logging.getLogger().level, level)
+
+        self.assertEqual(report['events'], 5)
+        self.assertEqual(report['errors'], 1)
+        self.assertEqual(report['errors_by_type'], {'JSONDecodeError': 1})
+        self.assertEqual(
+            set(report['latency_seconds']), {'p50', 'p95', 'p99', 'max'})
+        self.assertGreater(report['events_per_minute'], 0)
+
+    def test_converges_when_overlapping_vpcs_are_peered_concurrently(self):
+        spec = FleetSpec(12, accounts=2, fan_out=2)
+        serial_environment = Environment(spec)
+        concurrent_environment = Environment(spec)
+        fleet = concurrent_environment.fleet
+        events = [
+            builders.build_s3_event_sns_message(
+                'ObjectCreated:Put',
+                fleet.account_ids[index % len(fleet.account_ids)],
+                vpc_id)
+            for _ in range(2)
+            for index, vpc_id in enumerate(fleet.vpc_ids)
+        ]
+
+        load.LoadRun(serial_environment, events).run()
+        report = load.LoadRun(
+            concurrent_environment, events, concurrency=4).run()
+
+        serial_state = peering_state_of(serial_environment.fake_aws)
+        concurrent_state = peering_state_of(concurrent_environment.fake_aws)
+
+        self.assertEqual(report['errors'], 0)
+        self.assertEqual(report['logged_errors'], 0)
+        self.assertEqual(concurrent_state['connections_per_link'], {1})
+        self.assertEqual(
+            concurrent_state['connection_status_codes'], {'active'})
+        self.assertEqual(
+            set(concurrent_state['routes_by_connection_status_code']),
+            {'active'})
+        self.assertEqual(concurrent_state, serial_state)
@@ -0,0 +1,166 @@
+import unittest
+from unittest.mock import Mock
+
+from auto_peering.private_route_tables import PrivateRouteTables
+from auto_peering.vpc import VPC
+from test import randoms, mocks
+
+
+def build_route_table_mock(name, routes):
+    route_table = Mock(name=name)
+    route_table.id = randoms.route_table_id()
+    route_table.routes_attribute = routes
+
+    return route_table
+
+
+class TestPrivateRouteTables(unittest.TestCase):
+    def test_fetches_private_route_tables_once_per_vpc(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        route_table_1 = build_route_table_mock("Route table 1", [])
+        route_table_2 = build_route_table_mock("Route table 2", [])
+
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([route_table_1, route_table_2]))
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        first_route_tables = private_route_tables.for_vpc(vpc)
+        second_route_tables = private_route_tables.for_vpc(vpc)
+
+        ec2_gateway.resource().route_tables.filter.assert_called_once_with(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc.id]},
+                {'Name': 'tag:Tier', 'Values': ['private']}])
+        self.assertEqual(first_route_tables, [route_table_1, route_table_2])
+        self.assertEqual(second_route_tables, [route_table_1, route_table_2])
+
+    def test_fetches_private_route_tables_referencing_peering_connection(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+        peering_connection_id = randoms.peering_connection_id()
+
+        vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        route_table = build_route_table_mock("Route table", [])
+
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([route_table]))
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        route_tables = private_route_tables.referencing(
+            vpc, peering_connection_id)
+
+        ec2_gateway.resource().route_tables.filter.assert_called_once_with(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc.id]},
+                {'Name': 'tag:Tier', 'Values': ['private']},
+                {'Name': 'route.vpc-peering-connection-id',
+                 'Values': [peering_connection_id]}])
+        self.assertEqual(route_tables, [route_table])
+
+    def test_returns_existing_routes_by_destination_cidr_block(self):
+        ec2_gateways = mocks.EC2Gateways([])
+
+        cidr_block = randoms.cidr_block()
+        peering_connection_id = randoms.peering_connection_id()
+
+        route = {'DestinationCidrBlock': cidr_block,
+                 'VpcPeeringConnectionId': peering_connection_id,
+                 'State': 'active'}
+        route_table = build_route_table_mock(
+            "Route table",
+            [route, {'DestinationPrefixListId': 'pl-12345678'}])
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        self.assertEqual(
+            private_route_tables.routes_in(route_table),
+            {cidr_block: route})
+
+    def test_applies_added_and_removed_routes_locally(self):
+        ec2_gateways = mocks.EC2Gateways([])
+
+        existing_cidr_block = '10.0.0.0/24'
+        added_cidr_block = '10.0.1.0/24'
+        peering_connection_id = randoms.peering_connection_id()
+
+        route_table = build_route_table_mock(
+            "Route table",
+            [{'DestinationCidrBlock': existing_cidr_block,
+              'VpcPeeringConnectionId': randoms.peering_connection_id(),
+              'State': 'active'}])
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        private_route_tables.add_route(
+            route_table, added_cidr_block, peering_connection_id)
+        private_route_tables.remove_route(route_table, existing_cidr_block)
+
+        self.assertEqual(
+            private_route_tables.routes_in(route_table),
+            {added_cidr_block: {
+                'DestinationCidrBlock': added_cidr_block,
+                'VpcPeeringConnectionId': peering_connection_id,
+                'State': 'active'}})
+
+    def test_refreshes_routes_once_per_vpc_keeping_local_changes(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        added_cidr_block = '10.0.1.0/24'
+        concurrent_cidr_block = '10.0.2.0/24'
+        peering_connection_id = randoms.peering_connection_id()
+        concurrent_route = {
+            'DestinationCidrBlock': concurrent_cidr_block,
+            'VpcPeeringConnectionId': randoms.peering_connection_id(),
+            'State': 'active'}
+
+        route_table = build_route_table_mock("Route table", [])
+        described_route_table = build_route_table_mock(
+            "Described route table", [concurrent_route])
+        described_route_table.id = route_table.id
+
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            side_effect=[iter([route_table]),
+                         iter([described_route_table])])
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        private_route_tables.for_vpc(vpc)
+        private_route_tables.routes_in(route_table)
+        private_route_tables.add_route(
+            route_table, added_cidr_block, peering_connection_id)
+        private_route_tables.refresh(vpc)
+        private_route_tables.refresh(vpc)
+
+        self.assertEqual(
+            len(ec2_gateway.resource().route_tables.filter.mock_calls), 2)
+        self.assertEqual(
+            private_route_tables.for_vpc(vpc), [described_route_table])
+        self.assertEqual(
+            private_route_tables.routes_in(route_table),
+            {concurrent_cidr_block: concurrent_route,
+             added_cidr_block: {
+                 'DestinationCidrBlock': added_cidr_block,
+                 'VpcPeeringConnectionId': peering_connection_id,
+                 'State': 'active'}})
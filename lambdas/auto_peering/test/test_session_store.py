@@ -1,9 +1,11 @@
+import datetime
+import threading
 import unittest
 import unittest.mock as mock
 
 from auto_peering.session_store import SessionStore
 
-from test import mocks, randoms, builders
+from test import mocks, randoms, builders, responses
 
 
 class TestSessionStore(unittest.TestCase):
@@ -63,3 +65,145 @@ class TestSessionStore(unittest.TestCase):
 
         self.assertEqual(len(sts_client.assume_role.mock_calls), 1)
         self.assertEqual(first_session, second_session)
+
+    def test_evicts_least_recently_used_session_beyond_maximum(self):
+        sts_client = mocks.build_sts_client_mock()
+        peering_role_name = randoms.role_name()
+        account_1_id = randoms.account_id()
+        account_2_id = randoms.account_id()
+        account_3_id = randoms.account_id()
+
+        _, assume_role_mock = mocks.build_sts_assume_role_mock()
+
+        sts_client.assume_role = assume_role_mock
+
+        session_store = SessionStore(
+            sts_client, peering_role_name, maximum_sessions=2)
+
+        session_store.get_session_for(account_1_id)
+        session_store.get_session_for(account_2_id)
+        session_store.get_session_for(account_1_id)
+        session_store.get_session_for(account_3_id)
+        session_store.get_session_for(account_1_id)
+        session_store.get_session_for(account_2_id)
+
+        self.assertEqual(len(sts_client.assume_role.mock_calls), 4)
+
+    def test_refreshes_credentials_close_to_expiry(self):
+        sts_client = mocks.build_sts_client_mock()
+        peering_role_name = randoms.role_name()
+        account_id = randoms.account_id()
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        expiring_response = responses.sts_assume_role_response_for(
+            expiration=now + datetime.timedelta(minutes=5))
+        refreshed_response = responses.sts_assume_role_response_for(
+            expiration=now + datetime.timedelta(hours=1))
+
+        sts_client.assume_role = mock.Mock(
+            name='STS Assume Role',
+            side_effect=[expiring_response, refreshed_response])
+
+        session_store = SessionStore(sts_client, peering_role_name)
+
+        session = session_store.get_session_for(account_id)
+        credentials = session.get_credentials().get_frozen_credentials()
+
+        self.assertEqual(len(sts_client.assume_role.mock_calls), 2)
+        self.assertEqual(
+            credentials.access_key,
+            refreshed_response['Credentials']['AccessKeyId'])
+        self.assertEqual(session_store.statistics()['refreshes'], 1)
+
+    def test_counts_hits_and_misses(self):
+        sts_client = mocks.build_sts_client_mock()
+        peering_role_name = randoms.role_name()
+        account_1_id = randoms.account_id()
+        account_2_id = randoms.account_id()
+
+        _, assume_role_mock = mocks.build_sts_assume_role_mock()
+
+        sts_client.assume_role = assume_role_mock
+
+        session_store = SessionStore(sts_client, peering_role_name)
+
+        session_store.get_session_for(account_1_id)
+        session_store.get_session_for(account_1_id)
+        session_store.get_session_for(account_2_id)
+        session_store.get_session_for(account_1_id)
+
+        self.assertEqual(
+            session_store.statistics(),
+            {'hits': 2, 'misses': 2, 'refreshes': 0, 'size': 2})
+
+    def test_registers_listeners_on_created_sessions(self):
+        sts_client = mocks.build_sts_client_mock()
+        peering_role_name = randoms.role_name()
+        account_id = randoms.account_id()
+        listener = mock.Mock(name='Listener')
+
+        _, assume_role_mock = mocks.build_sts_assume_role_mock()
+
+        sts_client.assume_role = assume_role_mock
+
+        session_store = SessionStore(
+            sts_client, peering_role_name,
+            listeners=[listener])
+
+        session = session_store.get_session_for(account_id)
+        session_store.get_session_for(account_id)
+
+        self.assertEqual(
+            listener.register.mock_calls,
+            [mock.call(session.events, account_id)])
+
+
+class TestSessionStoreConcurrency(unittest.TestCase):
+    def test_assumes_roles_for_different_accounts_concurrently(self):
+        sts_client = mocks.build_sts_client_mock()
+        barrier = threading.Barrier(2, timeout=5)
+
+        def assume_role(**_):
+            barrier.wait()
+            return responses.sts_assume_role_response_for()
+
+        sts_client.assume_role = mock.Mock(side_effect=assume_role)
+
+        session_store = SessionStore(sts_client, randoms.role_name())
+
+        threads = [
+            threading.Thread(
+                target=session_store.get_session_for,
+                args=(randoms.account_id(),))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual(session_store.statistics()['size'], 2)
+
+    def test_assumes_role_once_for_concurrent_requests_for_account(self):
+        sts_client = mocks.build_sts_client_mock()
+        account_id = randoms.account_id()
+        _, assume_role_mock = mocks.build_sts_assume_role_mock()
+        sts_client.assume_role = assume_role_mock
+
+        session_store = SessionStore(sts_client, randoms.role_name())
+
+        threads = [
+            threading.Thread(
+                target=session_store.get_session_for, args=(account_id,))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(sts_client.assume_role.mock_calls), 1)
+        self.assertEqual(
+            session_store.statistics(),
+            {'hits': 7, 'misses': 1, 'refreshes': 0, 'size': 1})
@@ -0,0 +1,90 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from auto_peering.step_scheduler import StepScheduler
+
+
+class TestStepScheduler(unittest.TestCase):
+    def test_runs_steps_after_their_dependencies_with_their_values(self):
+        scheduler = StepScheduler(Mock(name="Logger"), max_workers=4)
+        order = []
+        lock = threading.Lock()
+
+        def step(name, value):
+            def run(*arguments):
+                with lock:
+                    order.append(name)
+                return value, arguments
+            return run
+
+        scheduler.add('request', step('request', 'connection'))
+        scheduler.add('wait', step('wait', 'accepter'),
+                      depends_on=['request'])
+        scheduler.add('accept', step('accept', None),
+                      depends_on=['request', 'wait'])
+        scheduler.add('route-1', step('route-1', 1), depends_on=['accept'])
+        scheduler.add('route-2', step('route-2', 2), depends_on=['accept'])
+
+        results = scheduler.run()
+
+        self.assertEqual(order[:3], ['request', 'wait', 'accept'])
+        self.assertEqual(set(order[3:]), {'route-1', 'route-2'})
+        self.assertEqual(
+            results['accept'].value,
+            (None, (('connection', ()), ('accepter', (('connection', ()),)))))
+        self.assertTrue(all(result.succeeded for result in results.values()))
+
+    def test_runs_independent_steps_concurrently(self):
+        scheduler = StepScheduler(Mock(name="Logger"), max_workers=2)
+        barrier = threading.Barrier(2, timeout=5)
+
+        scheduler.add('route-1', barrier.wait)
+        scheduler.add('route-2', barrier.wait)
+
+        results = scheduler.run()
+
+        self.assertTrue(all(result.succeeded for result in results.values()))
+
+    def test_skips_dependents_of_failed_steps(self):
+        scheduler = StepScheduler(Mock(name="Logger"))
+        error = Exception("Request failed")
+        dependent = Mock(name="Dependent")
+        independent = Mock(name="Independent", return_value='done')
+
+        def fail():
+            raise error
+
+        scheduler.add('request', fail)
+        scheduler.add('wait', dependent, depends_on=['request'])
+        scheduler.add('accept', dependent, depends_on=['wait'])
+        scheduler.add('other', independent)
+
+        results = scheduler.run()
+
+        dependent.assert_not_called()
+        self.assertEqual(results['request'].status, 'failed')
+        self.assertEqual(results['request'].error, error)
+        self.assertEqual(results['wait'].status, 'skipped')
+        self.assertEqual(results['accept'].status, 'skipped')
+        self.assertEqual(results['other'].value, 'done')
+
+    def test_records_step_timings(self):
+        times = iter([0, 1, 3])
+        scheduler = StepScheduler(
+            Mock(name="Logger"), clock=lambda: next(times))
+
+        scheduler.add('request', Mock(name="Request"))
+
+        results = scheduler.run()
+
+        self.assertEqual(
+            results['request'].timing(),
+            {'step': 'request', 'status': 'succeeded',
+             'started_at': 1, 'finished_at': 3, 'duration': 2})
+
+    def test_rejects_unknown_dependencies(self):
+        scheduler = StepScheduler(Mock(name="Logger"))
+
+        with self.assertRaises(ValueError):
+            scheduler.add('accept', Mock(), depends_on=['wait'])
@@ -0,0 +1,177 @@
+import unittest
+from unittest import mock
+
+from auto_peering.targeted_vpcs import TargetedVPCs, possible_tags_for
+from auto_peering.vpc import VPC
+
+from test import randoms, mocks, builders
+
+
+def stub_filtered_vpcs(ec2_gateway, vpc_responses):
+    filtered_vpcs = mock.Mock(name="Filtered VPCs")
+    filtered_vpcs.page_size = mock.Mock(
+        name="Paged filtered VPCs",
+        return_value=vpc_responses)
+    ec2_gateway.resource().vpcs.filter = mock.Mock(
+        name="Filter VPCs",
+        return_value=filtered_vpcs)
+
+    return filtered_vpcs
+
+
+class TestPossibleTagsFor(unittest.TestCase):
+    def test_returns_each_split_of_identifier_on_hyphens(self):
+        self.assertEqual(
+            possible_tags_for('app-network-dev-1'),
+            [('app', 'network-dev-1'),
+             ('app-network', 'dev-1'),
+             ('app-network-dev', '1')])
+
+    def test_ignores_splits_with_empty_parts(self):
+        self.assertEqual(possible_tags_for('app-'), [])
+
+
+class TestTargetedVPCs(unittest.TestCase):
+    def test_find_by_account_id_and_vpc_id_filters_on_vpc_id(self):
+        account_1_id = randoms.account_id()
+        account_2_id = randoms.account_id()
+        region_1_id = randoms.region()
+        region_2_id = randoms.region()
+
+        vpc_id = randoms.vpc_id()
+        vpc_response = mocks.build_vpc_response_mock(name="VPC", id=vpc_id)
+
+        ec2_gateway_1_1 = mocks.EC2Gateway(account_1_id, region_1_id)
+        ec2_gateway_2_1 = mocks.EC2Gateway(account_2_id, region_1_id)
+        ec2_gateway_2_2 = mocks.EC2Gateway(account_2_id, region_2_id)
+
+        ec2_gateways = mocks.EC2Gateways([
+            ec2_gateway_1_1, ec2_gateway_2_1, ec2_gateway_2_2
+        ])
+
+        stub_filtered_vpcs(ec2_gateway_2_1, [])
+        filtered_vpcs = stub_filtered_vpcs(ec2_gateway_2_2, [vpc_response])
+
+        targeted_vpcs = TargetedVPCs(ec2_gateways)
+
+        found_vpc = targeted_vpcs.find_by_account_id_and_vpc_id(
+            account_2_id, vpc_id)
+
+        ec2_gateway_2_2.resource().vpcs.filter.assert_called_with(
+            Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}])
+        filtered_vpcs.page_size.assert_called_with(1000)
+        ec2_gateway_1_1.resource().vpcs.filter.assert_not_called()
+        self.assertEqual(
+            found_vpc, VPC(vpc_response, account_2_id, region_2_id))
+
+    def test_find_dependencies_of_filters_on_component_tags(self):
+        account_id = randoms.account_id()
+        region_1_id = randoms.region()
+        region_2_id = randoms.region()
+
+        target_vpc = VPC(mocks.build_vpc_response_mock(
+            name="Target VPC",
+            tags=builders.build_vpc_tags(
+                dependencies=["thing-1-gold", "other-silver"])),
+            account_id, region_1_id)
+
+        vpc_1_response = mocks.build_vpc_response_mock(
+            name="VPC 1",
+            tags=builders.build_vpc_tags(
+                component="thing-1",
+                deployment_identifier="gold"))
+        vpc_2_response = mocks.build_vpc_response_mock(
+            name="VPC 2",
+            tags=builders.build_vpc_tags(
+                component="thing",
+                deployment_identifier="silver"))
+        vpc_3_response = mocks.build_vpc_response_mock(
+            name="VPC 3",
+            tags=builders.build_vpc_tags(
+                component="other",
+                deployment_identifier="silver"))
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_id, region_1_id)
+        ec2_gateway_2 = mocks.EC2Gateway(account_id, region_2_id)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway_1, ec2_gateway_2])
+
+        stub_filtered_vpcs(ec2_gateway_1, [vpc_1_response, vpc_2_response])
+        stub_filtered_vpcs(ec2_gateway_2, [vpc_3_response])
+
+        targeted_vpcs = TargetedVPCs(ec2_gateways)
+
+        found_vpcs = targeted_vpcs.find_dependencies_of(target_vpc)
+
+        ec2_gateway_1.resource().vpcs.filter.assert_called_with(
+            Filters=[
+                {'Name': 'tag:Component',
+                 'Values': ['other', 'thing', 'thing-1']},
+                {'Name': 'tag:DeploymentIdentifier',
+                 'Values': ['1-gold', 'gold', 'silver']}])
+        self.assertEqual(
+            found_vpcs,
+            [VPC(vpc_1_response, account_id, region_1_id),
+             VPC(vpc_3_response, account_id, region_2_id)])
+
+    def test_find_dependencies_of_makes_no_calls_without_dependencies(self):
+        account_id = randoms.account_id()
+        region_id = randoms.region()
+
+        target_vpc = VPC(mocks.build_vpc_response_mock(
+            name="Target VPC",
+            tags=builders.build_vpc_tags(dependencies=[])),
+            account_id, region_id)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region_id)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        targeted_vpcs = TargetedVPCs(ec2_gateways)
+
+        found_vpcs = targeted_vpcs.find_dependencies_of(target_vpc)
+
+        ec2_gateway.resource().vpcs.filter.assert_not_called()
+        self.assertEqual(found_vpcs, [])
+
+    def test_find_dependents_of_filters_on_dependencies_tag(self):
+        account_id = randoms.account_id()
+        region_1_id = randoms.region()
+        region_2_id = randoms.region()
+
+        target_vpc = VPC(mocks.build_vpc_response_mock(
+            name="Target VPC",
+            tags=builders.build_vpc_tags(
+                component="target",
+                deployment_identifier="default")),
+            account_id, region_1_id)
+
+        vpc_1_response = mocks.build_vpc_response_mock(
+            name="VPC 1",
+            tags=builders.build_vpc_tags(
+                dependencies=["target-default", "other-thing"]))
+        vpc_2_response = mocks.build_vpc_response_mock(
+            name="VPC 2",
+            tags=builders.build_vpc_tags(
+                dependencies=["other-target-default"]))
+        vpc_3_response = mocks.build_vpc_response_mock(
+            name="VPC 3",
+            tags=builders.build_vpc_tags(
+                dependencies=["target-default"]))
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_id, region_1_id)
+        ec2_gateway_2 = mocks.EC2Gateway(account_id, region_2_id)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway_1, ec2_gateway_2])
+
+        stub_filtered_vpcs(ec2_gateway_1, [vpc_1_response, vpc_2_response])
+        stub_filtered_vpcs(ec2_gateway_2, [vpc_3_response])
+
+        targeted_vpcs = TargetedVPCs(ec2_gateways)
+
+        found_vpcs = targeted_vpcs.find_dependents_of(target_vpc)
+
+        ec2_gateway_2.resource().vpcs.filter.assert_called_with(
+            Filters=[{'Name': 'tag:Dependencies',
+                      'Values': ['*target-default*']}])
+        self.assertEqual(
+            found_vpcs,
+            [VPC(vpc_1_response, account_id, region_1_id),
+             VPC(vpc_3_response, account_id, region_2_id)])
@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from auto_peering import tracing
+from auto_peering.concurrency import map_concurrently
+from auto_peering.tracing import (
+    Tracer,
+    NO_OP_SPAN,
+    OTLPFileExporter,
+    StdoutJSONExporter,
+    exporter_for)
+from test import randoms
+
+
+class RecordingExporter(object):
+    def __init__(self):
+        self.spans = []
+        self.flushes = 0
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class TestTracer(unittest.TestCase):
+    def test_returns_no_op_span_when_disabled(self):
+        tracer = Tracer()
+
+        with tracer.span('discover_vpcs', vpc_count=1) as span:
+            span.set_attribute('vpc_count', 2)
+
+        self.assertIs(span, NO_OP_SPAN)
+        self.assertFalse(tracer.enabled)
+
+    def test_exports_nested_spans_within_one_trace(self):
+        exporter = RecordingExporter()
+        tracer = Tracer(exporter)
+        vpc_id = randoms.vpc_id()
+
+        with tracer.span('peer_vpcs_for') as root:
+            with tracer.span('resolve_vpc_links', vpc_id=vpc_id) as child:
+                child.set_attribute('link_count', 3)
+
+        self.assertEqual(
+            [span.name for span in exporter.spans],
+            ['resolve_vpc_links', 'peer_vpcs_for'])
+        self.assertEqual(child.trace_id, root.trace_id)
+        self.assertEqual(child.parent_span_id, root.span_id)
+        self.assertIsNone(root.parent_span_id)
+        self.assertEqual(
+            child.attributes, {'vpc_id': vpc_id, 'link_count': 3})
+        self.assertEqual(exporter.flushes, 1)
+
+    def test_propagates_parent_span_to_worker_threads(self):
+        exporter = RecordingExporter()
+        tracer = Tracer(exporter)
+
+        def list_vpcs(region):
+            with tracer.span('list_vpcs', region=region) as span:
+                return span
+
+        with tracer.span('discover_vpcs') as parent:
+            spans = map_concurrently(
+                tracer.propagating(list_vpcs),
+                [randoms.region() for _ in range(4)],
+                max_workers=4)
+
+        self.assertEqual(
+            {span.parent_span_id for span in spans}, {parent.span_id})
+
+    def test_keeps_roots_of_concurrent_invocations_apart(self):
+        exporter = RecordingExporter()
+        tracer = Tracer(exporter)
+        spans = []
+
+        def invoke():
+            with tracer.span('peer_vpcs_for') as span:
+                spans.append(span)
+
+        with tracer.span('peer_vpcs_for') as root:
+            thread = threading.Thread(target=invoke)
+            thread.start()
+            thread.join()
+
+        self.assertIsNone(spans[0].parent_span_id)
+        self.assertNotEqual(spans[0].trace_id, root.trace_id)
+        self.assertEqual(exporter.flushes, 2)
+
+    def test_records_errors_on_spans(self):
+        exporter = RecordingExporter()
+        tracer = Tracer(exporter)
+
+        with self.assertRaises(ValueError):
+            with tracer.span('perform_route'):
+                raise ValueError('boom')
+
+        self.assertEqual(exporter.spans[0].status, 'error')
+        self.assertEqual(exporter.spans[0].error, "ValueError('boom')")
+
+    def test_traced_wraps_function_in_span(self):
+        exporter = RecordingExporter()
+        tracing.configure(exporter)
+        self.addCleanup(tracing.configure, None)
+
+        @tracing.traced('peer_vpcs_for')
+        def handler(value):
+            return value * 2
+
+        self.assertEqual(handler(2), 4)
+        self.assertEqual(
+            [span.name for span in exporter.spans], ['peer_vpcs_for'])
+
+
+class TestExporters(unittest.TestCase):
+    def test_stdout_exporter_writes_one_json_line_per_span(self):
+        lines = []
+        tracer = Tracer(StdoutJSONExporter(write=lines.append))
+        account_id = randoms.account_id()
+
+        with tracer.span('acquire_credentials', account_id=account_id):
+            pass
+
+        document = json.loads(lines[0])
+        self.assertEqual(document['span']['name'], 'acquire_credentials')
+        self.assertEqual(
+            document['span']['attributes'], {'account_id': account_id})
+        self.assertEqual(document['span']['status'], 'ok')
+
+    def test_otlp_file_exporter_writes_one_request_per_trace(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'traces.jsonl')
+        tracer = Tracer(OTLPFileExporter(path))
+
+        for _ in range(2):
+            with tracer.span('peer_vpcs_for'):
+                with tracer.span('discover_vpcs', vpc_count=2,
+                                 regions=['eu-west-1']):
+                    pass
+
+        with open(path) as file:
+            requests = [json.loads(line) for line in file]
+
+        self.assertEqual(len(requests), 2)
+        spans = requests[0]['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(
+            [span['name'] for span in spans],
+            ['discover_vpcs', 'peer_vpcs_for'])
+        self.assertEqual(spans[0]['parentSpanId'], spans[1]['spanId'])
+        self.assertEqual(len(spans[1]['traceId']), 32)
+        self.assertEqual(len(spans[1]['spanId']), 16)
+        self.assertEqual(spans[0]['attributes'], [
+            {'key': 'regions',
+             'value': {'arrayValue': {
+                 'values': [{'stringValue': 'eu-west-1'}]}}},
+            {'key': 'vpc_count', 'value': {'intValue': '2'}},
+        ])
+
+    def test_builds_exporters_by_name(self):
+        self.assertIsNone(exporter_for(None))
+        self.assertIsNone(exporter_for('none'))
+        self.assertIsInstance(exporter_for('stdout'), StdoutJSONExporter)
+        self.assertEqual(
+            exporter_for('otlp_file', '/tmp/traces.jsonl').path,
+            '/tmp/traces.jsonl')
+
+    def test_rejects_unknown_exporters(self):
+        with self.assertRaises(ValueError):
+            exporter_for('zipkin')
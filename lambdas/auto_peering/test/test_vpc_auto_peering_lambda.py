@@ -0,0 +1,148 @@
+import logging
+import unittest
+from unittest import mock
+
+from auto_peering.vpc_link import VPCLink
+from auto_peering.vpc_link_executor import VPCLinkFailures
+from auto_peering.vpc_peering_teardown import \
+    VPCPeeringTeardown, VPCPeeringTeardownFailures
+from test import builders
+from test.scenarios import \
+    ACCOUNTS, DESTROY, PROVISION, dependencies_scenario
+
+
+def batch_of(*events):
+    return {'Records': [
+        record
+        for event in events
+        for record in event['Records']
+    ]}
+
+
+class TestPeerVPCsFor(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.scenario = dependencies_scenario(2)
+
+    def sqs_message_for(self, index, message_id):
+        return builders.build_s3_event_sqs_message(
+            PROVISION, self.scenario.account_ids[index % ACCOUNTS],
+            self.scenario.vpc_ids[index], message_id)
+
+    def test_returns_nothing_for_sns_events(self):
+        response = self.scenario.handle(builders.build_s3_event_sns_message(
+            PROVISION, self.scenario.account_ids[0],
+            self.scenario.vpc_ids[0]))
+
+        self.assertIsNone(response)
+
+    def test_reports_no_failures_when_whole_queue_batch_succeeds(self):
+        response = self.scenario.handle(batch_of(
+            self.sqs_message_for(0, 'message-1'),
+            self.sqs_message_for(1, 'message-2')))
+
+        self.assertEqual(response, {'batchItemFailures': []})
+        self.assertEqual(
+            len(self.scenario.fake_aws.vpc_peering_connections), 2)
+
+    def test_reports_only_undecodable_messages_of_queue_batch(self):
+        malformed_message = self.sqs_message_for(1, 'message-2')
+        malformed_message['Records'][0]['body'] = 'not json'
+
+        response = self.scenario.handle(batch_of(
+            self.sqs_message_for(0, 'message-1'),
+            malformed_message))
+
+        self.assertEqual(
+            response,
+            {'batchItemFailures': [{'itemIdentifier': 'message-2'}]})
+        self.assertEqual(
+            len(self.scenario.fake_aws.vpc_peering_connections), 2)
+
+    def test_reports_only_unprocessable_messages_of_queue_batch(self):
+        self.scenario.handle({'Records': []})
+        peer_vpc_for = self.scenario.handler.peer_vpc_for
+
+        def failing_for_second_vpc(vpc_lifecycle_event, *args):
+            if vpc_lifecycle_event.vpc_id == self.scenario.vpc_ids[1]:
+                raise RuntimeError('Failed.')
+            return peer_vpc_for(vpc_lifecycle_event, *args)
+
+        with mock.patch.object(
+                self.scenario.handler, 'peer_vpc_for',
+                side_effect=failing_for_second_vpc):
+            response = self.scenario.handle(batch_of(
+                self.sqs_message_for(0, 'message-1'),
+                self.sqs_message_for(1, 'message-2')))
+
+        self.assertEqual(
+            response,
+            {'batchItemFailures': [{'itemIdentifier': 'message-2'}]})
+        self.assertEqual(
+            len(self.scenario.fake_aws.vpc_peering_connections), 2)
+
+    def test_raises_failures_of_sns_events(self):
+        event = builders.build_s3_event_sns_message(
+            PROVISION, self.scenario.account_ids[0],
+            self.scenario.vpc_ids[0])
+        event['Records'][0]['Sns']['Message'] = 'not json'
+
+        with self.assertRaises(ValueError):
+            self.scenario.handle(event)
+
+    def test_raises_failures_of_links_of_sns_events_after_attempting_all(self):
+        with mock.patch.object(
+                VPCLink, 'perform', autospec=True,
+                side_effect=RuntimeError('Failed.')) as perform:
+            with self.assertRaises(VPCLinkFailures) as context:
+                self.scenario.handle(builders.build_s3_event_sns_message(
+                    PROVISION, self.scenario.account_ids[0],
+                    self.scenario.vpc_ids[0]))
+
+        self.assertEqual(len(perform.mock_calls), 2)
+        self.assertEqual(len(context.exception.vpc_link_outcomes), 2)
+
+    def test_raises_failures_to_destroy_peering_connections_quickly(self):
+        self.scenario.environment['AWS_DESTROY_MODE'] = 'fast'
+        self.scenario.handle(builders.build_s3_event_sns_message(
+            PROVISION, self.scenario.account_ids[0],
+            self.scenario.vpc_ids[0]))
+
+        with mock.patch.object(
+                VPCPeeringTeardown, 'destroy_for', autospec=True,
+                return_value=(['pcx-1'], ['pcx-3', 'pcx-2'])):
+            with self.assertRaises(VPCPeeringTeardownFailures) as context:
+                self.scenario.handle(builders.build_s3_event_sns_message(
+                    DESTROY, self.scenario.account_ids[0],
+                    self.scenario.vpc_ids[0]))
+
+        self.assertEqual(context.exception.vpc_id, self.scenario.vpc_ids[0])
+        self.assertEqual(
+            context.exception.vpc_peering_connection_ids,
+            ['pcx-2', 'pcx-3'])
+
+    def test_reports_messages_of_queue_batch_whose_links_fail(self):
+        peer_vpc_id = self.scenario.vpc_ids[1]
+
+        def perform(vpc_link, action):
+            if peer_vpc_id in [vpc.id for vpc in vpc_link.between]:
+                raise RuntimeError('Failed.')
+            return perform.original(vpc_link, action)
+
+        perform.original = VPCLink.perform
+        with mock.patch.object(
+                VPCLink, 'perform', autospec=True, side_effect=perform):
+            response = self.scenario.handle(batch_of(
+                self.sqs_message_for(0, 'message-1'),
+                self.sqs_message_for(2, 'message-2')))
+
+        self.assertEqual(
+            response,
+            {'batchItemFailures': [{'itemIdentifier': 'message-1'}]})
+        self.assertEqual(
+            self.scenario.active_vpc_peering_connection_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from auto_peering.vpc import VPC
+from auto_peering.vpc_index import VPCIndex
+
+from test import randoms, mocks, builders
+
+
+def build_vpc(account_id=None, region=None, **kwargs):
+    return VPC(
+        mocks.build_vpc_response_mock(**kwargs),
+        account_id or randoms.account_id(),
+        region or randoms.region())
+
+
+class TestVPCIndex(unittest.TestCase):
+    def test_finds_vpc_by_account_id_and_vpc_id(self):
+        account_id = randoms.account_id()
+        vpc_id = randoms.vpc_id()
+
+        vpc_1 = build_vpc(account_id=account_id)
+        vpc_2 = build_vpc(account_id=account_id, id=vpc_id)
+        vpc_3 = build_vpc(id=vpc_id)
+
+        vpc_index = VPCIndex([vpc_1, vpc_2, vpc_3])
+
+        self.assertEqual(
+            vpc_index.find_by_account_id_and_vpc_id(account_id, vpc_id),
+            vpc_2)
+        self.assertIsNone(
+            vpc_index.find_by_account_id_and_vpc_id(
+                account_id, randoms.vpc_id()))
+
+    def test_finds_first_vpc_by_component_instance_identifier(self):
+        vpc_1 = build_vpc(tags=builders.build_vpc_tags(
+            component='thing1', deployment_identifier='gold'))
+        vpc_2 = build_vpc(tags=builders.build_vpc_tags(
+            component='thing2', deployment_identifier='silver'))
+        vpc_3 = build_vpc(tags=builders.build_vpc_tags(
+            component='thing2', deployment_identifier='silver'))
+
+        vpc_index = VPCIndex([vpc_1, vpc_2, vpc_3])
+
+        self.assertEqual(
+            vpc_index.find_by_component_instance_identifier('thing2-silver'),
+            vpc_2)
+        self.assertIsNone(
+            vpc_index.find_by_component_instance_identifier('thing3-bronze'))
+
+    def test_finds_dependents_of_vpc(self):
+        target_vpc = build_vpc(tags=builders.build_vpc_tags(
+            component='target', deployment_identifier='default'))
+        vpc_1 = build_vpc(tags=builders.build_vpc_tags(
+            dependencies=['target-default', 'target-default']))
+        vpc_2 = build_vpc(tags=builders.build_vpc_tags(
+            dependencies=['other-thing']))
+        vpc_3 = build_vpc(tags=builders.build_vpc_tags(
+            dependencies=['other-thing', 'target-default']))
+
+        vpc_index = VPCIndex([target_vpc, vpc_1, vpc_2, vpc_3])
+
+        self.assertEqual(
+            vpc_index.find_dependents_of(target_vpc),
+            [vpc_1, vpc_3])
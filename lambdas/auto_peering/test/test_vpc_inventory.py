@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+from auto_peering.vpc import VPC
+from auto_peering.vpc_inventory import VPCInventory
+
+from test import randoms, mocks
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class TestVPCInventory(unittest.TestCase):
+    def test_lists_vpcs_for_ec2_gateway(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc_response = mocks.build_vpc_response_mock()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateway.resource().vpcs.all = mock.Mock(
+            name="All VPCs",
+            return_value=[vpc_response])
+
+        vpc_inventory = VPCInventory(ttl_seconds=60)
+
+        found_vpcs = vpc_inventory.vpcs_for(ec2_gateway)
+
+        self.assertEqual(found_vpcs, [VPC(vpc_response, account_id, region)])
+
+    def test_reuses_vpcs_within_ttl(self):
+        clock = Clock()
+        ec2_gateway = mocks.EC2Gateway(randoms.account_id(), randoms.region())
+        ec2_gateway.resource().vpcs.all = mock.Mock(
+            name="All VPCs",
+            return_value=[mocks.build_vpc_response_mock()])
+
+        vpc_inventory = VPCInventory(ttl_seconds=60, clock=clock)
+
+        first_vpcs = vpc_inventory.vpcs_for(ec2_gateway)
+        clock.now = 59
+        second_vpcs = vpc_inventory.vpcs_for(ec2_gateway)
+
+        self.assertEqual(len(ec2_gateway.resource().vpcs.all.mock_calls), 1)
+        self.assertEqual(first_vpcs, second_vpcs)
+
+    def test_relists_vpcs_once_ttl_has_elapsed(self):
+        clock = Clock()
+        ec2_gateway = mocks.EC2Gateway(randoms.account_id(), randoms.region())
+        ec2_gateway.resource().vpcs.all = mock.Mock(
+            name="All VPCs",
+            return_value=[mocks.build_vpc_response_mock()])
+
+        vpc_inventory = VPCInventory(ttl_seconds=60, clock=clock)
+
+        vpc_inventory.vpcs_for(ec2_gateway)
+        clock.now = 60
+        vpc_inventory.vpcs_for(ec2_gateway)
+
+        self.assertEqual(len(ec2_gateway.resource().vpcs.all.mock_calls), 2)
+
+    def test_does_not_cache_when_ttl_is_zero(self):
+        ec2_gateway = mocks.EC2Gateway(randoms.account_id(), randoms.region())
+        ec2_gateway.resource().vpcs.all = mock.Mock(
+            name="All VPCs",
+            return_value=[])
+
+        vpc_inventory = VPCInventory()
+
+        vpc_inventory.vpcs_for(ec2_gateway)
+        vpc_inventory.vpcs_for(ec2_gateway)
+
+        self.assertEqual(len(ec2_gateway.resource().vpcs.all.mock_calls), 2)
+
+    def test_relists_vpcs_for_invalidated_account(self):
+        account_1_id = randoms.account_id()
+        account_2_id = randoms.account_id()
+        region = randoms.region()
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_1_id, region)
+        ec2_gateway_2 = mocks.EC2Gateway(account_2_id, region)
+        for ec2_gateway in [ec2_gateway_1, ec2_gateway_2]:
+            ec2_gateway.resource().vpcs.all = mock.Mock(
+                name="All VPCs",
+                return_value=[])
+
+        vpc_inventory = VPCInventory(ttl_seconds=60)
+
+        vpc_inventory.vpcs_for(ec2_gateway_1)
+        vpc_inventory.vpcs_for(ec2_gateway_2)
+        vpc_inventory.invalidate(account_1_id)
+        vpc_inventory.vpcs_for(ec2_gateway_1)
+        vpc_inventory.vpcs_for(ec2_gateway_2)
+
+        self.assertEqual(len(ec2_gateway_1.resource().vpcs.all.mock_calls), 2)
+        self.assertEqual(len(ec2_gateway_2.resource().vpcs.all.mock_calls), 1)
+
+    def test_removes_vpcs_in_place(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        removed_vpc_response = mocks.build_vpc_response_mock()
+        retained_vpc_response = mocks.build_vpc_response_mock()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateway.resource().vpcs.all = mock.Mock(
+            name="All VPCs",
+            return_value=[removed_vpc_response, retained_vpc_response])
+
+        vpc_inventory = VPCInventory(ttl_seconds=60)
+
+        vpc_inventory.vpcs_for(ec2_gateway)
+        vpc_inventory.remove(
+            VPC(removed_vpc_response, account_id, region))
+        vpcs_after_remove = vpc_inventory.vpcs_for(ec2_gateway)
+
+        self.assertEqual(
+            vpcs_after_remove,
+            [VPC(retained_vpc_response, account_id, region)])
+        self.assertEqual(len(ec2_gateway.resource().vpcs.all.mock_calls), 1)
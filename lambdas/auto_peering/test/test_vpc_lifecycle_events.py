@@ -0,0 +1,179 @@
+import unittest
+import json
+
+from auto_peering.vpc_lifecycle_events import VPCLifecycleEvent, decode
+
+
+def s3_event_for(event_name, key, *other_keys):
+    return {'Records': [
+        {'eventName': event_name, 's3': {'object': {'key': key}}}
+        for key in (key,) + other_keys
+    ]}
+
+
+def sns_message_containing(*s3_events):
+    return {'Records': [
+        {'Sns': {'MessageId': 'sns-{}'.format(index),
+                 'Message': json.dumps(s3_event)}}
+        for index, s3_event in enumerate(s3_events)
+    ]}
+
+
+def sqs_message_containing(*s3_events):
+    return {'Records': [
+        {'messageId': 'sqs-{}'.format(index),
+         'body': json.dumps({'Type': 'Notification',
+                             'Message': json.dumps(s3_event)})}
+        for index, s3_event in enumerate(s3_events)
+    ]}
+
+
+def decode_one(event):
+    vpc_lifecycle_events = list(decode(event))
+    assert len(vpc_lifecycle_events) == 1
+    return vpc_lifecycle_events[0]
+
+
+class TestDecode(unittest.TestCase):
+    def test_has_action_create_when_event_represents_create(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.action, 'provision')
+
+    def test_has_action_destroy_when_event_represents_destroy(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectRemoved:Delete',
+                         'vpc-existence/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.action, 'destroy')
+
+    def test_has_action_unknown_when_event_name_is_not_recognised(self):
+        event = sns_message_containing(
+            s3_event_for('ReducedRedundancyLostObject',
+                         'vpc-created/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.action, 'unknown')
+
+    def test_has_type_extracted_from_object_key(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.type, 'vpc-existence')
+
+    def test_has_account_id_extracted_from_object_key(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.account_id, '111122223333')
+
+    def test_has_vpc_id_extracted_from_object_key(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-4e1ed427'))
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.vpc_id, 'vpc-4e1ed427')
+
+    def test_decodes_every_s3_record_of_every_sns_record(self):
+        event = sns_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-1',
+                         'vpc-existence/111122223333/vpc-2'),
+            s3_event_for('ObjectRemoved:Delete',
+                         'vpc-existence/444455556666/vpc-3'))
+
+        self.assertEqual(list(decode(event)), [
+            VPCLifecycleEvent(
+                'ObjectCreated:Put', 'vpc-existence/111122223333/vpc-1',
+                message_id='sns-0'),
+            VPCLifecycleEvent(
+                'ObjectCreated:Put', 'vpc-existence/111122223333/vpc-2',
+                message_id='sns-0'),
+            VPCLifecycleEvent(
+                'ObjectRemoved:Delete', 'vpc-existence/444455556666/vpc-3',
+                message_id='sns-1'),
+        ])
+
+    def test_decodes_sns_notifications_delivered_through_sqs(self):
+        event = sqs_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-1'),
+            s3_event_for('ObjectRemoved:Delete',
+                         'vpc-existence/111122223333/vpc-2'))
+
+        self.assertEqual(
+            [(vpc_lifecycle_event.message_id, vpc_lifecycle_event.action,
+              vpc_lifecycle_event.vpc_id)
+             for vpc_lifecycle_event in decode(event)],
+            [('sqs-0', 'provision', 'vpc-1'), ('sqs-1', 'destroy', 'vpc-2')])
+
+    def test_decodes_raw_s3_events_delivered_through_sqs(self):
+        event = {'Records': [{
+            'messageId': 'sqs-0',
+            'body': json.dumps(s3_event_for(
+                'ObjectCreated:Put', 'vpc-existence/111122223333/vpc-1'))
+        }]}
+
+        vpc_lifecycle_event = decode_one(event)
+
+        self.assertEqual(vpc_lifecycle_event.vpc_id, 'vpc-1')
+
+    def test_decodes_nothing_from_s3_test_events(self):
+        event = sns_message_containing({'Event': 's3:TestEvent'})
+
+        self.assertEqual(list(decode(event)), [])
+
+    def test_reports_undecodable_records_and_decodes_the_rest(self):
+        event = sqs_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-1'),
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-2'))
+        event['Records'][0]['body'] = 'not json'
+        failures = []
+
+        vpc_lifecycle_events = list(decode(
+            event,
+            on_failure=lambda record, error: failures.append(
+                (record['messageId'], type(error)))))
+
+        self.assertEqual(
+            [vpc_lifecycle_event.vpc_id
+             for vpc_lifecycle_event in vpc_lifecycle_events],
+            ['vpc-2'])
+        self.assertEqual(failures, [('sqs-0', json.JSONDecodeError)])
+
+    def test_raises_on_undecodable_record_without_failure_handler(self):
+        event = sqs_message_containing(
+            s3_event_for('ObjectCreated:Put',
+                         'vpc-existence/111122223333/vpc-1'))
+        event['Records'][0]['body'] = 'not json'
+
+        with self.assertRaises(json.JSONDecodeError):
+            list(decode(event))
+
+    def test_is_immutable(self):
+        vpc_lifecycle_event = VPCLifecycleEvent(
+            'ObjectCreated:Put', 'vpc-existence/111122223333/vpc-1')
+
+        with self.assertRaises(AttributeError):
+            vpc_lifecycle_event.vpc_id = 'vpc-2'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, call
 
 from auto_peering.vpc_peering_relationship import VPCPeeringRelationship
 from auto_peering.vpc_peering_route import VPCPeeringRoute
@@ -61,3 +61,55 @@ class TestVPCLink(unittest.TestCase):
                     between=[vpc2, vpc1],
                     peering_relationship=vpc_peering_relationship)
             ])
+
+    def test_provisions_relationship_before_routes(self):
+        vpc1 = mocks.build_vpc_response_mock(name="VPC 1")
+        vpc2 = mocks.build_vpc_response_mock(name="VPC 2")
+
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        ec2_gateways = mocks.EC2Gateways([mocks.EC2Gateway(account_id, region)])
+        logger = Mock(name="Logger")
+
+        vpc_link = VPCLink(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            routes=[[vpc1, vpc2]])
+
+        steps = Mock(name="Steps")
+        vpc_link.peering_relationship.perform = steps.relationship
+        vpc_link.peering_routes[0].perform = steps.route
+
+        vpc_link.perform('provision')
+
+        self.assertEqual(
+            steps.mock_calls,
+            [call.relationship('provision'), call.route('provision')])
+
+    def test_destroys_routes_before_relationship(self):
+        vpc1 = mocks.build_vpc_response_mock(name="VPC 1")
+        vpc2 = mocks.build_vpc_response_mock(name="VPC 2")
+
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        ec2_gateways = mocks.EC2Gateways([mocks.EC2Gateway(account_id, region)])
+        logger = Mock(name="Logger")
+
+        vpc_link = VPCLink(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            routes=[[vpc1, vpc2]])
+
+        steps = Mock(name="Steps")
+        vpc_link.peering_relationship.perform = steps.relationship
+        vpc_link.peering_routes[0].perform = steps.route
+
+        vpc_link.perform('destroy')
+
+        self.assertEqual(
+            steps.mock_calls,
+            [call.route('destroy'), call.relationship('destroy')])
@@ -0,0 +1,364 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, ANY
+
+from auto_peering.vpc_link_executor import VPCLinkExecutor
+from test import randoms, mocks
+
+
+def build_vpc_link_mock(account_id_1, account_id_2, perform=None):
+    vpc1 = mocks.build_vpc_response_mock(name="VPC 1")
+    vpc1.account_id = account_id_1
+    vpc2 = mocks.build_vpc_response_mock(name="VPC 2")
+    vpc2.account_id = account_id_2
+
+    vpc_link = Mock(name="VPC link")
+    vpc_link.between = [vpc1, vpc2]
+    vpc_link.perform = Mock(side_effect=perform)
+    vpc_link.peering_relationship.accepter_vpc_of = Mock(return_value=vpc2)
+
+    return vpc_link
+
+
+class ConcurrencyTracker(object):
+    def __init__(self):
+        self.current = 0
+        self.maximum = 0
+        self.lock = threading.Lock()
+
+    def perform(self, _):
+        with self.lock:
+            self.current += 1
+            self.maximum = max(self.maximum, self.current)
+        time.sleep(0.02)
+        with self.lock:
+            self.current -= 1
+
+
+class TestVPCLinkExecutor(unittest.TestCase):
+    def test_performs_action_on_every_vpc_link(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+
+        vpc_link_1 = build_vpc_link_mock(account_id, account_id)
+        vpc_link_2 = build_vpc_link_mock(account_id, account_id)
+
+        executor = VPCLinkExecutor(logger, max_workers=2)
+
+        outcomes = executor.execute([vpc_link_1, vpc_link_2], 'provision')
+
+        vpc_link_1.perform.assert_called_once_with('provision')
+        vpc_link_2.perform.assert_called_once_with('provision')
+        self.assertEqual(
+            [outcome.vpc_link for outcome in outcomes],
+            [vpc_link_1, vpc_link_2])
+        self.assertTrue(all(outcome.succeeded for outcome in outcomes))
+
+    def test_continues_after_failing_vpc_link_and_records_error(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+
+        error = Exception("Peering failed")
+        vpc_link_1 = build_vpc_link_mock(
+            account_id, account_id, perform=error)
+        vpc_link_2 = build_vpc_link_mock(account_id, account_id)
+
+        executor = VPCLinkExecutor(logger, max_workers=2)
+
+        outcomes = executor.execute([vpc_link_1, vpc_link_2], 'destroy')
+
+        vpc_link_2.perform.assert_called_once_with('destroy')
+        self.assertFalse(outcomes[0].succeeded)
+        self.assertEqual(outcomes[0].error, error)
+        self.assertTrue(outcomes[1].succeeded)
+
+    def test_limits_concurrent_vpc_links(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+        tracker = ConcurrencyTracker()
+
+        vpc_links = [
+            build_vpc_link_mock(
+                randoms.account_id(), account_id, perform=tracker.perform)
+            for _ in range(6)
+        ]
+
+        executor = VPCLinkExecutor(logger, max_workers=3)
+
+        executor.execute(vpc_links, 'provision')
+
+        self.assertLessEqual(tracker.maximum, 3)
+
+    def test_limits_concurrent_vpc_links_per_account(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+        tracker = ConcurrencyTracker()
+
+        vpc_links = [
+            build_vpc_link_mock(
+                account_id, account_id, perform=tracker.perform)
+            for _ in range(6)
+        ]
+
+        executor = VPCLinkExecutor(
+            logger, max_workers=6, max_workers_per_account=2)
+
+        executor.execute(vpc_links, 'provision')
+
+        self.assertLessEqual(tracker.maximum, 2)
+
+
+class TestVPCLinkExecutorProvisionBatched(unittest.TestCase):
+    def build_requesting_vpc_link_mock(self, accepted=True):
+        account_id = randoms.account_id()
+        vpc_link = build_vpc_link_mock(account_id, account_id)
+
+        requester_vpc_peering_connection = Mock(name='Requested connection')
+        requester_vpc_peering_connection.id = randoms.peering_connection_id()
+
+        vpc_link.peering_relationship.request_unless_established = Mock(
+            return_value=requester_vpc_peering_connection)
+        vpc_link.peering_relationship.accept = Mock(return_value=accepted)
+        vpc_link.perform_routes = Mock(return_value=[None])
+
+        return vpc_link, requester_vpc_peering_connection
+
+    def test_requests_all_then_waits_together_then_routes(self):
+        logger = Mock(name="Logger")
+
+        vpc_link_1, connection_1 = self.build_requesting_vpc_link_mock()
+        vpc_link_2, connection_2 = self.build_requesting_vpc_link_mock()
+
+        acceptor_connection_1 = Mock(name='Acceptor connection 1')
+        acceptor_connection_1.id = connection_1.id
+        acceptor_connection_2 = Mock(name='Acceptor connection 2')
+        acceptor_connection_2.id = connection_2.id
+
+        def wait_for(pending, on_available):
+            self.assertEqual(
+                pending,
+                [(vpc_link_1.between[1], connection_1.id),
+                 (vpc_link_2.between[1], connection_2.id)])
+            vpc_link_1.peering_relationship.request_unless_established\
+                .assert_called_once()
+            vpc_link_2.peering_relationship.request_unless_established\
+                .assert_called_once()
+            on_available(acceptor_connection_2)
+            on_available(acceptor_connection_1)
+            return set()
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(side_effect=wait_for)
+
+        executor = VPCLinkExecutor(logger, max_workers=2)
+
+        outcomes = executor.provision_batched(
+            [vpc_link_1, vpc_link_2], waiter)
+
+        waiter.wait_for.assert_called_once()
+        vpc_link_1.peering_relationship.accept.assert_called_once_with(
+            connection_1, acceptor_connection_1)
+        vpc_link_2.peering_relationship.accept.assert_called_once_with(
+            connection_2, acceptor_connection_2)
+        vpc_link_1.perform_routes.assert_called_once_with('provision')
+        vpc_link_2.perform_routes.assert_called_once_with('provision')
+        self.assertEqual(
+            [outcome.vpc_link for outcome in outcomes],
+            [vpc_link_1, vpc_link_2])
+        self.assertTrue(all(outcome.succeeded for outcome in outcomes))
+
+    def test_routes_established_links_without_waiting(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, _ = self.build_requesting_vpc_link_mock()
+        vpc_link.peering_relationship.request_unless_established = Mock(
+            return_value=None)
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(return_value=set())
+
+        executor = VPCLinkExecutor(logger)
+
+        outcomes = executor.provision_batched([vpc_link], waiter)
+
+        waiter.wait_for.assert_called_once_with([], ANY)
+        vpc_link.peering_relationship.accept.assert_not_called()
+        vpc_link.perform_routes.assert_called_once_with('provision')
+        self.assertTrue(outcomes[0].succeeded)
+
+    def test_abandons_connections_that_never_become_available(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, connection = self.build_requesting_vpc_link_mock()
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(return_value={connection.id})
+
+        executor = VPCLinkExecutor(logger)
+
+        outcomes = executor.provision_batched([vpc_link], waiter)
+
+        vpc_link.peering_relationship.abandon.assert_called_once_with(
+            connection)
+        vpc_link.perform_routes.assert_not_called()
+        self.assertFalse(outcomes[0].succeeded)
+
+    def test_skips_routes_when_connection_not_accepted(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, connection = self.build_requesting_vpc_link_mock(
+            accepted=False)
+
+        acceptor_connection = Mock(name='Acceptor connection')
+        acceptor_connection.id = connection.id
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(
+            side_effect=lambda pending, on_available: (
+                on_available(acceptor_connection), set())[1])
+
+        executor = VPCLinkExecutor(logger)
+
+        outcomes = executor.provision_batched([vpc_link], waiter)
+
+        vpc_link.perform_routes.assert_not_called()
+        self.assertFalse(outcomes[0].succeeded)
+
+
+class TestVPCLinkExecutorProvisionScheduled(unittest.TestCase):
+    def build_vpc_link_with_routes_mock(self, accepted=True,
+                                        account_id=None):
+        account_id = account_id or randoms.account_id()
+        vpc_link = build_vpc_link_mock(account_id, account_id)
+        vpc1, vpc2 = vpc_link.between
+
+        requester_vpc_peering_connection = Mock(name='Requested connection')
+        requester_vpc_peering_connection.id = randoms.peering_connection_id()
+
+        vpc_link.peering_relationship.request_unless_established = Mock(
+            return_value=requester_vpc_peering_connection)
+        vpc_link.peering_relationship.accept = Mock(return_value=accepted)
+
+        route_1 = Mock(name='Route 1', vpc1=vpc1, vpc2=vpc2)
+        route_2 = Mock(name='Route 2', vpc1=vpc2, vpc2=vpc1)
+        vpc_link.peering_routes = [route_1, route_2]
+
+        return vpc_link, requester_vpc_peering_connection
+
+    def test_requests_waits_accepts_and_routes_each_link(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, connection = self.build_vpc_link_with_routes_mock()
+        acceptor_connection = Mock(name='Acceptor connection')
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(
+            side_effect=lambda pending, on_available: (
+                on_available(acceptor_connection), set())[1])
+
+        executor = VPCLinkExecutor(logger, max_workers=4)
+
+        outcomes = executor.provision_scheduled([vpc_link], waiter)
+
+        waiter.wait_for.assert_called_once()
+        self.assertEqual(
+            waiter.wait_for.call_args.args[0],
+            [(vpc_link.between[1], connection.id)])
+        vpc_link.peering_relationship.accept.assert_called_once_with(
+            connection, acceptor_connection)
+        for peering_route in vpc_link.peering_routes:
+            peering_route.perform.assert_called_once_with('provision')
+        self.assertTrue(outcomes[0].succeeded)
+
+    def test_fails_link_and_skips_routes_when_not_accepted(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, _ = self.build_vpc_link_with_routes_mock(accepted=False)
+        other_vpc_link, _ = self.build_vpc_link_with_routes_mock()
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(
+            side_effect=lambda pending, on_available: (
+                on_available(Mock(name='Acceptor connection')), set())[1])
+
+        executor = VPCLinkExecutor(logger, max_workers=4)
+
+        outcomes = executor.provision_scheduled(
+            [vpc_link, other_vpc_link], waiter)
+
+        for peering_route in vpc_link.peering_routes:
+            peering_route.perform.assert_not_called()
+        for peering_route in other_vpc_link.peering_routes:
+            peering_route.perform.assert_called_once_with('provision')
+        self.assertFalse(outcomes[0].succeeded)
+        self.assertTrue(outcomes[1].succeeded)
+
+    def test_abandons_connection_that_never_becomes_available(self):
+        logger = Mock(name="Logger")
+
+        vpc_link, connection = self.build_vpc_link_with_routes_mock()
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(return_value={connection.id})
+
+        executor = VPCLinkExecutor(logger)
+
+        outcomes = executor.provision_scheduled([vpc_link], waiter)
+
+        vpc_link.peering_relationship.abandon.assert_called_once_with(
+            connection)
+        vpc_link.peering_relationship.accept.assert_not_called()
+        self.assertFalse(outcomes[0].succeeded)
+
+    def test_limits_concurrent_steps_per_account(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+        tracker = ConcurrencyTracker()
+
+        vpc_links = []
+        for _ in range(6):
+            vpc_link, _ = self.build_vpc_link_with_routes_mock(
+                account_id=account_id)
+            for peering_route in vpc_link.peering_routes:
+                peering_route.perform = Mock(side_effect=tracker.perform)
+            vpc_links.append(vpc_link)
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(
+            side_effect=lambda pending, on_available: (
+                on_available(Mock(name='Acceptor connection')), set())[1])
+
+        executor = VPCLinkExecutor(
+            logger, max_workers=6, max_workers_per_account=2)
+
+        outcomes = executor.provision_scheduled(vpc_links, waiter)
+
+        self.assertTrue(all(outcome.succeeded for outcome in outcomes))
+        self.assertEqual(tracker.maximum, 2)
+
+    def test_does_not_hold_per_account_limits_while_waiting(self):
+        account_id = randoms.account_id()
+        logger = Mock(name="Logger")
+
+        vpc_links = [
+            self.build_vpc_link_with_routes_mock(account_id=account_id)[0]
+            for _ in range(2)
+        ]
+
+        waiting = threading.Barrier(2, timeout=1)
+
+        def wait_for(pending, on_available):
+            waiting.wait()
+            on_available(Mock(name='Acceptor connection'))
+            return set()
+
+        waiter = Mock(name="Waiter")
+        waiter.wait_for = Mock(side_effect=wait_for)
+
+        executor = VPCLinkExecutor(
+            logger, max_workers=2, max_workers_per_account=1)
+
+        outcomes = executor.provision_scheduled(vpc_links, waiter)
+
+        self.assertTrue(all(outcome.succeeded for outcome in outcomes))
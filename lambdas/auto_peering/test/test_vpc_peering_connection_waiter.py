@@ -0,0 +1,145 @@
+import unittest
+from unittest.mock import Mock
+
+from auto_peering.vpc import VPC
+from auto_peering.vpc_peering_connection_waiter import \
+    VPCPeeringConnectionWaiter
+from test import randoms, mocks
+
+
+def build_vpc_peering_connection_mock(vpc_peering_connection_id,
+                                      status_code='pending-acceptance'):
+    vpc_peering_connection = Mock(name='VPC peering connection')
+    vpc_peering_connection.id = vpc_peering_connection_id
+    vpc_peering_connection.status = {'Code': status_code}
+
+    return vpc_peering_connection
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestVPCPeeringConnectionWaiter(unittest.TestCase):
+    def test_polls_all_pending_connections_per_accepter_location(self):
+        account_id = randoms.account_id()
+        region_1 = 'eu-west-1'
+        region_2 = 'eu-west-2'
+
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region_1)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region_2)
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_id, region_1)
+        ec2_gateway_2 = mocks.EC2Gateway(account_id, region_2)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway_1, ec2_gateway_2])
+
+        id_1 = randoms.peering_connection_id()
+        id_2 = randoms.peering_connection_id()
+        id_3 = randoms.peering_connection_id()
+
+        connection_1 = build_vpc_peering_connection_mock(id_1)
+        connection_2 = build_vpc_peering_connection_mock(id_2)
+        connection_3 = build_vpc_peering_connection_mock(id_3)
+
+        ec2_gateway_1.resource().vpc_peering_connections.filter = Mock(
+            return_value=[connection_1, connection_2])
+        ec2_gateway_2.resource().vpc_peering_connections.filter = Mock(
+            return_value=[connection_3])
+
+        clock = FakeClock()
+        on_available = Mock(name='On available')
+
+        waiter = VPCPeeringConnectionWaiter(
+            ec2_gateways, Mock(name='Logger'),
+            clock=clock.time, sleep=clock.sleep)
+
+        unavailable = waiter.wait_for(
+            [(vpc_1, id_1), (vpc_1, id_2), (vpc_2, id_3)], on_available)
+
+        ec2_gateway_1.resource().vpc_peering_connections.filter\
+            .assert_called_once_with(
+                Filters=[{'Name': 'vpc-peering-connection-id',
+                          'Values': sorted([id_1, id_2])}])
+        ec2_gateway_2.resource().vpc_peering_connections.filter\
+            .assert_called_once_with(
+                Filters=[{'Name': 'vpc-peering-connection-id',
+                          'Values': [id_3]}])
+        self.assertEqual(
+            [c.args[0] for c in on_available.call_args_list],
+            [connection_1, connection_2, connection_3])
+        self.assertEqual(unavailable, set())
+        self.assertEqual(clock.sleeps, [])
+
+    def test_backs_off_until_connections_leave_initiating_state(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection_id = randoms.peering_connection_id()
+        initiating_connection = build_vpc_peering_connection_mock(
+            vpc_peering_connection_id, 'initiating-request')
+        pending_connection = build_vpc_peering_connection_mock(
+            vpc_peering_connection_id)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=[[], [initiating_connection], [pending_connection]])
+
+        clock = FakeClock()
+        on_available = Mock(name='On available')
+
+        waiter = VPCPeeringConnectionWaiter(
+            ec2_gateways, Mock(name='Logger'),
+            initial_delay_seconds=1,
+            clock=clock.time, sleep=clock.sleep, jitter=lambda: 1)
+
+        unavailable = waiter.wait_for(
+            [(vpc, vpc_peering_connection_id)], on_available)
+
+        on_available.assert_called_once_with(pending_connection)
+        self.assertEqual(clock.sleeps, [2, 4])
+        self.assertEqual(unavailable, set())
+
+    def test_returns_connections_not_available_before_timeout(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection_id = randoms.peering_connection_id()
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            return_value=[])
+
+        clock = FakeClock()
+        on_available = Mock(name='On available')
+
+        waiter = VPCPeeringConnectionWaiter(
+            ec2_gateways, Mock(name='Logger'),
+            timeout_seconds=10,
+            initial_delay_seconds=1,
+            maximum_delay_seconds=4,
+            clock=clock.time, sleep=clock.sleep, jitter=lambda: 1)
+
+        unavailable = waiter.wait_for(
+            [(vpc, vpc_peering_connection_id)], on_available)
+
+        on_available.assert_not_called()
+        self.assertEqual(unavailable, {vpc_peering_connection_id})
+        self.assertEqual(clock.sleeps, [2, 4, 4])
+        self.assertLessEqual(clock.now, 10)
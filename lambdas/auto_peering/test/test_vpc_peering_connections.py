@@ -0,0 +1,195 @@
+import unittest
+from unittest.mock import Mock
+
+from auto_peering.vpc import VPC
+from auto_peering.vpc_peering_connections import (
+    LIVE_STATUS_CODES, VPCPeeringConnections)
+from test import randoms, mocks
+
+
+def build_vpc_peering_connection_mock(requester_vpc, accepter_vpc):
+    vpc_peering_connection = Mock(name='VPC peering connection')
+    vpc_peering_connection.id = randoms.peering_connection_id()
+    vpc_peering_connection.requester_vpc_info = {'VpcId': requester_vpc.id}
+    vpc_peering_connection.accepter_vpc_info = {'VpcId': accepter_vpc.id}
+
+    return vpc_peering_connection
+
+
+def build_vpc_link_mock(vpc1, vpc2):
+    vpc_link = Mock(name='VPC link')
+    vpc_link.between = [vpc1, vpc2]
+
+    return vpc_link
+
+
+class TestVPCPeeringConnections(unittest.TestCase):
+    def test_prefetches_once_per_accepter_account_and_region(self):
+        account_id = randoms.account_id()
+        region_1 = 'eu-west-1'
+        region_2 = 'eu-west-2'
+
+        target_vpc = VPC(mocks.build_vpc_response_mock(), account_id, region_1)
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region_1)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region_2)
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_id, region_1)
+        ec2_gateway_2 = mocks.EC2Gateway(account_id, region_2)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway_1, ec2_gateway_2])
+
+        ec2_gateway_1.resource().vpc_peering_connections.filter = Mock(
+            name='Filter VPC peering connections in region 1',
+            return_value=iter([]))
+        ec2_gateway_2.resource().vpc_peering_connections.filter = Mock(
+            name='Filter VPC peering connections in region 2',
+            return_value=iter([]))
+
+        vpc_peering_connections = VPCPeeringConnections(ec2_gateways)
+        vpc_peering_connections.prefetch_for([
+            build_vpc_link_mock(target_vpc, vpc_1),
+            build_vpc_link_mock(vpc_2, target_vpc)
+        ])
+
+        ec2_gateway_1.resource().vpc_peering_connections.filter\
+            .assert_called_once_with(
+                Filters=[
+                    {'Name': 'accepter-vpc-info.vpc-id',
+                     'Values': sorted([target_vpc.id, vpc_1.id])},
+                    {'Name': 'requester-vpc-info.vpc-id',
+                     'Values': sorted([target_vpc.id, vpc_1.id, vpc_2.id])},
+                    {'Name': 'status-code',
+                     'Values': ['initiating-request', 'pending-acceptance',
+                                'provisioning', 'active']}])
+        ec2_gateway_2.resource().vpc_peering_connections.filter\
+            .assert_called_once_with(
+                Filters=[
+                    {'Name': 'accepter-vpc-info.vpc-id',
+                     'Values': [vpc_2.id]},
+                    {'Name': 'requester-vpc-info.vpc-id',
+                     'Values': [target_vpc.id]},
+                    {'Name': 'status-code',
+                     'Values': ['initiating-request', 'pending-acceptance',
+                                'provisioning', 'active']}])
+
+    def test_finds_prefetched_peering_connections_in_memory(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        target_vpc = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection = \
+            build_vpc_peering_connection_mock(vpc_1, target_vpc)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            name='Filter VPC peering connections',
+            return_value=iter([vpc_peering_connection]))
+
+        vpc_peering_connections = VPCPeeringConnections(ec2_gateways)
+        vpc_peering_connections.prefetch_for([
+            build_vpc_link_mock(target_vpc, vpc_1),
+            build_vpc_link_mock(target_vpc, vpc_2)
+        ])
+
+        self.assertEqual(
+            vpc_peering_connections.find_between(target_vpc, vpc_1),
+            vpc_peering_connection)
+        self.assertEqual(
+            vpc_peering_connections.find_between(vpc_1, target_vpc),
+            vpc_peering_connection)
+        self.assertIsNone(
+            vpc_peering_connections.find_between(target_vpc, vpc_2))
+        self.assertEqual(
+            len(ec2_gateway.resource().vpc_peering_connections.filter
+                .mock_calls),
+            1)
+
+    def test_fetches_peering_connections_not_prefetched(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection = \
+            build_vpc_peering_connection_mock(vpc_2, vpc_1)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            name='Filter VPC peering connections',
+            return_value=iter([vpc_peering_connection]))
+
+        vpc_peering_connections = VPCPeeringConnections(ec2_gateways)
+
+        found_vpc_peering_connection = \
+            vpc_peering_connections.find(vpc_1, vpc_2)
+
+        ec2_gateway.resource().vpc_peering_connections.filter\
+            .assert_called_once_with(
+                Filters=[{'Name': 'accepter-vpc-info.vpc-id',
+                          'Values': [vpc_1.id]},
+                         {'Name': 'requester-vpc-info.vpc-id',
+                          'Values': [vpc_2.id]},
+                         {'Name': 'status-code',
+                          'Values': LIVE_STATUS_CODES}])
+        self.assertEqual(found_vpc_peering_connection, vpc_peering_connection)
+
+    def test_records_added_and_removed_peering_connections(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection = \
+            build_vpc_peering_connection_mock(vpc_1, vpc_2)
+
+        vpc_peering_connections = VPCPeeringConnections(ec2_gateways)
+
+        vpc_peering_connections.add(vpc_1, vpc_2, vpc_peering_connection)
+        found_after_add = vpc_peering_connections.find_between(vpc_2, vpc_1)
+        vpc_peering_connections.remove(vpc_1, vpc_2)
+        found_after_remove = vpc_peering_connections.find_between(vpc_1, vpc_2)
+
+        self.assertEqual(found_after_add, vpc_peering_connection)
+        self.assertIsNone(found_after_remove)
+        ec2_gateway.resource().vpc_peering_connections.filter\
+            .assert_not_called()
+
+    def test_refreshes_peering_connections_recorded_as_absent(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc_1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc_2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection = \
+            build_vpc_peering_connection_mock(vpc_2, vpc_1)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            name='Filter VPC peering connections',
+            side_effect=lambda **_: iter([vpc_peering_connection]))
+
+        vpc_peering_connections = VPCPeeringConnections(ec2_gateways)
+        vpc_peering_connections.remove(vpc_1, vpc_2)
+
+        refreshed_vpc_peering_connection = \
+            vpc_peering_connections.refresh_between(vpc_1, vpc_2)
+
+        self.assertEqual(
+            refreshed_vpc_peering_connection, vpc_peering_connection)
+        self.assertEqual(
+            vpc_peering_connections.find_between(vpc_1, vpc_2),
+            vpc_peering_connection)
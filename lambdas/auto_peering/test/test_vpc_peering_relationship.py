@@ -3,10 +3,20 @@ from unittest.mock import Mock
 from botocore.exceptions import ClientError
 
 from auto_peering.vpc import VPC
+from auto_peering.vpc_peering_connections import LIVE_STATUS_CODES
 from auto_peering.vpc_peering_relationship import VPCPeeringRelationship
 from test import randoms, mocks
 
 
+def filter_finding_only_by_id(vpc_peering_connection):
+    def filter_vpc_peering_connections(**kwargs):
+        if 'VpcPeeringConnectionIds' in kwargs:
+            return iter([vpc_peering_connection])
+        return iter([])
+
+    return filter_vpc_peering_connections
+
+
 class TestVPCPeeringRelationshipFetch(unittest.TestCase):
     def test_finds_peering_connection_between_first_and_second_vpc(self):
         account_id = randoms.account_id()
@@ -53,7 +63,9 @@ class TestVPCPeeringRelationshipFetch(unittest.TestCase):
                 {'Name': 'accepter-vpc-info.vpc-id',
                  'Values': [vpc_1.id]},
                 {'Name': 'requester-vpc-info.vpc-id',
-                 'Values': [vpc_2.id]}])
+                 'Values': [vpc_2.id]},
+                {'Name': 'status-code',
+                 'Values': LIVE_STATUS_CODES}])
         self.assertEqual(
             found_peering_connection, matching_vpc_peering_connection)
 
@@ -100,7 +112,9 @@ class TestVPCPeeringRelationshipFetch(unittest.TestCase):
                 {'Name': 'accepter-vpc-info.vpc-id',
                  'Values': [vpc_2.id]},
                 {'Name': 'requester-vpc-info.vpc-id',
-                 'Values': [vpc_1.id]}])
+                 'Values': [vpc_1.id]},
+                {'Name': 'status-code',
+                 'Values': LIVE_STATUS_CODES}])
         self.assertEqual(
             found_peering_connection, matching_vpc_peering_connection)
 
@@ -157,11 +171,13 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
         matching_vpc_peering_connection = Mock(
             name='Matching VPC peering connection')
 
+        requester_ec2_gateway.resource().vpc_peering_connections.filter = \
+            Mock(return_value=iter([]))
         accepter_ec2_gateway.resource().vpc_peering_connections = \
             vpc_peering_connections
         vpc_peering_connections.filter = Mock(
             name="Filter VPC peering connections for region: {}".format(region),
-            return_value=iter([matching_vpc_peering_connection]))
+            side_effect=filter_finding_only_by_id(matching_vpc_peering_connection))
 
         vpc_peering_relationship = VPCPeeringRelationship(
             ec2_gateways, logger, between=[vpc1, vpc2])
@@ -195,7 +211,7 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
         ec2_gateway.resource().vpc_peering_connections = vpc_peering_connections
         vpc_peering_connections.filter = Mock(
             name="Filter VPC peering connections",
-            return_value=iter([vpc_peering_connection]))
+            side_effect=filter_finding_only_by_id(vpc_peering_connection))
 
         vpc_peering_relationship = VPCPeeringRelationship(
             ec2_gateways, logger, between=[vpc1, vpc2])
@@ -225,7 +241,7 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
         ec2_gateway.resource().vpc_peering_connections = vpc_peering_connections
         vpc_peering_connections.filter = Mock(
             name="Filter VPC peering connections",
-            return_value=iter([vpc_peering_connection]))
+            side_effect=filter_finding_only_by_id(vpc_peering_connection))
 
         vpc_peering_relationship = VPCPeeringRelationship(
             ec2_gateways, logger, between=[vpc1, vpc2])
@@ -251,13 +267,14 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
         vpc_peering_connection = Mock(name='VPC peering connection')
 
         vpc_peering_connection.id = Mock(name='VPC peering connection ID')
+        vpc_peering_connection.status = {'Code': 'pending-acceptance'}
         vpc_peering_connection.delete = \
             Mock(name='Delete VPC peering connection')
 
         ec2_gateway.resource().vpc_peering_connections = vpc_peering_connections
         vpc_peering_connections.filter = Mock(
             name="Filter VPC peering connections",
-            return_value=iter([vpc_peering_connection]))
+            side_effect=filter_finding_only_by_id(vpc_peering_connection))
 
         vpc1.request_vpc_peering_connection = Mock(
             return_value=vpc_peering_connection)
@@ -286,13 +303,14 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
         vpc_peering_connection = Mock(name='VPC peering connection')
 
         vpc_peering_connection.id = Mock(name='VPC peering connection ID')
+        vpc_peering_connection.status = {'Code': 'pending-acceptance'}
         vpc_peering_connection.delete = \
             Mock(name='Delete VPC peering connection')
 
         ec2_gateway.resource().vpc_peering_connections = vpc_peering_connections
         vpc_peering_connections.filter = Mock(
             name="Filter VPC peering connections",
-            return_value=iter([vpc_peering_connection]))
+            side_effect=filter_finding_only_by_id(vpc_peering_connection))
 
         accept_error = ClientError({'Error': {'Code': '123'}}, 'something')
         vpc1.request_vpc_peering_connection = Mock(
@@ -309,6 +327,45 @@ class TestVPCPeeringRelationshipProvision(unittest.TestCase):
             "Error was: %s",
             vpc1.id, vpc2.id, accept_error)
 
+    def test_continues_with_connection_requested_elsewhere(self):
+        region = mocks.randoms.region()
+        account_id = mocks.randoms.account_id()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        existing_vpc_peering_connection = Mock(
+            name='Existing VPC peering connection')
+        vpc_peering_connections = Mock(name='VPC peering connections')
+        vpc_peering_connections.find_between = Mock(return_value=None)
+        vpc_peering_connections.refresh_between = Mock(
+            return_value=existing_vpc_peering_connection)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_finding_only_by_id(
+                existing_vpc_peering_connection))
+        vpc1.request_vpc_peering_connection = Mock(side_effect=ClientError(
+            {'Error': {'Code': 'VpcPeeringConnectionAlreadyExists'}},
+            'CreateVpcPeeringConnection'))
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2],
+            vpc_peering_connections=vpc_peering_connections)
+        requested = vpc_peering_relationship.request()
+
+        self.assertIs(requested, existing_vpc_peering_connection)
+        vpc_peering_connections.refresh_between.assert_called_once_with(
+            vpc1, vpc2)
+
+        vpc_peering_relationship.abandon(requested)
+
+        existing_vpc_peering_connection.delete.assert_not_called()
+
 
 class TestVPCPeeringRelationshipDestroy(unittest.TestCase):
     def test_destroys_peering_connection(self):
@@ -421,3 +478,260 @@ class TestVPCPeeringRelationshipDestroy(unittest.TestCase):
         logger.info.assert_any_call(
             "No peering connection to destroy between: '%s' and: '%s'.",
             vpc1.id, vpc2.id)
+
+
+class TestVPCPeeringRelationshipAccept(unittest.TestCase):
+    def test_accepts_provided_connection_without_waiting(self):
+        account_id = mocks.randoms.account_id()
+        region = mocks.randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        requester_vpc_peering_connection = Mock(
+            name='Requester VPC peering connection')
+        acceptor_vpc_peering_connection = Mock(
+            name='Acceptor VPC peering connection')
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2])
+        accepted = vpc_peering_relationship.accept(
+            requester_vpc_peering_connection,
+            acceptor_vpc_peering_connection)
+
+        acceptor_vpc_peering_connection.accept.assert_called_once()
+        ec2_gateway.client().get_waiter.assert_not_called()
+        self.assertTrue(accepted)
+
+    def test_treats_connection_accepted_concurrently_as_accepted(self):
+        account_id = mocks.randoms.account_id()
+        region = mocks.randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name='VPC peering connection')
+        vpc_peering_connection.accept = Mock(
+            side_effect=ClientError(
+                {'Error': {'Code': 'InvalidStateTransition'}},
+                'AcceptVpcPeeringConnection'))
+        accepted_vpc_peering_connection = Mock(
+            name='Accepted VPC peering connection')
+        accepted_vpc_peering_connection.status = {'Code': 'active'}
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_finding_only_by_id(
+                accepted_vpc_peering_connection))
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2])
+        accepted = vpc_peering_relationship.accept(
+            vpc_peering_connection, vpc_peering_connection)
+
+        self.assertTrue(accepted)
+        vpc_peering_connection.delete.assert_not_called()
+        self.assertEqual(
+            vpc_peering_relationship.fetch(),
+            accepted_vpc_peering_connection)
+
+    def test_does_not_abandon_connection_requested_elsewhere(self):
+        account_id = mocks.randoms.account_id()
+        region = mocks.randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateways = mocks.EC2Gateways(
+            [mocks.EC2Gateway(account_id, region)])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name='VPC peering connection')
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2])
+        vpc_peering_relationship.abandon(vpc_peering_connection)
+
+        vpc_peering_connection.delete.assert_not_called()
+
+
+class TestVPCPeeringRelationshipProvisionExisting(unittest.TestCase):
+    def provision_with_existing(self, status_code, accept_error=None,
+                                described_status_code=None):
+        account_id = mocks.randoms.account_id()
+        region = mocks.randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        existing_vpc_peering_connection = Mock(
+            name='Existing VPC peering connection')
+        existing_vpc_peering_connection.status = {'Code': status_code}
+        existing_vpc_peering_connection.accept = Mock(side_effect=accept_error)
+        waited_for_vpc_peering_connection = Mock(
+            name='Waited for VPC peering connection')
+        waited_for_vpc_peering_connection.status = {
+            'Code': described_status_code}
+
+        def filter_vpc_peering_connections(**kwargs):
+            if 'VpcPeeringConnectionIds' in kwargs:
+                return iter([waited_for_vpc_peering_connection])
+            return iter([existing_vpc_peering_connection])
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_vpc_peering_connections)
+        vpc1.request_vpc_peering_connection = Mock(
+            name='Request VPC peering connection')
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2])
+        vpc_peering_relationship.provision()
+
+        return (vpc1, ec2_gateway,
+                existing_vpc_peering_connection,
+                waited_for_vpc_peering_connection)
+
+    def test_does_nothing_when_connection_active(self):
+        vpc1, ec2_gateway, existing, _ = \
+            self.provision_with_existing('active')
+
+        vpc1.request_vpc_peering_connection.assert_not_called()
+        existing.accept.assert_not_called()
+        ec2_gateway.client().get_waiter.assert_not_called()
+
+    def test_accepts_only_when_connection_pending_acceptance(self):
+        vpc1, ec2_gateway, existing, _ = \
+            self.provision_with_existing('pending-acceptance')
+
+        vpc1.request_vpc_peering_connection.assert_not_called()
+        ec2_gateway.client().get_waiter.assert_not_called()
+        existing.accept.assert_called_once()
+
+    def test_waits_for_and_accepts_connection_being_initiated(self):
+        vpc1, ec2_gateway, existing, waited_for = \
+            self.provision_with_existing('initiating-request')
+
+        vpc1.request_vpc_peering_connection.assert_not_called()
+        ec2_gateway.client().get_waiter.assert_called_once_with(
+            'vpc_peering_connection_exists')
+        waited_for.accept.assert_called_once()
+
+    def test_requests_new_connection_when_existing_one_deleted(self):
+        vpc1, _, existing, _ = self.provision_with_existing('deleted')
+
+        vpc1.request_vpc_peering_connection.assert_called_once()
+        existing.accept.assert_not_called()
+
+    def test_does_not_delete_pending_connection_it_failed_to_accept(self):
+        vpc1, _, existing, _ = self.provision_with_existing(
+            'pending-acceptance',
+            accept_error=ClientError(
+                {'Error': {'Code': 'InvalidStateTransition'}},
+                'AcceptVpcPeeringConnection'),
+            described_status_code='deleted')
+
+        existing.accept.assert_called_once()
+        existing.delete.assert_not_called()
+        vpc1.request_vpc_peering_connection.assert_not_called()
+
+
+class TestVPCPeeringRelationshipProvisionExistingReverse(unittest.TestCase):
+    def provision_with_existing_requested_by_vpc2(
+            self, status_code, accept_error=None,
+            described_status_code=None):
+        region = mocks.randoms.region()
+        account_id_1 = mocks.randoms.account_id()
+        account_id_2 = mocks.randoms.account_id()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id_1, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id_2, region)
+
+        vpc1_ec2_gateway = mocks.EC2Gateway(account_id_1, region)
+        vpc2_ec2_gateway = mocks.EC2Gateway(account_id_2, region)
+        ec2_gateways = mocks.EC2Gateways(
+            [vpc1_ec2_gateway, vpc2_ec2_gateway])
+
+        logger = Mock()
+
+        existing_vpc_peering_connection = Mock(
+            name='Existing VPC peering connection')
+        existing_vpc_peering_connection.status = {'Code': status_code}
+        existing_vpc_peering_connection.accepter_vpc_info = {
+            'VpcId': vpc1.id, 'OwnerId': account_id_1, 'Region': region}
+        existing_vpc_peering_connection.requester_vpc_info = {
+            'VpcId': vpc2.id, 'OwnerId': account_id_2, 'Region': region}
+        existing_vpc_peering_connection.accept = Mock(side_effect=accept_error)
+        described_vpc_peering_connection = Mock(
+            name='Described VPC peering connection')
+        described_vpc_peering_connection.status = {
+            'Code': described_status_code}
+
+        def filter_vpc_peering_connections(**kwargs):
+            if 'VpcPeeringConnectionIds' in kwargs:
+                return iter([described_vpc_peering_connection])
+            return iter([existing_vpc_peering_connection])
+
+        vpc1_ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_vpc_peering_connections)
+        vpc2_ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            return_value=iter([]))
+        vpc1.request_vpc_peering_connection = Mock(
+            name='Request VPC peering connection')
+
+        vpc_peering_relationship = VPCPeeringRelationship(
+            ec2_gateways, logger, between=[vpc1, vpc2])
+        vpc_peering_relationship.provision()
+
+        return (vpc1, vpc1_ec2_gateway, vpc2_ec2_gateway,
+                existing_vpc_peering_connection,
+                described_vpc_peering_connection)
+
+    def test_accepts_pending_connection_requested_by_second_vpc(self):
+        vpc1, _, vpc2_ec2_gateway, existing, _ = \
+            self.provision_with_existing_requested_by_vpc2(
+                'pending-acceptance')
+
+        vpc1.request_vpc_peering_connection.assert_not_called()
+        existing.accept.assert_called_once()
+        vpc2_ec2_gateway.client().get_waiter.assert_not_called()
+
+    def test_describes_pending_connection_through_first_vpc_gateway(self):
+        _, vpc1_ec2_gateway, vpc2_ec2_gateway, existing, _ = \
+            self.provision_with_existing_requested_by_vpc2(
+                'pending-acceptance',
+                accept_error=ClientError(
+                    {'Error': {'Code': 'InvalidStateTransition'}},
+                    'AcceptVpcPeeringConnection'),
+                described_status_code='active')
+
+        vpc1_ec2_gateway.resource().vpc_peering_connections.filter\
+            .assert_any_call(VpcPeeringConnectionIds=[existing.id])
+        for call in vpc2_ec2_gateway.resource()\
+                .vpc_peering_connections.filter.mock_calls:
+            self.assertNotIn('VpcPeeringConnectionIds', call.kwargs)
+        existing.delete.assert_not_called()
+
+    def test_waits_for_connection_through_first_vpc_gateway(self):
+        _, vpc1_ec2_gateway, vpc2_ec2_gateway, _, described = \
+            self.provision_with_existing_requested_by_vpc2(
+                'initiating-request')
+
+        vpc1_ec2_gateway.client().get_waiter.assert_called_once_with(
+            'vpc_peering_connection_exists')
+        vpc2_ec2_gateway.client().get_waiter.assert_not_called()
+        described.accept.assert_called_once()
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import Mock
 from botocore.exceptions import ClientError
 
+from auto_peering.private_route_tables import PrivateRouteTables
 from auto_peering.vpc import VPC
 from auto_peering.vpc_peering_route import VPCPeeringRoute
 from test import randoms, mocks
@@ -63,6 +64,50 @@ class TestVPCPeeringRoutesProvision(unittest.TestCase):
             DestinationCidrBlock=vpc2.cidr_block,
             VpcPeeringConnectionId=vpc_peering_connection.id)
 
+    def test_shares_private_route_tables_between_routes(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc3 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc1_route_table = Mock(name="VPC 1 route table")
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([vpc1_route_table]))
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        private_route_tables = PrivateRouteTables(ec2_gateways)
+
+        for destination_vpc in [vpc2, vpc3]:
+            VPCPeeringRoute(
+                ec2_gateways,
+                logger,
+                between=[vpc1, destination_vpc],
+                peering_relationship=vpc_peering_relationship,
+                private_route_tables=private_route_tables).provision()
+
+        ec2_gateway.resource().route_tables.filter.assert_called_once()
+        vpc1_route_table.create_route.assert_any_call(
+            DestinationCidrBlock=vpc2.cidr_block,
+            VpcPeeringConnectionId=vpc_peering_connection.id)
+        vpc1_route_table.create_route.assert_any_call(
+            DestinationCidrBlock=vpc3.cidr_block,
+            VpcPeeringConnectionId=vpc_peering_connection.id)
+
     def test_handles_no_matching_route_tables(self):
         account_id = randoms.account_id()
         region_1 = randoms.region()
@@ -221,6 +266,263 @@ class TestVPCPeeringRoutesProvision(unittest.TestCase):
             "Route creation failed for '%s'. Error was: %s",
             vpc1_route_table_1.id, create_route_error)
 
+    def test_treats_route_already_created_through_connection_as_created(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = randoms.peering_connection_id()
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        route_table_id = randoms.route_table_id()
+        route_table = Mock(name="Route table")
+        route_table.id = route_table_id
+        route_table.routes_attribute = []
+        route_table.create_route = Mock(side_effect=ClientError(
+            {'Error': {'Code': 'RouteAlreadyExists'}}, 'CreateRoute'))
+
+        described_route_table = Mock(name="Described route table")
+        described_route_table.id = route_table_id
+        described_route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': vpc_peering_connection.id}]
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            side_effect=[iter([route_table]),
+                         iter([described_route_table])])
+
+        vpc_peering_route = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship,
+            reconcile=True)
+
+        outcome = vpc_peering_route.provision()
+
+        self.assertEqual(
+            len(ec2_gateway.resource().route_tables.filter.mock_calls), 2)
+        logger.info.assert_any_call(
+            "Route already present for '%s'. Continuing.", route_table.id)
+        logger.warn.assert_not_called()
+        self.assertEqual(
+            outcome,
+            {'created': 0, 'already_present': 1, 'conflicting': 0})
+
+    def test_resolves_existing_route_from_snapshot_without_describing(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = randoms.peering_connection_id()
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        route_table = Mock(name="Route table")
+        route_table.id = randoms.route_table_id()
+        route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': vpc_peering_connection.id}]
+        route_table.create_route = Mock(side_effect=ClientError(
+            {'Error': {'Code': 'RouteAlreadyExists'}}, 'CreateRoute'))
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([route_table]))
+
+        vpc_peering_route = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship)
+
+        vpc_peering_route.provision()
+
+        self.assertEqual(
+            len(ec2_gateway.resource().route_tables.filter.mock_calls), 1)
+        route_table.reload.assert_not_called()
+        logger.info.assert_any_call(
+            "Route already present for '%s'. Continuing.", route_table.id)
+        logger.warn.assert_not_called()
+
+    def test_logs_that_route_creation_failed_when_route_through_other(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = randoms.peering_connection_id()
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        create_route_error = ClientError(
+            {'Error': {'Code': 'RouteAlreadyExists'}}, 'CreateRoute')
+        route_table = Mock(name="Route table")
+        route_table.id = randoms.route_table_id()
+        route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': randoms.peering_connection_id()}]
+        route_table.create_route = Mock(side_effect=create_route_error)
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([route_table]))
+
+        vpc_peering_route = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship)
+
+        vpc_peering_route.provision()
+
+        self.assertEqual(
+            len(ec2_gateway.resource().route_tables.filter.mock_calls), 1)
+        route_table.reload.assert_not_called()
+        logger.warn.assert_any_call(
+            "Route creation failed for '%s'. Error was: %s",
+            route_table.id, create_route_error)
+
+
+class TestVPCPeeringRoutesReconcile(unittest.TestCase):
+    def test_creates_only_missing_routes_and_reports_outcome(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = randoms.peering_connection_id()
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        missing_route_table = Mock(name="Route table missing route")
+        missing_route_table.id = randoms.route_table_id()
+        missing_route_table.routes_attribute = []
+
+        present_route_table = Mock(name="Route table with route")
+        present_route_table.id = randoms.route_table_id()
+        present_route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': vpc_peering_connection.id}]
+
+        conflicting_route_table = Mock(name="Route table with other route")
+        conflicting_route_table.id = randoms.route_table_id()
+        conflicting_route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': randoms.peering_connection_id()}]
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([missing_route_table,
+                               present_route_table,
+                               conflicting_route_table]))
+
+        vpc_peering_route = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship,
+            reconcile=True)
+
+        outcome = vpc_peering_route.provision()
+
+        missing_route_table.create_route.assert_called_once_with(
+            DestinationCidrBlock=vpc2.cidr_block,
+            VpcPeeringConnectionId=vpc_peering_connection.id)
+        present_route_table.create_route.assert_not_called()
+        conflicting_route_table.create_route.assert_not_called()
+        self.assertEqual(
+            outcome,
+            {'created': 1, 'already_present': 1, 'conflicting': 1})
+
+    def test_logs_route_conflicts(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = randoms.peering_connection_id()
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        conflicting_route_table = Mock(name="Route table with other route")
+        conflicting_route_table.id = randoms.route_table_id()
+        conflicting_route_table.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'GatewayId': 'igw-12345678'}]
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=iter([conflicting_route_table]))
+
+        vpc_peering_route = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship,
+            reconcile=True)
+
+        vpc_peering_route.provision()
+
+        logger.warning.assert_any_call(
+            "Route conflict for '%s' as existing route does not "
+            "pertain to VPC peering connection '%s'. Continuing.",
+            conflicting_route_table.id, vpc_peering_connection.id)
+
 
 class TestVPCPeeringRoutesDestroy(unittest.TestCase):
     def test_destroys_routes_in_vpc1_for_vpc2_via_peering_connection(self):
@@ -246,10 +548,12 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
         vpc1_route_table_2_route = Mock(name="VPC 1 route table 2 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            peering_connection_id
-        vpc1_route_table_2_route.vpc_peering_connection_id = \
-            peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': peering_connection_id}]
+        vpc1_route_table_2.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -282,6 +586,47 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
         vpc1_route_table_1_route.delete.assert_called()
         vpc1_route_table_2_route.delete.assert_called()
 
+    def test_looks_up_only_route_tables_referencing_peering_connection(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+        peering_connection_id = randoms.peering_connection_id()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        logger = Mock()
+
+        ec2_gateway.resource().route_tables = Mock(
+            name="VPC route tables")
+        ec2_gateway.resource().route_tables.filter = Mock(
+            name="Filtered VPC route tables",
+            return_value=[])
+
+        vpc_peering_connection = Mock(name="VPC peering connection")
+        vpc_peering_connection.id = peering_connection_id
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(
+            return_value=vpc_peering_connection)
+
+        vpc_peering_routes = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship)
+
+        vpc_peering_routes.destroy()
+
+        ec2_gateway.resource().route_tables.filter.assert_called_once_with(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc1.id]},
+                {'Name': 'tag:Tier', 'Values': ['private']},
+                {'Name': 'route.vpc-peering-connection-id',
+                 'Values': [peering_connection_id]}])
+        ec2_gateway.resource().Route.assert_not_called()
+
     def test_retains_routes_in_vpc1_for_vpc2_if_not_for_peering_connection(self):
         region_1 = randoms.region()
         region_2 = randoms.region()
@@ -306,10 +651,12 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
         vpc1_route_table_2_route = Mock(name="VPC 1 route table 2 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            other_peering_connection_id
-        vpc1_route_table_2_route.vpc_peering_connection_id = \
-            other_peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': other_peering_connection_id}]
+        vpc1_route_table_2.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': other_peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -397,8 +744,9 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1 = Mock(name="VPC 1 route table 1")
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -447,8 +795,9 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1 = Mock(name="VPC 1 route table 1")
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -497,8 +846,9 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1 = Mock(name="VPC 1 route table 1")
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            other_peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': other_peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -548,8 +898,9 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
 
         vpc1_route_table_1 = Mock(name="VPC 1 route table 1")
         vpc1_route_table_1_route = Mock(name="VPC 1 route table 1 route")
-        vpc1_route_table_1_route.vpc_peering_connection_id = \
-            peering_connection_id
+        vpc1_route_table_1.routes_attribute = [
+            {'DestinationCidrBlock': vpc2.cidr_block,
+             'VpcPeeringConnectionId': peering_connection_id}]
 
         ec2_gateway_1.resource().route_tables = Mock(
             name="VPC route tables")
@@ -584,3 +935,36 @@ class TestVPCPeeringRoutesDestroy(unittest.TestCase):
         logger.warn.assert_any_call(
             "Route deletion failed for '%s'. Error was: %s",
             vpc1_route_table_1.id, delete_error)
+
+    def test_skips_routes_when_no_peering_connection_remains(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+
+        vpc1 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+        vpc2 = VPC(mocks.build_vpc_response_mock(), account_id, region)
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+        private_route_tables = Mock(name="Private route tables")
+
+        logger = Mock()
+
+        vpc_peering_relationship = Mock()
+        vpc_peering_relationship.fetch = Mock(return_value=None)
+
+        vpc_peering_routes = VPCPeeringRoute(
+            ec2_gateways,
+            logger,
+            between=[vpc1, vpc2],
+            peering_relationship=vpc_peering_relationship,
+            private_route_tables=private_route_tables)
+
+        vpc_peering_routes.destroy()
+        vpc_peering_routes.provision()
+
+        private_route_tables.referencing.assert_not_called()
+        private_route_tables.for_vpc.assert_not_called()
+        logger.warning.assert_any_call(
+            "No peering connection to route through between: '%s' and: "
+            "'%s'. Skipping.",
+            vpc1.id, vpc2.id)
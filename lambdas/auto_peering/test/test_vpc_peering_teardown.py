@@ -0,0 +1,228 @@
+import unittest
+from unittest.mock import Mock
+from botocore.exceptions import ClientError
+
+from auto_peering.vpc_peering_teardown import VPCPeeringTeardown
+from test import randoms, mocks
+
+LIVE_STATUS_FILTER = {
+    'Name': 'status-code',
+    'Values': ['initiating-request', 'pending-acceptance',
+               'provisioning', 'active']
+}
+
+
+def vpc_info_for(account_id, region, vpc_id):
+    return {'OwnerId': account_id, 'Region': region, 'VpcId': vpc_id}
+
+
+def build_vpc_peering_connection_mock(requester_vpc_info, accepter_vpc_info):
+    vpc_peering_connection = Mock(name='VPC peering connection')
+    vpc_peering_connection.id = randoms.peering_connection_id()
+    vpc_peering_connection.requester_vpc_info = requester_vpc_info
+    vpc_peering_connection.accepter_vpc_info = accepter_vpc_info
+
+    return vpc_peering_connection
+
+
+def build_route_table_mock(routes):
+    route_table = Mock(name='Route table')
+    route_table.id = randoms.route_table_id()
+    route_table.routes_attribute = routes
+
+    return route_table
+
+
+def managing_vpcs(ec2_gateway, *vpc_ids):
+    ec2_gateway.resource().vpcs.filter = Mock(
+        return_value=iter([
+            mocks.build_vpc_response_mock(id=vpc_id) for vpc_id in vpc_ids
+        ]))
+
+
+def filter_by_vpc_info(requester_side, accepter_side):
+    def filter_vpc_peering_connections(Filters):
+        if Filters[0]['Name'] == 'requester-vpc-info.vpc-id':
+            return iter(requester_side)
+        return iter(accepter_side)
+
+    return filter_vpc_peering_connections
+
+
+class TestVPCPeeringTeardown(unittest.TestCase):
+    def test_finds_connections_on_both_sides_in_each_region(self):
+        account_id = randoms.account_id()
+        region_1 = 'eu-west-1'
+        region_2 = 'eu-west-2'
+        vpc_id = randoms.vpc_id()
+
+        ec2_gateway_1 = mocks.EC2Gateway(account_id, region_1)
+        ec2_gateway_2 = mocks.EC2Gateway(account_id, region_2)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway_1, ec2_gateway_2])
+
+        for ec2_gateway in [ec2_gateway_1, ec2_gateway_2]:
+            ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+                return_value=iter([]))
+
+        teardown = VPCPeeringTeardown(ec2_gateways, Mock(name='Logger'))
+        destroyed, failed = teardown.destroy_for(account_id, vpc_id)
+
+        for ec2_gateway in [ec2_gateway_1, ec2_gateway_2]:
+            filter_mock = ec2_gateway.resource().vpc_peering_connections\
+                .filter
+            self.assertEqual(len(filter_mock.mock_calls), 2)
+            filter_mock.assert_any_call(
+                Filters=[{'Name': 'requester-vpc-info.vpc-id',
+                          'Values': [vpc_id]},
+                         LIVE_STATUS_FILTER])
+            filter_mock.assert_any_call(
+                Filters=[{'Name': 'accepter-vpc-info.vpc-id',
+                          'Values': [vpc_id]},
+                         LIVE_STATUS_FILTER])
+        self.assertEqual((destroyed, failed), ([], []))
+
+    def test_deletes_routes_at_both_ends_then_connection(self):
+        account_id = randoms.account_id()
+        peer_account_id = randoms.account_id()
+        region = 'eu-west-1'
+        peer_region = 'eu-west-2'
+        vpc_id = randoms.vpc_id()
+        peer_vpc_id = randoms.vpc_id()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        peer_ec2_gateway = mocks.EC2Gateway(peer_account_id, peer_region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway, peer_ec2_gateway])
+
+        vpc_peering_connection = build_vpc_peering_connection_mock(
+            vpc_info_for(account_id, region, vpc_id),
+            vpc_info_for(peer_account_id, peer_region, peer_vpc_id))
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_by_vpc_info([vpc_peering_connection], []))
+
+        route_table = build_route_table_mock([
+            {'DestinationCidrBlock': '10.0.1.0/24',
+             'VpcPeeringConnectionId': vpc_peering_connection.id},
+            {'DestinationCidrBlock': '0.0.0.0/0',
+             'NatGatewayId': 'nat-12345678'}])
+        peer_route_table = build_route_table_mock([
+            {'DestinationCidrBlock': '10.0.0.0/24',
+             'VpcPeeringConnectionId': vpc_peering_connection.id}])
+        ec2_gateway.resource().route_tables.filter = Mock(
+            return_value=iter([route_table]))
+        peer_ec2_gateway.resource().route_tables.filter = Mock(
+            return_value=iter([peer_route_table]))
+        managing_vpcs(peer_ec2_gateway, peer_vpc_id)
+
+        teardown = VPCPeeringTeardown(ec2_gateways, Mock(name='Logger'))
+        destroyed, failed = teardown.destroy_for(account_id, vpc_id)
+
+        ec2_gateway.resource().route_tables.filter.assert_called_once_with(
+            Filters=[
+                {'Name': 'vpc-id', 'Values': [vpc_id]},
+                {'Name': 'tag:Tier', 'Values': ['private']},
+                {'Name': 'route.vpc-peering-connection-id',
+                 'Values': [vpc_peering_connection.id]}])
+        ec2_gateway.client().delete_route.assert_called_once_with(
+            RouteTableId=route_table.id,
+            DestinationCidrBlock='10.0.1.0/24')
+        peer_ec2_gateway.client().delete_route.assert_called_once_with(
+            RouteTableId=peer_route_table.id,
+            DestinationCidrBlock='10.0.0.0/24')
+        vpc_peering_connection.delete.assert_called_once()
+        self.assertEqual(destroyed, [vpc_peering_connection.id])
+        self.assertEqual(failed, [])
+
+    def test_continues_when_a_connection_cannot_be_destroyed(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+        vpc_id = randoms.vpc_id()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        failing_peer_vpc_id = randoms.vpc_id()
+        other_peer_vpc_id = randoms.vpc_id()
+        failing_vpc_peering_connection = build_vpc_peering_connection_mock(
+            vpc_info_for(account_id, region, vpc_id),
+            vpc_info_for(account_id, region, failing_peer_vpc_id))
+        failing_vpc_peering_connection.delete = Mock(
+            side_effect=RuntimeError('Failed.'))
+        other_vpc_peering_connection = build_vpc_peering_connection_mock(
+            vpc_info_for(account_id, region, other_peer_vpc_id),
+            vpc_info_for(account_id, region, vpc_id))
+        managing_vpcs(ec2_gateway, failing_peer_vpc_id, other_peer_vpc_id)
+
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_by_vpc_info(
+                [failing_vpc_peering_connection],
+                [other_vpc_peering_connection]))
+        ec2_gateway.resource().route_tables.filter = Mock(
+            return_value=iter([]))
+
+        teardown = VPCPeeringTeardown(
+            ec2_gateways, Mock(name='Logger'), max_workers=2)
+        destroyed, failed = teardown.destroy_for(account_id, vpc_id)
+
+        other_vpc_peering_connection.delete.assert_called_once()
+        self.assertEqual(destroyed, [other_vpc_peering_connection.id])
+        self.assertEqual(failed, [failing_vpc_peering_connection.id])
+
+    def test_deletes_connection_when_its_routes_cannot_be_deleted(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+        vpc_id = randoms.vpc_id()
+        peer_vpc_id = randoms.vpc_id()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        vpc_peering_connection = build_vpc_peering_connection_mock(
+            vpc_info_for(account_id, region, vpc_id),
+            vpc_info_for(account_id, region, peer_vpc_id))
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_by_vpc_info([vpc_peering_connection], []))
+        ec2_gateway.resource().route_tables.filter = Mock(
+            side_effect=ClientError(
+                {'Error': {'Code': 'AccessDenied'}}, 'DescribeRouteTables'))
+        managing_vpcs(ec2_gateway, peer_vpc_id)
+
+        teardown = VPCPeeringTeardown(ec2_gateways, Mock(name='Logger'))
+        destroyed, failed = teardown.destroy_for(account_id, vpc_id)
+
+        vpc_peering_connection.delete.assert_called_once()
+        self.assertEqual(destroyed, [])
+        self.assertEqual(failed, [vpc_peering_connection.id])
+
+    def test_leaves_connections_with_unmanaged_or_out_of_scope_peers(self):
+        account_id = randoms.account_id()
+        region = randoms.region()
+        vpc_id = randoms.vpc_id()
+        unmanaged_vpc_id = randoms.vpc_id()
+
+        ec2_gateway = mocks.EC2Gateway(account_id, region)
+        ec2_gateways = mocks.EC2Gateways([ec2_gateway])
+
+        unmanaged_vpc_peering_connection = build_vpc_peering_connection_mock(
+            vpc_info_for(account_id, region, vpc_id),
+            vpc_info_for(account_id, region, unmanaged_vpc_id))
+        out_of_scope_vpc_peering_connection = \
+            build_vpc_peering_connection_mock(
+                vpc_info_for(randoms.account_id(), region, randoms.vpc_id()),
+                vpc_info_for(account_id, region, vpc_id))
+        ec2_gateway.resource().vpc_peering_connections.filter = Mock(
+            side_effect=filter_by_vpc_info(
+                [unmanaged_vpc_peering_connection],
+                [out_of_scope_vpc_peering_connection]))
+        ec2_gateway.resource().vpcs.filter = Mock(
+            return_value=iter([
+                mocks.build_vpc_response_mock(id=unmanaged_vpc_id, tags=[])
+            ]))
+
+        teardown = VPCPeeringTeardown(ec2_gateways, Mock(name='Logger'))
+        destroyed, failed = teardown.destroy_for(account_id, vpc_id)
+
+        ec2_gateway.resource().vpcs.filter.assert_called_once_with(
+            Filters=[{'Name': 'vpc-id', 'Values': [unmanaged_vpc_id]}])
+        unmanaged_vpc_peering_connection.delete.assert_not_called()
+        out_of_scope_vpc_peering_connection.delete.assert_not_called()
+        self.assertEqual((destroyed, failed), ([], []))
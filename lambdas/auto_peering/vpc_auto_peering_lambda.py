@@ -1,12 +1,27 @@
 import boto3
 import logging
 import json
+import math
 import os
 
+from auto_peering import tracing
+from auto_peering.all_vpcs import AllVPCs
+from auto_peering.api_call_metrics import APICallMetrics
+from auto_peering.describe_cache import DescribeCache
 from auto_peering.ec2_gateways import EC2Gateways
-from auto_peering.s3_event_sns_message import S3EventSNSMessage
-from auto_peering.session_store import SessionStore
+from auto_peering.private_route_tables import PrivateRouteTables
+from auto_peering.session_store import SessionStore, DEFAULT_MAXIMUM_SESSIONS
+from auto_peering.targeted_vpcs import TargetedVPCs
+from auto_peering.vpc_inventory import VPCInventory
+from auto_peering.vpc_lifecycle_events import \
+    VPC_EXISTENCE, decode, is_queue_batch
+from auto_peering.vpc_link_executor import VPCLinkExecutor, VPCLinkFailures
 from auto_peering.vpc_links import VPCLinks
+from auto_peering.vpc_peering_connection_waiter import \
+    VPCPeeringConnectionWaiter
+from auto_peering.vpc_peering_connections import VPCPeeringConnections
+from auto_peering.vpc_peering_teardown import \
+    VPCPeeringTeardown, VPCPeeringTeardownFailures
 from auto_peering.utils import split_and_strip
 
 logging.getLogger('botocore').setLevel(logging.CRITICAL)
@@ -15,36 +30,135 @@ logging.getLogger('boto3').setLevel(logging.CRITICAL)
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Spans are exported as configured by the AWS_TRACING_* environment variables
+# and cost next to nothing when tracing is disabled.
+tracing.configure_from_environment()
 
-def peer_vpcs_for(event, _):
-    logger.info('Processing event: {}'.format(json.dumps(event)))
+# Held at module level so that VPCs listed by one invocation can be reused by
+# later invocations handled by the same warm container.
+vpc_inventory = VPCInventory(
+    ttl_seconds=int(os.environ.get('AWS_VPC_INVENTORY_TTL') or 0))
 
-    default_region = os.environ.get('AWS_REGION')
-    default_peering_role_name = 'vpc-auto-peering-role'
+# API calls made through the STS client and through every assumed role
+# session are counted per invocation and emitted as embedded metrics.
+api_call_metrics = APICallMetrics()
+
+# Likewise, assumed role sessions are reused by later invocations and refresh
+# their credentials as they approach expiry.
+sts_client = boto3.client('sts')
+api_call_metrics.register(sts_client.meta.events, None)
+session_store = SessionStore(
+    sts_client,
+    os.environ.get('AWS_PEERING_ROLE_NAME') or 'vpc-auto-peering-role',
+    maximum_sessions=int(
+        os.environ.get('AWS_SESSION_CACHE_SIZE') or
+        DEFAULT_MAXIMUM_SESSIONS),
+    listeners=[api_call_metrics])
+
+# And EC2 gateways, each holding one client with its connection pool, are
+# reused for each search account and region pair.
+# Their describe calls are memoised within, but not across, invocations.
+describe_cache = DescribeCache()
+ec2_gateways_by_search_scope = {}
 
-    sts_client = boto3.client('sts')
-    current_account_id = sts_client.get_caller_identity()["Account"]
 
-    search_regions = split_and_strip(
-        os.environ.get('AWS_SEARCH_REGIONS') or default_region)
-    search_accounts = split_and_strip(
-        os.environ.get('AWS_SEARCH_ACCOUNTS') or current_account_id)
-    peering_role_name = \
-        os.environ.get('AWS_PEERING_ROLE_NAME') or default_peering_role_name
+def ec2_gateways_for(search_accounts, search_regions):
+    search_scope = (tuple(search_accounts), tuple(search_regions))
+    if search_scope not in ec2_gateways_by_search_scope:
+        ec2_gateways_by_search_scope[search_scope] = EC2Gateways(
+            session_store, search_accounts, search_regions,
+            describe_cache=describe_cache)
 
-    session_store = SessionStore(sts_client, peering_role_name)
-    ec2_gateways = EC2Gateways(session_store, search_accounts, search_regions)
+    return ec2_gateways_by_search_scope[search_scope]
 
-    s3_event_sns_message = S3EventSNSMessage(event)
-    target_account_id = s3_event_sns_message.account_id()
-    target_vpc_id = s3_event_sns_message.vpc_id()
-    action = s3_event_sns_message.action()
+
+def log_statistics(current_account_id):
+    logger.info(
+        "Session cache statistics: %s", session_store.statistics())
+    logger.info(
+        "Describe cache statistics: %s", describe_cache.statistics())
+    for api_call_metrics_line in api_call_metrics.emf(
+            default_account_id=current_account_id):
+        print(api_call_metrics_line)
+
+
+def settings_for(current_account_id):
+    default_region = os.environ.get('AWS_REGION')
+    default_search_parallelism = 1
+    default_discovery_mode = 'full'
+    default_route_mode = 'create'
+    default_link_parallelism = 1
+    default_link_parallelism_per_account = 0
+    default_provisioning_mode = 'serial'
+    default_destroy_mode = 'discovery'
+
+    return {
+        'search_regions': split_and_strip(
+            os.environ.get('AWS_SEARCH_REGIONS') or default_region),
+        'search_accounts': split_and_strip(
+            os.environ.get('AWS_SEARCH_ACCOUNTS') or current_account_id),
+        'search_parallelism': int(
+            os.environ.get('AWS_SEARCH_PARALLELISM') or
+            default_search_parallelism),
+        'discovery_mode':
+            os.environ.get('AWS_DISCOVERY_MODE') or default_discovery_mode,
+        'route_mode': os.environ.get('AWS_ROUTE_MODE') or default_route_mode,
+        'link_parallelism': int(
+            os.environ.get('AWS_LINK_PARALLELISM') or
+            default_link_parallelism),
+        'link_parallelism_per_account': int(
+            os.environ.get('AWS_LINK_PARALLELISM_PER_ACCOUNT') or
+            default_link_parallelism_per_account),
+        'provisioning_mode':
+            os.environ.get('AWS_PROVISIONING_MODE') or
+            default_provisioning_mode,
+        'destroy_mode':
+            os.environ.get('AWS_DESTROY_MODE') or default_destroy_mode,
+    }
+
+
+def peer_vpc_for(vpc_lifecycle_event, settings, ec2_gateways,
+                 batch_vpc_inventory):
+    target_account_id = vpc_lifecycle_event.account_id
+    target_vpc_id = vpc_lifecycle_event.vpc_id
+    action = vpc_lifecycle_event.action
+    search_parallelism = settings['search_parallelism']
+    link_parallelism = settings['link_parallelism']
     logger.info(
         "'%s'ing peering connections for '%s'.",
         action,
         target_vpc_id)
 
-    vpc_links = VPCLinks(ec2_gateways, logger)
+    if action == 'destroy' and settings['destroy_mode'] == 'fast':
+        destroyed_ids, failed_ids = VPCPeeringTeardown(
+            ec2_gateways, logger, max_workers=link_parallelism)\
+            .destroy_for(target_account_id, target_vpc_id)
+        logger.info(
+            "Destroyed %d of %d peering connections for VPC with ID: '%s'.",
+            len(destroyed_ids),
+            len(destroyed_ids) + len(failed_ids),
+            target_vpc_id)
+        batch_vpc_inventory.invalidate(target_account_id)
+        if failed_ids:
+            raise VPCPeeringTeardownFailures(target_vpc_id, failed_ids)
+        return
+
+    if settings['discovery_mode'] == 'targeted':
+        all_vpcs = TargetedVPCs(ec2_gateways, max_workers=search_parallelism)
+    else:
+        all_vpcs = AllVPCs(
+            ec2_gateways,
+            max_workers=search_parallelism,
+            vpc_inventory=batch_vpc_inventory)
+    vpc_peering_connections = VPCPeeringConnections(
+        ec2_gateways, max_workers=search_parallelism)
+    private_route_tables = PrivateRouteTables(ec2_gateways)
+    vpc_links = VPCLinks(
+        ec2_gateways, logger,
+        all_vpcs=all_vpcs,
+        vpc_peering_connections=vpc_peering_connections,
+        private_route_tables=private_route_tables,
+        reconcile_routes=settings['route_mode'] == 'reconcile')
     logger.info(
         "Looking up VPC links for VPC with ID: '%s'.",
         target_vpc_id)
@@ -55,15 +169,135 @@ def peer_vpcs_for(event, _):
         "Found %d VPC links for VPC with ID: '%s'.",
         len(vpc_links_for_target), target_vpc_id)
 
-    for vpc_link in vpc_links_for_target:
-        logger.info(
-            "Managing peering relationship between '%s' and '%s'.",
-            vpc_link.vpc1.id,
-            vpc_link.vpc2.id)
-        vpc_link.peering_relationship.perform(action)
+    vpc_peering_connections.prefetch_for(vpc_links_for_target)
 
-        logger.info(
-            "Managing peering routes between '%s' and '%s'.",
-            vpc_link.vpc1.id,
-            vpc_link.vpc2.id)
-        vpc_link.peering_routes.perform(action)
+    provisioning_mode = settings['provisioning_mode']
+    vpc_link_executor = VPCLinkExecutor(
+        logger,
+        max_workers=link_parallelism,
+        max_workers_per_account=settings['link_parallelism_per_account'])
+    if action == 'provision' and provisioning_mode == 'batched':
+        vpc_link_outcomes = vpc_link_executor.provision_batched(
+            vpc_links_for_target,
+            VPCPeeringConnectionWaiter(
+                ec2_gateways, logger, max_workers=link_parallelism))
+    elif action == 'provision' and provisioning_mode == 'scheduled':
+        vpc_link_outcomes = vpc_link_executor.provision_scheduled(
+            vpc_links_for_target,
+            VPCPeeringConnectionWaiter(
+                ec2_gateways, logger, max_workers=link_parallelism))
+    else:
+        vpc_link_outcomes = vpc_link_executor.execute(
+            vpc_links_for_target, action)
+    failed_vpc_link_outcomes = [
+        vpc_link_outcome
+        for vpc_link_outcome in vpc_link_outcomes
+        if not vpc_link_outcome.succeeded
+    ]
+    logger.info(
+        "'%s'ed %d of %d VPC links for VPC with ID: '%s'.",
+        action,
+        len(vpc_link_outcomes) - len(failed_vpc_link_outcomes),
+        len(vpc_link_outcomes),
+        target_vpc_id)
+
+    if action == 'destroy':
+        target_vpc = all_vpcs.find_by_account_id_and_vpc_id(
+            target_account_id, target_vpc_id)
+        if target_vpc:
+            batch_vpc_inventory.remove(target_vpc)
+
+    # Every link has been attempted by now, so a failure of any of them fails
+    # the event as a whole and is left to the event source to retry.
+    if failed_vpc_link_outcomes:
+        raise VPCLinkFailures(failed_vpc_link_outcomes)
+
+
+def vpc_inventory_for(vpc_lifecycle_events):
+    # Without a TTL, VPCs listed for one record are still reused by the rest
+    # of the batch, but not by later invocations.
+    batch_vpc_inventory = vpc_inventory \
+        if vpc_inventory.ttl_seconds else VPCInventory(ttl_seconds=math.inf)
+    for account_id in {
+        vpc_lifecycle_event.account_id
+        for vpc_lifecycle_event in vpc_lifecycle_events
+        if vpc_lifecycle_event.action == 'provision'
+    }:
+        batch_vpc_inventory.invalidate(account_id)
+
+    return batch_vpc_inventory
+
+
+@tracing.traced('peer_vpcs_for')
+def peer_vpcs_for(event, _):
+    logger.info('Processing event: {}'.format(json.dumps(event)))
+
+    # Records delivered through SQS that fail are reported back so that only
+    # they are retried. Otherwise, failures are raised as before.
+    queue_batch = is_queue_batch(event)
+    failed_message_ids = []
+
+    def record_failure_of(message_id):
+        if message_id not in failed_message_ids:
+            failed_message_ids.append(message_id)
+
+    # Events are decoded, and those not about VPC existence dropped, before
+    # any API call is made.
+    def record_decode_failure_of(record, error):
+        logger.error(
+            "Failed to decode message with ID: '%s'.",
+            record.get('messageId'), exc_info=error)
+        record_failure_of(record.get('messageId'))
+
+    with tracing.span('parse_event') as span:
+        vpc_lifecycle_events = [
+            vpc_lifecycle_event
+            for vpc_lifecycle_event in decode(
+                event,
+                on_failure=record_decode_failure_of if queue_batch else None)
+            if vpc_lifecycle_event.type == VPC_EXISTENCE
+        ]
+        span.set_attribute('record_count', len(vpc_lifecycle_events))
+
+    if vpc_lifecycle_events:
+        describe_cache.reset()
+        api_call_metrics.reset()
+
+        current_account_id = sts_client.get_caller_identity()["Account"]
+        settings = settings_for(current_account_id)
+        ec2_gateways = ec2_gateways_for(
+            settings['search_accounts'], settings['search_regions'])
+        batch_vpc_inventory = vpc_inventory_for(vpc_lifecycle_events)
+
+        try:
+            for vpc_lifecycle_event in vpc_lifecycle_events:
+                message_id = vpc_lifecycle_event.message_id
+                if message_id in failed_message_ids:
+                    continue
+                try:
+                    with tracing.span(
+                            'peer_vpc',
+                            account_id=vpc_lifecycle_event.account_id,
+                            vpc_id=vpc_lifecycle_event.vpc_id,
+                            action=vpc_lifecycle_event.action):
+                        peer_vpc_for(
+                            vpc_lifecycle_event, settings, ec2_gateways,
+                            batch_vpc_inventory)
+                except Exception:
+                    if not queue_batch:
+                        raise
+                    logger.exception(
+                        "Failed to '%s' peering connections for '%s'.",
+                        vpc_lifecycle_event.action,
+                        vpc_lifecycle_event.vpc_id)
+                    record_failure_of(message_id)
+        finally:
+            log_statistics(current_account_id)
+    else:
+        logger.info('No VPC existence records in event. Ignoring.')
+
+    if queue_batch:
+        return {'batchItemFailures': [
+            {'itemIdentifier': message_id}
+            for message_id in failed_message_ids
+        ]}
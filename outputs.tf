@@ -1,3 +1,15 @@
 output "lambda_role_arn" {
   value = aws_iam_role.vpc_auto_peering_lambda.arn
 }
+
+output "queue_arn" {
+  value = try(aws_sqs_queue.infrastructure_events[0].arn, null)
+}
+
+output "queue_url" {
+  value = try(aws_sqs_queue.infrastructure_events[0].id, null)
+}
+
+output "dead_letter_queue_arn" {
+  value = try(aws_sqs_queue.infrastructure_events_dead_letter[0].arn, null)
+}
@@ -0,0 +1,84 @@
+locals {
+  queue_count = local.event_source == "sqs" ? 1 : 0
+
+  # Lambda polls queues with at least five concurrent batches. With less
+  # reserved concurrency, throttled deliveries count towards the receive
+  # count and events are dead lettered without having been processed.
+  minimum_queue_concurrency = 5
+}
+
+resource "aws_sqs_queue" "infrastructure_events_dead_letter" {
+  count = local.queue_count
+
+  name = "vpc-auto-peering-events-dlq-${var.region}-${var.deployment_identifier}"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "infrastructure_events" {
+  count = local.queue_count
+
+  name = "vpc-auto-peering-events-${var.region}-${var.deployment_identifier}"
+  visibility_timeout_seconds = 6 * aws_lambda_function.auto_peering.timeout
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.infrastructure_events_dead_letter[0].arn
+    maxReceiveCount = local.sqs_maximum_receive_count
+  })
+}
+
+data "aws_iam_policy_document" "infrastructure_events_queue_policy" {
+  count = local.queue_count
+
+  statement {
+    effect = "Allow"
+    resources = [aws_sqs_queue.infrastructure_events[0].arn]
+
+    actions = ["sqs:SendMessage"]
+
+    principals {
+      identifiers = ["sns.amazonaws.com"]
+      type = "Service"
+    }
+
+    condition {
+      test = "ArnEquals"
+      variable = "aws:SourceArn"
+      values = [var.infrastructure_events_topic_arn]
+    }
+  }
+}
+
+resource "aws_sqs_queue_policy" "infrastructure_events" {
+  count = local.queue_count
+
+  queue_url = aws_sqs_queue.infrastructure_events[0].id
+  policy = data.aws_iam_policy_document.infrastructure_events_queue_policy[0].json
+}
+
+resource "aws_sns_topic_subscription" "infrastructure_events_topic_queue" {
+  count = local.queue_count
+
+  topic_arn = var.infrastructure_events_topic_arn
+  protocol = "sqs"
+  endpoint = aws_sqs_queue.infrastructure_events[0].arn
+}
+
+resource "aws_lambda_event_source_mapping" "infrastructure_events_queue_auto_peering_lambda" {
+  count = local.queue_count
+
+  event_source_arn = aws_sqs_queue.infrastructure_events[0].arn
+  function_name = aws_lambda_function.auto_peering.arn
+  batch_size = local.sqs_batch_size
+  maximum_batching_window_in_seconds = local.sqs_maximum_batching_window
+  function_response_types = ["ReportBatchItemFailures"]
+
+  depends_on = [aws_iam_policy_attachment.vpc_auto_peering_lambda]
+
+  lifecycle {
+    precondition {
+      condition = (local.reserved_concurrent_executions == -1 ||
+                   local.reserved_concurrent_executions >= local.minimum_queue_concurrency)
+      error_message = "The reserved_concurrent_executions variable must be at least 5, or -1, when the event source is \"sqs\"."
+    }
+  }
+}
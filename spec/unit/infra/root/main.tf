@@ -15,6 +15,21 @@ module "vpc_auto_peering_lambda" {
   infrastructure_events_topic_arn = data.terraform_remote_state.prerequisites.outputs.infrastructure_events_topic_arn
 
   search_regions = var.search_regions
+  search_parallelism = var.search_parallelism
   search_accounts = var.search_accounts
   peering_role_name = var.peering_role_name
+  discovery_mode = var.discovery_mode
+  vpc_inventory_ttl = var.vpc_inventory_ttl
+  session_cache_size = var.session_cache_size
+  route_mode = var.route_mode
+  link_parallelism = var.link_parallelism
+  link_parallelism_per_account = var.link_parallelism_per_account
+  provisioning_mode = var.provisioning_mode
+  destroy_mode = var.destroy_mode
+  tracing_exporter = var.tracing_exporter
+  event_source = var.event_source
+  sqs_batch_size = var.sqs_batch_size
+  sqs_maximum_batching_window = var.sqs_maximum_batching_window
+  sqs_maximum_receive_count = var.sqs_maximum_receive_count
+  reserved_concurrent_executions = var.reserved_concurrent_executions
 }
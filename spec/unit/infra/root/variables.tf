@@ -5,6 +5,10 @@ variable "search_regions" {
   type = list(string)
   default = null
 }
+variable "search_parallelism" {
+  type = number
+  default = null
+}
 variable "search_accounts" {
   type = list(string)
   default = null
@@ -12,3 +16,53 @@ variable "search_accounts" {
 variable "peering_role_name" {
   default = null
 }
+variable "discovery_mode" {
+  default = null
+}
+variable "vpc_inventory_ttl" {
+  type = number
+  default = null
+}
+variable "session_cache_size" {
+  type = number
+  default = null
+}
+variable "route_mode" {
+  default = null
+}
+variable "link_parallelism" {
+  type = number
+  default = null
+}
+variable "link_parallelism_per_account" {
+  type = number
+  default = null
+}
+variable "provisioning_mode" {
+  default = null
+}
+variable "destroy_mode" {
+  default = null
+}
+variable "tracing_exporter" {
+  default = null
+}
+variable "event_source" {
+  default = null
+}
+variable "sqs_batch_size" {
+  type = number
+  default = null
+}
+variable "sqs_maximum_batching_window" {
+  type = number
+  default = null
+}
+variable "sqs_maximum_receive_count" {
+  type = number
+  default = null
+}
+variable "reserved_concurrent_executions" {
+  type = number
+  default = null
+}
@@ -68,6 +68,16 @@ describe 'lambda' do
               ))
     end
 
+    it 'includes an AWS_SEARCH_PARALLELISM environment variable with a ' \
+       'value of "1"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_SEARCH_PARALLELISM: '1')
+              ))
+    end
+
     it 'includes an AWS_SEARCH_ACCOUNTS environment variable with an ' \
        'empty string as value' do
       expect(@plan)
@@ -87,6 +97,96 @@ describe 'lambda' do
                 a_hash_including(AWS_PEERING_ROLE_NAME: '')
               ))
     end
+
+    it 'includes an AWS_DISCOVERY_MODE environment variable with a ' \
+       'value of "full"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_DISCOVERY_MODE: 'full')
+              ))
+    end
+
+    it 'includes an AWS_VPC_INVENTORY_TTL environment variable with a ' \
+       'value of "0"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_VPC_INVENTORY_TTL: '0')
+              ))
+    end
+
+    it 'includes an AWS_SESSION_CACHE_SIZE environment variable with a ' \
+       'value of "128"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_SESSION_CACHE_SIZE: '128')
+              ))
+    end
+
+    it 'includes an AWS_ROUTE_MODE environment variable with a ' \
+       'value of "create"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_ROUTE_MODE: 'create')
+              ))
+    end
+
+    it 'includes an AWS_LINK_PARALLELISM environment variable with a ' \
+       'value of "1"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_LINK_PARALLELISM: '1')
+              ))
+    end
+
+    it 'includes an AWS_LINK_PARALLELISM_PER_ACCOUNT environment variable with a ' \
+       'value of "0"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_LINK_PARALLELISM_PER_ACCOUNT: '0')
+              ))
+    end
+
+    it 'includes an AWS_PROVISIONING_MODE environment variable with a ' \
+       'value of "serial"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_PROVISIONING_MODE: 'serial')
+              ))
+    end
+
+    it 'includes an AWS_DESTROY_MODE environment variable with a ' \
+       'value of "discovery"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_DESTROY_MODE: 'discovery')
+              ))
+    end
+
+    it 'includes an AWS_TRACING_EXPORTER environment variable with a ' \
+       'value of "none"' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_TRACING_EXPORTER: 'none')
+              ))
+    end
   end
 
   describe 'when no search regions provided' do
@@ -148,6 +248,24 @@ describe 'lambda' do
     end
   end
 
+  describe 'when search parallelism provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.search_parallelism = 10
+      end
+    end
+
+    it 'includes an AWS_SEARCH_PARALLELISM environment variable with the ' \
+       'provided search parallelism as value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_SEARCH_PARALLELISM: '10')
+              ))
+    end
+  end
+
   describe 'when no search accounts provided' do
     before(:context) do
       @plan = plan(role: :root) do |vars|
@@ -228,4 +346,180 @@ describe 'lambda' do
               ))
     end
   end
+
+  describe 'when discovery mode provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.discovery_mode = 'targeted'
+      end
+    end
+
+    it 'includes an AWS_DISCOVERY_MODE environment variable with the ' \
+       'provided discovery mode as value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_DISCOVERY_MODE: 'targeted')
+              ))
+    end
+  end
+
+  describe 'when VPC inventory TTL provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.vpc_inventory_ttl = 120
+      end
+    end
+
+    it 'includes an AWS_VPC_INVENTORY_TTL environment variable with the ' \
+       'provided TTL as value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_VPC_INVENTORY_TTL: '120')
+              ))
+    end
+  end
+
+  describe 'when session cache size provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.session_cache_size = 16
+      end
+    end
+
+    it 'includes an AWS_SESSION_CACHE_SIZE environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_SESSION_CACHE_SIZE: '16')
+              ))
+    end
+  end
+
+  describe 'when route mode provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.route_mode = 'reconcile'
+      end
+    end
+
+    it 'includes an AWS_ROUTE_MODE environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_ROUTE_MODE: 'reconcile')
+              ))
+    end
+  end
+
+  describe 'when link parallelism provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.link_parallelism = 8
+      end
+    end
+
+    it 'includes an AWS_LINK_PARALLELISM environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_LINK_PARALLELISM: '8')
+              ))
+    end
+  end
+
+  describe 'when link parallelism per account provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.link_parallelism_per_account = 2
+      end
+    end
+
+    it 'includes an AWS_LINK_PARALLELISM_PER_ACCOUNT environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_LINK_PARALLELISM_PER_ACCOUNT: '2')
+              ))
+    end
+  end
+
+  describe 'when provisioning mode provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.provisioning_mode = 'batched'
+      end
+    end
+
+    it 'includes an AWS_PROVISIONING_MODE environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_PROVISIONING_MODE: 'batched')
+              ))
+    end
+  end
+
+  describe 'when destroy mode provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.destroy_mode = 'fast'
+      end
+    end
+
+    it 'includes an AWS_DESTROY_MODE environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_DESTROY_MODE: 'fast')
+              ))
+    end
+  end
+
+  describe 'when tracing exporter provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.tracing_exporter = 'stdout'
+      end
+    end
+
+    it 'includes an AWS_TRACING_EXPORTER environment variable with the ' \
+       'provided value' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(
+                [:environment, 0, :variables],
+                a_hash_including(AWS_TRACING_EXPORTER: 'stdout')
+              ))
+    end
+  end
+
+  describe 'when reserved concurrent executions provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.reserved_concurrent_executions = 5
+      end
+    end
+
+    it 'uses the provided number of reserved concurrent executions' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(:reserved_concurrent_executions, 5))
+    end
+  end
 end
@@ -0,0 +1,130 @@
+# frozen_string_literal: true
+
+require 'spec_helper'
+
+describe 'queue' do
+  let(:region) do
+    var(role: :root, name: 'region')
+  end
+  let(:deployment_identifier) do
+    var(role: :root, name: 'deployment_identifier')
+  end
+
+  describe 'by default' do
+    before(:context) do
+      @plan = plan(role: :root)
+    end
+
+    it 'does not create any queues' do
+      expect(@plan)
+        .not_to(include_resource_creation(type: 'aws_sqs_queue'))
+    end
+
+    it 'does not create an event source mapping' do
+      expect(@plan)
+        .not_to(include_resource_creation(
+                  type: 'aws_lambda_event_source_mapping'
+                ))
+    end
+  end
+
+  describe 'when event source is "sqs"' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.event_source = 'sqs'
+      end
+    end
+
+    it 'creates a dead letter queue' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_sqs_queue')
+              .with_attribute_value(:name, including('dlq')))
+    end
+
+    it 'includes the region and deployment identifier in the queue names' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_sqs_queue')
+              .with_attribute_value(
+                :name, including(region).and(including(deployment_identifier))
+              ))
+    end
+
+    it 'uses a visibility timeout of six times the lambda timeout' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_sqs_queue')
+              .with_attribute_value(:visibility_timeout_seconds, 1800))
+    end
+
+    it 'creates a queue policy' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_sqs_queue_policy')
+              .once)
+    end
+
+    it 'creates an event source mapping' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .once)
+    end
+
+    it 'reports batch item failures' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .with_attribute_value(
+                :function_response_types, ['ReportBatchItemFailures']
+              ))
+    end
+
+    it 'uses a batch size of 10' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .with_attribute_value(:batch_size, 10))
+    end
+
+    it 'uses a maximum batching window of 0 seconds' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .with_attribute_value(:maximum_batching_window_in_seconds, 0))
+    end
+
+    it 'reserves five concurrent executions for the lambda' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_function')
+              .with_attribute_value(:reserved_concurrent_executions, 5))
+    end
+  end
+
+  describe 'when event source is "sqs" and reserved concurrent executions ' \
+           'are below five' do
+    it 'fails to plan' do
+      expect do
+        plan(role: :root) do |vars|
+          vars.event_source = 'sqs'
+          vars.reserved_concurrent_executions = 1
+        end
+      end.to(raise_error(RubyTerraform::Errors::ExecutionError))
+    end
+  end
+
+  describe 'when batch size and batching window provided' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.event_source = 'sqs'
+        vars.sqs_batch_size = 25
+        vars.sqs_maximum_batching_window = 5
+      end
+    end
+
+    it 'uses the provided batch size' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .with_attribute_value(:batch_size, 25))
+    end
+
+    it 'uses the provided maximum batching window' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_lambda_event_source_mapping')
+              .with_attribute_value(:maximum_batching_window_in_seconds, 5))
+    end
+  end
+end
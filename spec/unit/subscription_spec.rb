@@ -66,4 +66,32 @@ describe 'topic subscription' do
               ))
     end
   end
+
+  describe 'when event source is "sqs"' do
+    before(:context) do
+      @plan = plan(role: :root) do |vars|
+        vars.event_source = 'sqs'
+      end
+    end
+
+    it 'does not subscribe the lambda to the topic' do
+      expect(@plan)
+        .not_to(include_resource_creation(type: 'aws_sns_topic_subscription')
+                  .with_attribute_value(:protocol, 'lambda'))
+    end
+
+    it 'does not create a lambda permission' do
+      expect(@plan)
+        .not_to(include_resource_creation(type: 'aws_lambda_permission'))
+    end
+
+    it 'subscribes a queue to the provided topic' do
+      expect(@plan)
+        .to(include_resource_creation(type: 'aws_sns_topic_subscription')
+              .with_attribute_value(:protocol, 'sqs')
+              .with_attribute_value(
+                :topic_arn, infrastructure_events_topic_arn
+              ))
+    end
+  end
 end
@@ -1,4 +1,6 @@
 resource "aws_lambda_permission" "infrastructure_events_topic_auto_peering_lambda" {
+  count = local.event_source == "sns" ? 1 : 0
+
   statement_id = "AllowExecutionFromSNS"
   action = "lambda:InvokeFunction"
   function_name = aws_lambda_function.auto_peering.arn
@@ -7,7 +9,19 @@ resource "aws_lambda_permission" "infrastructure_events_topic_auto_peering_lambd
 }
 
 resource "aws_sns_topic_subscription" "infrastructure_events_topic_auto_peering_lambda" {
+  count = local.event_source == "sns" ? 1 : 0
+
   topic_arn = var.infrastructure_events_topic_arn
   protocol = "lambda"
   endpoint = aws_lambda_function.auto_peering.arn
 }
+
+moved {
+  from = aws_lambda_permission.infrastructure_events_topic_auto_peering_lambda
+  to = aws_lambda_permission.infrastructure_events_topic_auto_peering_lambda[0]
+}
+
+moved {
+  from = aws_sns_topic_subscription.infrastructure_events_topic_auto_peering_lambda
+  to = aws_sns_topic_subscription.infrastructure_events_topic_auto_peering_lambda[0]
+}
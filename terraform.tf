@@ -1,10 +1,10 @@
 terraform {
-  required_version = ">= 1.0"
+  required_version = ">= 1.2"
 
   required_providers {
     aws      = {
       source  = "hashicorp/aws"
-      version = ">= 3.33"
+      version = ">= 3.40"
     }
     archive = {
       source  = "hashicorp/archive"
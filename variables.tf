@@ -17,13 +17,88 @@ variable "search_regions" {
   type = list(string)
   default = []
 }
+variable "search_parallelism" {
+  description = "The maximum number of account and region pairs to search for VPCs concurrently."
+  type = number
+  default = 1
+}
 variable "search_accounts" {
   description = "IDs of AWS accounts to search for dependency and dependent VPCs."
   type = list(string)
   default = []
 }
+variable "discovery_mode" {
+  description = "How to discover dependency and dependent VPCs, one of \"full\" to list all VPCs or \"targeted\" to filter VPCs by tag."
+  type = string
+  default = "full"
+}
+variable "vpc_inventory_ttl" {
+  description = "The number of seconds for which a warm lambda reuses the VPCs it has listed. Should be less than the peering role's maximum session duration."
+  type = number
+  default = 0
+}
 variable "peering_role_name" {
   description = "The name of the role to assume to create peering relationships and routes."
   type = string
   default = ""
 }
+variable "session_cache_size" {
+  description = "The maximum number of assumed role sessions a warm lambda keeps for reuse."
+  type = number
+  default = 128
+}
+variable "route_mode" {
+  description = "How to create routes, one of \"create\" to create every route or \"reconcile\" to create only missing routes."
+  type = string
+  default = "create"
+}
+variable "link_parallelism" {
+  description = "The maximum number of VPC links to provision or destroy concurrently."
+  type = number
+  default = 1
+}
+variable "link_parallelism_per_account" {
+  description = "The maximum number of VPC links involving any one account to provision or destroy concurrently, or 0 for no per account limit."
+  type = number
+  default = 0
+}
+variable "provisioning_mode" {
+  description = "How to provision peering connections, one of \"serial\" to wait for each connection in turn, \"batched\" to request all connections then wait for them together or \"scheduled\" to run the steps of all links as a dependency graph."
+  type = string
+  default = "serial"
+}
+variable "destroy_mode" {
+  description = "How to destroy peering connections, one of \"discovery\" to resolve links by discovering VPCs or \"fast\" to find connections by the destroyed VPC ID."
+  type = string
+  default = "discovery"
+}
+variable "tracing_exporter" {
+  description = "Where to export tracing spans around each phase of an invocation, one of \"none\" to disable tracing, \"stdout\" to print spans as JSON or \"otlp_file\" to append them to an OTLP JSON file in the lambda's temporary directory."
+  type = string
+  default = "none"
+}
+variable "event_source" {
+  description = "How the lambda receives VPC lifecycle events, one of \"sns\" to subscribe it to the topic directly or \"sqs\" to buffer events in a queue subscribed to the topic."
+  type = string
+  default = "sns"
+}
+variable "sqs_batch_size" {
+  description = "The maximum number of queued events passed to each invocation of the lambda when the event source is \"sqs\"."
+  type = number
+  default = 10
+}
+variable "sqs_maximum_batching_window" {
+  description = "The maximum number of seconds to spend gathering a batch of queued events when the event source is \"sqs\"."
+  type = number
+  default = 0
+}
+variable "sqs_maximum_receive_count" {
+  description = "The number of times a queued event is attempted before it is moved to the dead letter queue when the event source is \"sqs\"."
+  type = number
+  default = 5
+}
+variable "reserved_concurrent_executions" {
+  description = "The number of concurrent executions reserved for the lambda, at least 5 when the event source is \"sqs\" or -1 for none. Defaults to 1, or 5 when the event source is \"sqs\"."
+  type = number
+  default = null
+}